@@ -5,14 +5,24 @@ if __name__ == "__main__":
 import json
 from typing import Any
 from strands import Agent, tool, models
-from strands_tools import file_write, http_request, shell
+from strands_tools import http_request
+import hashlib
 import os
-from tools_config import load_config_from_dynamodb, create_tool_desc
+import threading
+import time
+from tools_config import (create_tool_desc, get_tool_code_from_manifest, invalidate_tool_manifest,
+                          load_tool_catalog, upsert_tool_manifest)
+from telemetry import FabricationTrace, agent_usage, span, usage_from_result
+from scheduler import run_batch
 import boto3
 from botocore.config import Config
 
 os.environ.setdefault("BYPASS_TOOL_CONSENT", "true")
 
+s3 = boto3.client('s3')
+dynamodb = boto3.resource('dynamodb')
+events = boto3.client('events')
+
 def get_tool_fabricator_prompt():
     """System prompt for the Tool Fabricator agent"""
     TOOL_FABRICATOR_PROMPT = """
@@ -104,12 +114,11 @@ def get_tool_fabricator_prompt():
     - Includes complete docstrings
     - No test code included
     - Single file, importable as worker tool
-    - Uses /tmp/ for file operations
+    - Keeps intermediate data in memory, with no local file staging
     - All 3 output sections present
     - Code has NO markdown backticks
     - Metadata JSON is valid
-    - Store custom tool file in s3
-    - Register custom tool config to tool dynamoDB
+    - Publish the tool with publish_tool, passing the code as a string (uploads to s3 and registers the config in one call)
     </checklist>
     """
     return TOOL_FABRICATOR_PROMPT
@@ -117,7 +126,7 @@ def get_tool_fabricator_prompt():
 
 def get_agent_fabricator_prompt():
     """System prompt for the Agent Fabricator agent"""
-    tool_configs = load_config_from_dynamodb()
+    tool_configs = load_tool_catalog()
     worker_tools_list = '\n'.join(create_tool_desc(tool_configs))
 
     AGENT_FABRICATOR_PROMPT = f"""
@@ -247,7 +256,7 @@ def get_agent_fabricator_prompt():
 
     <governance_compliance>
     Your generated agents MUST:
-    - Use /tmp/ for all file writes before S3 upload
+    - Upload results to S3 directly from memory (put_object with the content) instead of staging files locally
     - Be deterministic (no random behavior unless explicitly required)
     - Include meaningful logging via journal or speak tools
 
@@ -368,12 +377,11 @@ def get_agent_fabricator_prompt():
     - Includes complete docstrings
     - No test code included
     - Single file, importable as module
-    - Uses /tmp/ for file operations
+    - Keeps intermediate data in memory, with no local file staging
     - All 4 output sections present
     - Code has NO markdown backticks
     - Metadata JSON is valid
-    - Store agent file in s3
-    - Register agent config to agent dynamoDB
+    - Publish the agent with publish_agent, passing the code as a string (uploads to s3 and registers the config in one call)
     </checklist>
 
     <reminder>
@@ -386,25 +394,34 @@ def get_agent_fabricator_prompt():
     """
     return AGENT_FABRICATOR_PROMPT
 
-def upload_to_s3(file_path, folder):
-    """Upload a file to S3"""
-    s3 = boto3.client('s3')
+def upload_code_to_s3(code: str, file_name: str, folder: str) -> dict:
+    """Upload source code held in memory to S3 under the given folder.
+
+    The code is sent straight from memory, so no temporary file is written.
+    A SHA-256 hash of the content is stored as object metadata and returned
+    so it can be recorded alongside the DynamoDB configuration.
+
+    Returns:
+        dict: the S3 key, content hash and size in bytes
+    """
     bucket_name = os.environ.get("AGENT_BUCKET_NAME", None)
     if bucket_name is None:
         raise ValueError("AGENT_BUCKET_NAME environment variable is not set")
-    print(f"storing {file_path}")
-    filename = file_path.split("/")[-1]
-    s3.upload_file(file_path, bucket_name, f"{folder}/{filename}")
-
-@tool
-def upload_agent_to_s3(file_path):
-    """Upload a agent file to S3"""
-    upload_to_s3(file_path, "agents")
 
-@tool
-def upload_tool_to_s3(file_path):
-    """Upload a tool file to S3"""
-    upload_to_s3(file_path, "tools")
+    body = code.encode('utf-8')
+    code_hash = hashlib.sha256(body).hexdigest()
+    filename = file_name.split("/")[-1]
+    s3_key = f"{folder}/{filename}"
+
+    print(f"storing s3://{bucket_name}/{s3_key} ({len(body)} bytes, sha256 {code_hash})")
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=s3_key,
+        Body=body,
+        ContentType='text/x-python',
+        Metadata={'sha256': code_hash}
+    )
+    return {'s3_key': s3_key, 'code_hash': code_hash, 'size': len(body)}
 
 @tool
 def get_worker_tool(tool_name: str) -> str:
@@ -419,12 +436,17 @@ def get_worker_tool(tool_name: str) -> str:
     Raises:
         ValueError: If AGENT_BUCKET_NAME environment variable is not set
     """
-    s3 = boto3.client('s3')
     bucket_name = os.environ.get("AGENT_BUCKET_NAME", None)
     
     if bucket_name is None:
         raise ValueError("AGENT_BUCKET_NAME environment variable is not set")
     
+    # The registry manifest usually already holds the code
+    tool_code = get_tool_code_from_manifest(tool_name)
+    if tool_code is not None:
+        print(f"Retrieved tool from manifest: {tool_name}")
+        return tool_code
+
     # Construct the S3 key for the tool in the tools/ folder
     s3_key = f"tools/{tool_name}"
     
@@ -440,38 +462,27 @@ def get_worker_tool(tool_name: str) -> str:
         raise
 
 
-@tool
-def store_agent_config_dynamo(file_name: str, agent_id: str, llm_tool_schema: Any, agent_description: str):
+def store_agent_config_dynamo(file_name: str, agent_id: str, llm_tool_schema: Any, agent_description: str,
+                              code_hash: str = None):
     """Store agent configuration in DynamoDB.
     
     Requirements:
-    - AGENT_CONFIG_TABLE_NAME environment variable must be set with the DynamoDB table name
+    - AGENT_CONFIG_TABLE environment variable must be set with the DynamoDB table name
     - DynamoDB table must use 'agentId' as the primary key
     
     Args:
         file_name (str): The filename where the agent implementation is stored
         agent_id (str): Unique identifier for the agent (used as primary key in DynamoDB)
         llm_tool_schema (Any): OpenAPI schema structure defining the agents parameters
-                               Must follow OpenAPI format with properties, required fields, and types
-                               Example: {
-                                 "properties": {
-                                   "param_name": {
-                                     "description": "Parameter description",
-                                     "type": "string"
-                                   }
-                                 },
-                                 "required": ["param_name"],
-                                 "type": "object"
-                               }
         agent_description (str): Human-readable description of what the agent does
+        code_hash (str): Optional SHA-256 hash of the uploaded agent code
         
     Returns:
         bool: True if configuration was successfully stored
         
     Raises:
-        ValueError: If AGENT_CONFIG_TABLE_NAME environment variable is not set
+        ValueError: If AGENT_CONFIG_TABLE environment variable is not set
     """
-    dynamodb = boto3.resource('dynamodb')
     table_name = os.environ.get("AGENT_CONFIG_TABLE", None)
     if table_name is None:
         raise ValueError(
@@ -481,21 +492,25 @@ def store_agent_config_dynamo(file_name: str, agent_id: str, llm_tool_schema: An
     if isinstance(llm_tool_schema, str):
         llm_tool_schema = json.loads(llm_tool_schema)
 
+    config = {
+        "name": agent_id,
+        "filename": file_name.split('/')[-1],
+        "schema": llm_tool_schema,
+        "version": '1',
+        "description": agent_description,
+        "action": {
+            "type": "sqs",
+            "target": os.environ.get("WORKER_QUEUE_URL", "MISSING")
+        },
+    }
+    if code_hash:
+        config["code_hash"] = code_hash
+
     table = dynamodb.Table(table_name)
     table.put_item(
         Item={
             'agentId': agent_id,
-            'config': {
-                "name": agent_id,
-                "filename": file_name.split('/')[-1],
-                "schema": llm_tool_schema,
-                "version": '1',
-                "description": agent_description,
-                "action": {
-                    "type": "sqs",
-                    "target": os.environ.get("WORKER_QUEUE_URL", "MISSING")
-                },
-            },
+            'config': config,
             'state': 'inactive',
             'categories': ['worker']
         }
@@ -503,79 +518,186 @@ def store_agent_config_dynamo(file_name: str, agent_id: str, llm_tool_schema: An
     return True
 
 
-@tool
-def store_tool_config_dynamo(file_name: str, tool_id: str, tool_schema: Any, tool_description: str):
+def store_tool_config_dynamo(file_name: str, tool_id: str, tool_schema: Any, tool_description: str,
+                             code_hash: str = None, tool_code: str = None):
     """Store tool configuration in DynamoDB.
     
     Requirements:
-    - TOOL_CONFIG_TABLE_NAME environment variable must be set with the DynamoDB table name
+    - TOOLS_CONFIG_TABLE environment variable must be set with the DynamoDB table name
     - DynamoDB table must use 'toolId' as the primary key
     
     Args:
         file_name (str): The filename where the tool implementation is stored
         tool_id (str): Unique identifier for the tool (used as primary key in DynamoDB)
         tool_schema (Any): OpenAPI schema structure defining the tools parameters
-                               Must follow OpenAPI format with properties, required fields, and types
-                               Example: {
-                                 "properties": {
-                                   "param_name": {
-                                     "description": "Parameter description",
-                                     "type": "string"
-                                   }
-                                 },
-                                 "required": ["param_name"],
-                                 "type": "object"
-                               }
         tool_description (str): Human-readable description of what the tool does
+        code_hash (str): Optional SHA-256 hash of the uploaded tool code
+        tool_code (str): Optional tool source, saves re-reading it from S3 for the manifest
         
     Returns:
         bool: True if configuration was successfully stored
         
     Raises:
-        ValueError: If TOOL_CONFIG_TABLE_NAME environment variable is not set
+        ValueError: If TOOLS_CONFIG_TABLE environment variable is not set
     """
-    dynamodb = boto3.resource('dynamodb')
-    table_name = os.environ.get("TOOL_CONFIG_TABLE", None)
+    table_name = os.environ.get("TOOLS_CONFIG_TABLE", None)
     if table_name is None:
         raise ValueError(
-            "TOOL_CONFIG_TABLE environment variable is not set")
+            "TOOLS_CONFIG_TABLE environment variable is not set")
 
     # if tool_schema is str then json loads it
     if isinstance(tool_schema, str):
         tool_schema = json.loads(tool_schema)
 
+    config = {
+        "name": tool_id,
+        "filename": file_name.split('/')[-1],
+        "schema": tool_schema,
+        "version": '1',
+        "description": tool_description,
+    }
+    if code_hash:
+        config["code_hash"] = code_hash
+
     table = dynamodb.Table(table_name)
     table.put_item(
         Item={
             'toolId': tool_id,
-            'config': {
-                "name": tool_id,
-                "filename": file_name.split('/')[-1],
-                "schema": tool_schema,
-                "version": '1',
-                "description": tool_description,
-            },
+            'config': config,
             'state': 'active'
         }
     )
+
+    # Keep the registry manifest in step with the table. This must not fail the
+    # store itself; a manifest that could not be updated is dropped instead and
+    # rebuilt by the next consumer
+    try:
+        upsert_tool_manifest(config, tool_code, code_hash)
+    except Exception as e:
+        print(f"Failed to update tool manifest: {e}")
+        try:
+            invalidate_tool_manifest()
+        except Exception as e:
+            print(f"Failed to invalidate tool manifest: {e}")
     return True
 
 
+@tool
+def publish_agent(agent_code: str, file_name: str, agent_id: str, llm_tool_schema: Any, agent_description: str) -> str:
+    """Upload generated agent code to S3 and register its configuration in DynamoDB in one step.
+
+    Pass the complete agent source as a string; do not write it to disk first.
+
+    Args:
+        agent_code (str): Complete Python source of the agent file
+        file_name (str): Filename to store the agent as (e.g., 'my_agent.py')
+        agent_id (str): Unique identifier for the agent (used as primary key in DynamoDB)
+        llm_tool_schema (Any): OpenAPI schema structure defining the agents parameters
+                               Must follow OpenAPI format with properties, required fields, and types
+                               Example: {
+                                 "properties": {
+                                   "param_name": {
+                                     "description": "Parameter description",
+                                     "type": "string"
+                                   }
+                                 },
+                                 "required": ["param_name"],
+                                 "type": "object"
+                               }
+        agent_description (str): Human-readable description of what the agent does
+
+    Returns:
+        str: Confirmation with the S3 key and content hash of the stored agent
+    """
+    with span('upload', kind='agent', file_name=file_name) as record:
+        upload = upload_code_to_s3(agent_code, file_name, "agents")
+        record['bytes'] = upload['size']
+    with span('store_config', kind='agent', agent_id=agent_id):
+        store_agent_config_dynamo(file_name, agent_id, llm_tool_schema, agent_description, upload['code_hash'])
+    return f"Agent {agent_id} published to {upload['s3_key']} (sha256 {upload['code_hash']})"
+
+
+@tool
+def publish_tool(tool_code: str, file_name: str, tool_id: str, tool_schema: Any, tool_description: str) -> str:
+    """Upload generated tool code to S3 and register its configuration in DynamoDB in one step.
+
+    Pass the complete tool source as a string; do not write it to disk first.
+
+    Args:
+        tool_code (str): Complete Python source of the tool file
+        file_name (str): Filename to store the tool as (e.g., 'my_tool.py')
+        tool_id (str): Unique identifier for the tool (used as primary key in DynamoDB)
+        tool_schema (Any): OpenAPI schema structure defining the tools parameters
+                           Must follow OpenAPI format with properties, required fields, and types
+        tool_description (str): Human-readable description of what the tool does
+
+    Returns:
+        str: Confirmation with the S3 key and content hash of the stored tool
+    """
+    with span('upload', kind='tool', file_name=file_name) as record:
+        upload = upload_code_to_s3(tool_code, file_name, "tools")
+        record['bytes'] = upload['size']
+    with span('store_config', kind='tool', tool_id=tool_id):
+        store_tool_config_dynamo(file_name, tool_id, tool_schema, tool_description, upload['code_hash'], tool_code)
+    invalidate_agent_fabricator_prompt()
+    return f"Tool {tool_id} published to {upload['s3_key']} (sha256 {upload['code_hash']})"
+
+
+# Model clients and the static parts of both agents are built once per
+# container at init time; only the per-request tools are bound per event.
+TOOL_FABRICATOR_MODEL = models.BedrockModel(
+    model_id="anthropic.claude-3-5-sonnet-20241022-v2:0",
+    max_tokens=4096,
+    region_name="us-west-2",
+)
+
+AGENT_FABRICATOR_MODEL = models.BedrockModel(
+    model_id="anthropic.claude-3-5-sonnet-20241022-v2:0",
+    max_tokens=8192,
+    region_name="us-west-2",
+    boto_client_config=Config(read_timeout=3600),
+)
+
+TOOL_FABRICATOR_PROMPT = get_tool_fabricator_prompt()
+TOOL_FABRICATOR_TOOLS = [http_request, publish_tool]
+AGENT_FABRICATOR_TOOLS = [http_request, get_worker_tool, publish_agent]
+
+# The agent fabricator prompt embeds the worker tool catalog, so it is cached
+# for a limited time and dropped whenever this container publishes a tool.
+PROMPT_CACHE_TTL_SECONDS = int(os.environ.get('PROMPT_CACHE_TTL_SECONDS', '300'))
+_prompt_cache = {'prompt': None, 'loaded': 0.0}
+_prompt_cache_lock = threading.Lock()
+
+
+def cached_agent_fabricator_prompt():
+    """Return the Agent Fabricator prompt, reloading the tool catalog when stale"""
+    with _prompt_cache_lock:
+        if _prompt_cache['prompt'] is None or time.time() - _prompt_cache['loaded'] > PROMPT_CACHE_TTL_SECONDS:
+            _prompt_cache['prompt'] = get_agent_fabricator_prompt()
+            _prompt_cache['loaded'] = time.time()
+        return _prompt_cache['prompt']
+
+
+def invalidate_agent_fabricator_prompt():
+    """Force the next fabrication to reload the worker tool catalog"""
+    with _prompt_cache_lock:
+        _prompt_cache['prompt'] = None
+
+
 def create_tool_fabricator():
     """Create and return the Tool Fabricator agent"""
-    bedrock_model = models.BedrockModel(
-        model_id="anthropic.claude-3-5-sonnet-20241022-v2:0",
-        max_tokens=4096,
-        region_name="us-west-2",
+    return Agent(
+        TOOL_FABRICATOR_MODEL,
+        tools=TOOL_FABRICATOR_TOOLS,
+        system_prompt=TOOL_FABRICATOR_PROMPT
     )
-    
-    tool_fabricator = Agent(
-        bedrock_model,
-        tools=[file_write, http_request, shell, upload_tool_to_s3, store_tool_config_dynamo],
-        system_prompt=get_tool_fabricator_prompt()
-    )
-    
-    return tool_fabricator
+
+
+try:
+    cached_agent_fabricator_prompt()
+except Exception as e:
+    # Not fatal at init; the prompt is loaded again on the first request
+    print(f"Unable to preload agent fabricator prompt: {e}")
 
 
 def process_event(event, context):
@@ -591,97 +713,102 @@ def process_event(event, context):
         print(f"Error: No taskDetails found in event: {event}")
         raise ValueError("taskDetails is required in agent_input")
 
-    # Create the Tool Fabricator agent
-    tool_fabricator = create_tool_fabricator()
-
-    bedrock_model = models.BedrockModel(
-        model_id="anthropic.claude-3-5-sonnet-20241022-v2:0",
-        max_tokens=8192,
-        region_name="us-west-2",
-        boto_client_config=Config(read_timeout=3600),
-    )
+    with FabricationTrace(orchestration_id, agent_use_id, agent_name) as trace:
+        # Create the Tool Fabricator agent
+        tool_fabricator = create_tool_fabricator()
 
-    # Tool for Agent Fabricator to request custom tool creation
-    @tool
-    def create_custom_tool(tool_description: str) -> str:
-        """Request the Tool Fabricator to create a custom tool.
+        # Tool for Agent Fabricator to request custom tool creation
+        @tool
+        def create_custom_tool(tool_description: str) -> str:
+            """Request the Tool Fabricator to create a custom tool.
         
-        Args:
-            tool_description: Detailed description of what the tool should do
+            Args:
+                tool_description: Detailed description of what the tool should do
             
-        Returns:
-            The generated tool code as a string
-        """
-        print(f"Agent Fabricator requesting custom tool: {tool_description}")
+            Returns:
+                The generated tool code as a string
+            """
+            print(f"Agent Fabricator requesting custom tool: {tool_description}")
         
-        # Call the Tool Fabricator agent
-        result = tool_fabricator(f"Create a custom tool with the following requirements: {tool_description}")
+            # Call the Tool Fabricator agent
+            # The Tool Fabricator is reused for every tool of this request and its
+            # metrics are running totals, so count only this call
+            with span('tool_fabrication') as record:
+                before = agent_usage(tool_fabricator)
+                result = tool_fabricator(f"Create a custom tool with the following requirements: {tool_description}")
+                usage = usage_from_result(result, before)
+                record.update(usage)
+            trace.add_usage(usage)
         
-        print(f"Tool Fabricator response: {result}")
-        return result
-
-    # since this needs variable injection, keep within handler method scope.
-    @tool
-    def complete_task():
-        """Finally, call this to indicate the task has been completed"""
-        client = boto3.client('events')
-        COMPLETION_BUS_NAME = os.environ.get('COMPLETION_BUS_NAME')
+            print(f"Tool Fabricator response: {result}")
+            return result
+
+        # since this needs variable injection, keep within handler method scope.
+        @tool
+        def complete_task():
+            """Finally, call this to indicate the task has been completed"""
+            COMPLETION_BUS_NAME = os.environ.get('COMPLETION_BUS_NAME')
         
-        # Check if this is a direct request (orchestration_id == '0') or part of an orchestration
-        if orchestration_id == '0':
-            # Direct request from UI - send agent.fabricated event
-            completion_event = {
-                'Source': 'agent.fabricated',
-                'DetailType': 'agent.fabricated',
-                'EventBusName': COMPLETION_BUS_NAME,
-                'Detail': json.dumps({
-                    'orchestration_id': orchestration_id,
-                    'data': 'Capability has been created',
-                    'agent_use_id': agent_use_id,
-                    'node': agent_name
-                })
-            }
-        else:
-            # Part of orchestration - send task.completion event
-            completion_event = {
-                'Source': 'task.completion',
-                'DetailType': 'task.completion',
-                'EventBusName': COMPLETION_BUS_NAME,
-                'Detail': json.dumps({
-                    'orchestration_id': orchestration_id,
-                    'data': 'Capability has been created, try to invoke it again.',
-                    'agent_use_id': agent_use_id,
-                    'node': agent_name
-                })
-            }
-
-        print("Completed")
-
-        response = client.put_events(
-            Entries=[
-                completion_event
-            ]
+            # Check if this is a direct request (orchestration_id == '0') or part of an orchestration
+            if orchestration_id == '0':
+                # Direct request from UI - send agent.fabricated event
+                completion_event = {
+                    'Source': 'agent.fabricated',
+                    'DetailType': 'agent.fabricated',
+                    'EventBusName': COMPLETION_BUS_NAME,
+                    'Detail': json.dumps({
+                        'orchestration_id': orchestration_id,
+                        'data': 'Capability has been created',
+                        'agent_use_id': agent_use_id,
+                        'node': agent_name
+                    })
+                }
+            else:
+                # Part of orchestration - send task.completion event
+                completion_event = {
+                    'Source': 'task.completion',
+                    'DetailType': 'task.completion',
+                    'EventBusName': COMPLETION_BUS_NAME,
+                    'Detail': json.dumps({
+                        'orchestration_id': orchestration_id,
+                        'data': 'Capability has been created, try to invoke it again.',
+                        'agent_use_id': agent_use_id,
+                        'node': agent_name
+                    })
+                }
+
+            print("Completed")
+
+            with span('completion_event', source=completion_event['Source']):
+                response = events.put_events(
+                    Entries=[
+                        completion_event
+                    ]
+                )
+            print(f"event posted: {response}")
+            return f"event posted: {completion_event}"
+
+        with span('load_prompt'):
+            agent_fabricator_prompt = cached_agent_fabricator_prompt()
+
+        # Create the Agent Fabricator with access to create_custom_tool
+        agent_fabricator = Agent(
+            AGENT_FABRICATOR_MODEL,
+            tools=AGENT_FABRICATOR_TOOLS + [create_custom_tool, complete_task],
+            system_prompt=agent_fabricator_prompt
         )
-        print(f"event posted: {response}")
-        return f"event posted: {completion_event}"
-
-    # Create the Agent Fabricator with access to create_custom_tool
-    agent_fabricator = Agent(
-        bedrock_model,
-        tools=[file_write, http_request, shell, get_worker_tool, create_custom_tool,
-            upload_agent_to_s3, store_agent_config_dynamo, complete_task],
-        system_prompt=get_agent_fabricator_prompt()
-    )
 
-    agent_fabricator(TASK)
+        with span('agent_fabrication') as record:
+            result = agent_fabricator(TASK)
+            usage = usage_from_result(result)
+            record.update(usage)
+        trace.add_usage(usage)
 
 
 def lambda_handler(event, context):
     print(f"processing event {event}")
-    for record in event['Records']:
-        message_body = json.loads(record['body'])
-        # print(f"Parsed message body: {json.dumps(message_body, indent=2)}")
-        process_event(message_body, context)
+    # Return batch item failures for partial batch response
+    return run_batch(event['Records'], context, process_event)
 
 if __name__ == "__main__":
     # Grab a record from your lambda and invoke, configuration will vary drastically
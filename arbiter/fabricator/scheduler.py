@@ -0,0 +1,157 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Lane 0 is UI-direct requests (orchestration_id == '0'), lane 1 is orchestration-driven work.
+# UI-direct requests arrive on their own queue and event source, which is what
+# keeps them ahead of an orchestration backlog; the lanes only order the records
+# of one delivered batch.
+DIRECT_LANE = 0
+ORCHESTRATION_LANE = 1
+
+# Fabrications started per invocation. The account-wide cap is this times
+# the maxConcurrency of the SQS event sources, so it defaults to 1 and the event
+# source settings alone bound concurrent fabrications. Records of a batch beyond
+# this number are handed back to the queue straight away (visibility reset to 0)
+# so they do not sit out the visibility timeout.
+MAX_CONCURRENT_FABRICATIONS = int(os.environ.get('MAX_CONCURRENT_FABRICATIONS', '1'))
+
+# Do not start a fabrication when the invocation is about to time out; the
+# record is handed back to the queue for a fresh invocation.
+MIN_START_REMAINING_MS = int(os.environ.get('MIN_START_REMAINING_MS', str(10 * 60 * 1000)))
+
+_sqs = None
+
+
+def priority_lane(message_body: dict) -> int:
+    """Return the scheduling lane for a fabrication request"""
+    if message_body.get('orchestration_id', '0') == '0':
+        return DIRECT_LANE
+    return ORCHESTRATION_LANE
+
+
+def order_records(records: list) -> list:
+    """Parse SQS records and order them by lane, then by the time they were sent.
+
+    Returns:
+        list of (record, message_body) tuples; message_body is None when the
+        record body could not be parsed
+    """
+    parsed = []
+    for record in records:
+        try:
+            message_body = json.loads(record['body'])
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Unable to parse message {record.get('messageId')}: {e}")
+            message_body = None
+        parsed.append((record, message_body))
+
+    def sort_key(entry):
+        record, message_body = entry
+        lane = priority_lane(message_body) if message_body is not None else DIRECT_LANE
+        sent = int(record.get('attributes', {}).get('SentTimestamp', 0))
+        return (lane, sent)
+
+    return sorted(parsed, key=sort_key)
+
+
+def remaining_ms(context) -> int:
+    """Milliseconds left in the invocation, or unlimited when run outside Lambda"""
+    if hasattr(context, 'get_remaining_time_in_millis'):
+        return context.get_remaining_time_in_millis()
+    return MIN_START_REMAINING_MS + 1
+
+
+def _queue_url(event_source_arn: str) -> str:
+    """Queue URL for an SQS queue ARN (arn:aws:sqs:<region>:<account>:<name>)"""
+    _, _, _, region, account, name = event_source_arn.split(':', 5)
+    return f"https://sqs.{region}.amazonaws.com/{account}/{name}"
+
+
+def release_records(records: list):
+    """Make records visible on their queue again so another invocation picks them up promptly"""
+    global _sqs
+    if not records:
+        return
+    if _sqs is None:
+        import boto3
+        _sqs = boto3.client('sqs')
+
+    by_queue = {}
+    for record in records:
+        by_queue.setdefault(record['eventSourceARN'], []).append(record)
+    for event_source_arn, queue_records in by_queue.items():
+        for start in range(0, len(queue_records), 10):
+            entries = [
+                {'Id': str(i), 'ReceiptHandle': record['receiptHandle'], 'VisibilityTimeout': 0}
+                for i, record in enumerate(queue_records[start:start + 10])
+            ]
+            try:
+                response = _sqs.change_message_visibility_batch(QueueUrl=_queue_url(event_source_arn),
+                                                                Entries=entries)
+                for failure in response.get('Failed', []):
+                    print(f"Unable to release message: {failure}")
+            except Exception as e:
+                # The records still come back after the visibility timeout
+                print(f"Unable to release deferred messages: {e}")
+
+
+def run_batch(records: list, context, process_event, max_concurrency: int = MAX_CONCURRENT_FABRICATIONS) -> dict:
+    """Run a batch of fabrication requests with priority ordering and a concurrency cap.
+
+    Each record is isolated: a failure only marks that record for redelivery
+    through the partial batch response, the rest of the batch still completes.
+    Only the first max_concurrency records in priority order are started; the
+    others are released back to the queue and reported as failures.
+
+    Args:
+        records: SQS records from the event
+        context: Lambda context
+        process_event: callable taking (message_body, context) for one fabrication
+        max_concurrency: number of fabrications started by this invocation
+
+    Returns:
+        dict: {"batchItemFailures": [...]} for the SQS partial batch response
+    """
+    batch_item_failures = []
+    max_concurrency = max(1, max_concurrency)
+    runnable = []
+    for record, message_body in order_records(records):
+        if message_body is None:
+            batch_item_failures.append({"itemIdentifier": record['messageId']})
+        else:
+            runnable.append((record, message_body))
+
+    # Within this batch direct requests come first, so they are the ones started;
+    # the rest go back to the queue now instead of waiting for a slot here
+    deferred = [record for record, _ in runnable[max_concurrency:]]
+    if remaining_ms(context) < MIN_START_REMAINING_MS:
+        print("Not enough time left in this invocation to start fabrication")
+        deferred = [record for record, _ in runnable]
+    started = runnable[:max_concurrency] if len(deferred) < len(runnable) else []
+    if deferred:
+        print(f"Releasing {len(deferred)} messages back to the queue")
+        release_records(deferred)
+        batch_item_failures.extend({"itemIdentifier": record['messageId']} for record in deferred)
+
+    def run_record(record, message_body):
+        lane = 'direct' if priority_lane(message_body) == DIRECT_LANE else 'orchestration'
+        print(f"Processing message: {record['messageId']} ({lane} lane)")
+        process_event(message_body, context)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = {}
+        for record, message_body in started:
+            futures[executor.submit(run_record, record, message_body)] = record['messageId']
+
+        for future in as_completed(futures):
+            message_id = futures[future]
+            try:
+                future.result()
+                print(f"Successfully processed message: {message_id}")
+            except Exception as e:
+                print(f"Error processing message {message_id}: {e}")
+                # Add to batch failures so this message will be retried
+                batch_item_failures.append({"itemIdentifier": message_id})
+
+    return {"batchItemFailures": batch_item_failures}
@@ -0,0 +1,175 @@
+import contextvars
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+import boto3
+
+FABRICATION_LOG_TABLE = os.environ.get('FABRICATION_LOG_TABLE')
+METRICS_NAMESPACE = os.environ.get('FABRICATION_METRICS_NAMESPACE', 'AgenticAIFactory/Fabricator')
+
+# The trace for the fabrication currently being processed. Strands runs tools
+# through asyncio.to_thread, which copies the context, so module level tools
+# can record spans without having the trace passed to them.
+_current_trace = contextvars.ContextVar('fabrication_trace', default=None)
+
+
+def current_trace():
+    """Return the active FabricationTrace, or None outside of a fabrication"""
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a span on the active trace, doing nothing when there is none"""
+    trace = current_trace()
+    if trace is None:
+        yield {}
+        return
+    with trace.span(name, **attributes) as record:
+        yield record
+
+
+def usage_from_metrics(metrics) -> dict:
+    """Token usage and model turn counts from strands EventLoopMetrics.
+
+    These are totals over every invocation of the agent, not just the last one.
+    """
+    usage = {'inputTokens': 0, 'outputTokens': 0, 'totalTokens': 0, 'cycles': 0}
+    if metrics is None:
+        return usage
+    accumulated = getattr(metrics, 'accumulated_usage', None) or {}
+    for key in ('inputTokens', 'outputTokens', 'totalTokens'):
+        usage[key] = int(accumulated.get(key, 0))
+    usage['cycles'] = int(getattr(metrics, 'cycle_count', 0) or 0)
+    return usage
+
+
+def usage_from_result(result, before: dict = None) -> dict:
+    """Pull token usage and model turn counts out of a strands AgentResult.
+
+    For an agent that is invoked more than once, pass agent_usage(agent) taken
+    before the call as before, so only this invocation is counted.
+    """
+    usage = usage_from_metrics(getattr(result, 'metrics', None))
+    if before:
+        usage = {key: max(value - before.get(key, 0), 0) for key, value in usage.items()}
+    return usage
+
+
+def agent_usage(agent) -> dict:
+    """Snapshot of an agent's usage so far, for usage_from_result(result, before)"""
+    return usage_from_metrics(getattr(agent, 'event_loop_metrics', None))
+
+
+class FabricationTrace:
+    """Collects timed spans and token usage for a single fabrication request.
+
+    Spans are flushed as a CloudWatch Embedded Metric Format record on stdout,
+    and additionally written to FABRICATION_LOG_TABLE when that is configured.
+    """
+
+    def __init__(self, orchestration_id: str, agent_use_id: str, node: str):
+        self.trace_id = str(uuid.uuid4())
+        self.orchestration_id = orchestration_id
+        self.agent_use_id = agent_use_id
+        self.node = node
+        self.started = time.time()
+        self.spans = []
+        self.usage = {'inputTokens': 0, 'outputTokens': 0, 'totalTokens': 0, 'cycles': 0}
+        self.status = 'success'
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_trace.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.status = 'error'
+        _current_trace.reset(self._token)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Failed to flush fabrication trace {self.trace_id}: {e}")
+        return False
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        record = {'name': name, 'start': time.time(), **attributes}
+        try:
+            yield record
+            record.setdefault('status', 'success')
+        except Exception as e:
+            record['status'] = 'error'
+            record['error'] = str(e)
+            raise
+        finally:
+            record['durationMs'] = int((time.time() - record.pop('start')) * 1000)
+            self.spans.append(record)
+
+    def add_usage(self, usage: dict):
+        for key in self.usage:
+            self.usage[key] += usage.get(key, 0)
+
+    def summary(self) -> dict:
+        phase_ms = {}
+        phase_count = {}
+        for record in self.spans:
+            phase_ms[record['name']] = phase_ms.get(record['name'], 0) + record['durationMs']
+            phase_count[record['name']] = phase_count.get(record['name'], 0) + 1
+        return {
+            'traceId': self.trace_id,
+            'orchestrationId': self.orchestration_id,
+            'agentUseId': self.agent_use_id,
+            'node': self.node,
+            'status': self.status,
+            'durationMs': int((time.time() - self.started) * 1000),
+            'phaseDurationMs': phase_ms,
+            'phaseCount': phase_count,
+            **self.usage,
+        }
+
+    def flush(self):
+        summary = self.summary()
+        direct = 'true' if self.orchestration_id == '0' else 'false'
+
+        # Embedded Metric Format: CloudWatch turns this log line into metrics
+        metric_names = ['durationMs', 'inputTokens', 'outputTokens', 'totalTokens', 'cycles']
+        emf = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['Direct']],
+                    'Metrics': [
+                        {'Name': name, 'Unit': 'Milliseconds' if name == 'durationMs' else 'Count'}
+                        for name in metric_names
+                    ]
+                }]
+            },
+            'Direct': direct,
+            **{name: summary[name] for name in metric_names},
+            'traceId': summary['traceId'],
+            'orchestrationId': summary['orchestrationId'],
+            'agentUseId': summary['agentUseId'],
+            'status': summary['status'],
+            'phaseDurationMs': summary['phaseDurationMs'],
+            'phaseCount': summary['phaseCount'],
+            'spans': self.spans,
+        }
+        print(json.dumps(emf, default=str))
+
+        if FABRICATION_LOG_TABLE:
+            table = boto3.resource('dynamodb').Table(FABRICATION_LOG_TABLE)
+            table.put_item(
+                Item=json.loads(json.dumps({
+                    **summary,
+                    'spans': self.spans,
+                    'timestamp': int(self.started),
+                    'ttl': int(self.started) + (30 * 24 * 60 * 60)  # 30 days TTL
+                }, default=str), parse_float=Decimal)
+            )
@@ -1,10 +1,28 @@
 from decimal import Decimal
+import hashlib
+import json
 import os
+import time
 from typing import Any
 import boto3
+from botocore.exceptions import ClientError
 
 CONFIG_TABLE = os.environ.get('TOOLS_CONFIG_TABLE')
+BUCKET_NAME = os.environ.get('AGENT_BUCKET_NAME')
 dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+
+# Compact registry manifest: one object holding every active tool config,
+# its code hash and (optionally) its code, so consumers need a single GET
+# instead of a table scan plus one S3 read per tool. Publishing a tool upserts
+# its entry; every other change to the tools table (the tool config resolver
+# behind the UI) deletes the object, and the next consumer rebuilds it.
+MANIFEST_KEY = os.environ.get('TOOL_MANIFEST_KEY', 'manifests/tools.json')
+MANIFEST_INCLUDE_CODE = os.environ.get('TOOL_MANIFEST_INCLUDE_CODE', 'true').lower() == 'true'
+MANIFEST_WRITE_ATTEMPTS = 5
+
+# Last manifest read by this container, revalidated with If-None-Match
+_manifest_cache = {'manifest': None, 'etag': None}
 
 # Needed because DDB likes to throw decimals in
 def parse_decimals(data: Any) -> Any:
@@ -29,6 +47,9 @@ def load_config_from_dynamodb():
     table = dynamodb.Table(CONFIG_TABLE)
     response = table.scan()
     items = response['Items']
+    while 'LastEvaluatedKey' in response:
+        response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
+        items.extend(response['Items'])
     configs = []
     for item in items:
         # Only load agents with state 'active'
@@ -39,6 +60,175 @@ def load_config_from_dynamodb():
     return {'tools': configs}
 
 
+def _tool_code_key(config: dict) -> str:
+    return f"tools/{config['filename']}"
+
+
+def _manifest_entry(config: dict, code: str = None, code_hash: str = None) -> dict:
+    """Build the manifest entry for one tool, reading its code from S3 if needed"""
+    config = parse_decimals(config)
+    if code is None and (MANIFEST_INCLUDE_CODE or code_hash is None):
+        try:
+            response = s3.get_object(Bucket=BUCKET_NAME, Key=_tool_code_key(config))
+            code = response['Body'].read().decode('utf-8')
+        except ClientError as e:
+            print(f"Unable to read code for tool {config.get('name')}: {e}")
+    if code is not None and code_hash is None:
+        code_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
+    entry = {'config': config, 'code_hash': code_hash or config.get('code_hash')}
+    if MANIFEST_INCLUDE_CODE and code is not None:
+        entry['code'] = code
+    return entry
+
+
+def _write_manifest(manifest: dict, etag: str = None, conditional: bool = True) -> str:
+    """Write the manifest, by default conditional on the ETag it was read with.
+
+    Raises:
+        ClientError: PreconditionFailed when another writer got there first
+    """
+    manifest['generated_at'] = int(time.time())
+    params = {
+        'Bucket': BUCKET_NAME,
+        'Key': MANIFEST_KEY,
+        'Body': json.dumps(manifest, separators=(',', ':')).encode('utf-8'),
+        'ContentType': 'application/json',
+    }
+    if conditional and etag:
+        params['IfMatch'] = etag
+    elif conditional:
+        params['IfNoneMatch'] = '*'
+    response = s3.put_object(**params)
+    _manifest_cache['manifest'] = manifest
+    _manifest_cache['etag'] = response.get('ETag')
+    return response.get('ETag')
+
+
+def _is_conflict(error: ClientError) -> bool:
+    return error.response.get('Error', {}).get('Code') in ('PreconditionFailed', 'ConditionalRequestConflict')
+
+
+def build_tool_manifest() -> dict:
+    """Regenerate the whole manifest from the tools table (one scan, N code reads)"""
+    if BUCKET_NAME is None:
+        raise ValueError("AGENT_BUCKET_NAME environment variable is not set")
+    tools = {}
+    for config in load_config_from_dynamodb()['tools']:
+        entry = _manifest_entry(config)
+        tools[entry['config']['name']] = entry
+    manifest = {'version': 1, 'tools': tools}
+    _write_manifest(manifest, conditional=False)
+    print(f"Rebuilt tool manifest with {len(tools)} tools")
+    return manifest
+
+
+def load_tool_manifest():
+    """Return the current manifest, or None if it does not exist.
+
+    A cached copy is revalidated with If-None-Match, so an unchanged
+    manifest costs a 304 rather than a full download.
+    """
+    if BUCKET_NAME is None:
+        return None
+    params = {'Bucket': BUCKET_NAME, 'Key': MANIFEST_KEY}
+    if _manifest_cache['manifest'] is not None and _manifest_cache['etag']:
+        params['IfNoneMatch'] = _manifest_cache['etag']
+    try:
+        response = s3.get_object(**params)
+    except ClientError as e:
+        code = e.response.get('Error', {}).get('Code')
+        if code in ('304', 'NotModified'):
+            return _manifest_cache['manifest']
+        if code in ('NoSuchKey', '404'):
+            return None
+        raise
+    manifest = json.loads(response['Body'].read())
+    _manifest_cache['manifest'] = manifest
+    _manifest_cache['etag'] = response.get('ETag')
+    return manifest
+
+
+def invalidate_tool_manifest():
+    """Delete the manifest so the next consumer rebuilds it from the table"""
+    _manifest_cache['manifest'] = None
+    _manifest_cache['etag'] = None
+    if BUCKET_NAME is not None:
+        s3.delete_object(Bucket=BUCKET_NAME, Key=MANIFEST_KEY)
+
+
+def upsert_tool_manifest(config: dict, code: str = None, code_hash: str = None, state: str = 'active'):
+    """Add or replace one tool in the manifest after its config has been stored.
+
+    A tool whose state is not 'active' is removed instead, matching the table
+    scan. Uses S3 conditional writes so concurrent fabrications do not drop
+    each other's entries. Falls back to a full rebuild when no manifest exists yet.
+    """
+    if BUCKET_NAME is None:
+        print("Warning: AGENT_BUCKET_NAME environment variable not set, skipping tool manifest update")
+        return
+    active = state == 'active'
+    entry = _manifest_entry(config, code, code_hash) if active else None
+    name = parse_decimals(config)['name']
+    for attempt in range(MANIFEST_WRITE_ATTEMPTS):
+        _manifest_cache['manifest'] = None
+        try:
+            response = s3.get_object(Bucket=BUCKET_NAME, Key=MANIFEST_KEY)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                build_tool_manifest()
+                return
+            raise
+        manifest = json.loads(response['Body'].read())
+        tools = manifest.setdefault('tools', {})
+        if active:
+            tools[name] = entry
+        elif tools.pop(name, None) is None:
+            return
+        try:
+            _write_manifest(manifest, response.get('ETag'))
+            print(f"{'Updated' if active else 'Removed'} {name} in tool manifest")
+            return
+        except ClientError as e:
+            if not _is_conflict(e):
+                raise
+            print(f"Tool manifest changed concurrently, retrying ({attempt + 1}/{MANIFEST_WRITE_ATTEMPTS})")
+            time.sleep(0.2 * (attempt + 1))
+    raise RuntimeError("Unable to update tool manifest after repeated conflicts")
+
+
+def load_tool_catalog():
+    """Load all active tool configs, preferring the manifest over a table scan.
+
+    Publishing updates the manifest and every other change to the tools
+    table deletes it, so it is only rebuilt from the table when missing.
+    """
+    try:
+        manifest = load_tool_manifest()
+        if manifest is not None:
+            return {'tools': [entry['config'] for entry in manifest.get('tools', {}).values()]}
+        if BUCKET_NAME is not None and CONFIG_TABLE is not None:
+            manifest = build_tool_manifest()
+            return {'tools': [entry['config'] for entry in manifest['tools'].values()]}
+    except Exception as e:
+        print(f"Unable to use tool manifest, falling back to table scan: {e}")
+    return load_config_from_dynamodb()
+
+
+def get_tool_code_from_manifest(tool_name: str):
+    """Return tool code from the manifest by file name or tool name, if present"""
+    try:
+        manifest = load_tool_manifest()
+    except Exception as e:
+        print(f"Unable to read tool manifest: {e}")
+        return None
+    if manifest is None:
+        return None
+    for name, entry in manifest.get('tools', {}).items():
+        if tool_name in (name, entry['config'].get('filename')):
+            return entry.get('code')
+    return None
+
+
 def create_tool_specs(tools_config):
     return [{
         "toolSpec": {
@@ -152,6 +152,14 @@ export class ArbiterStack extends cdk.Stack {
       retentionPeriod: cdk.Duration.days(7),
     });
 
+    // UI-direct fabrication requests (orchestration_id '0') get their own queue so
+    // a backlog of orchestration-driven requests cannot delay them
+    const fabricatorDirectQueue = new Queue(this, `fabricatorDirectQueue`, {
+      queueName: `agentic-ai-factory-fabricator-direct-queue-${props.environment}`,
+      visibilityTimeout: cdk.Duration.minutes(15),
+      retentionPeriod: cdk.Duration.days(7),
+    });
+
     const fabricatorLambda = new PythonFunction(this, 'FabricatorAgent', {
       runtime: lambda.Runtime.PYTHON_3_11,
       entry: path.join(__dirname, '../../../arbiter/fabricator'),
@@ -165,6 +173,7 @@ export class ArbiterStack extends cdk.Stack {
         TOOLS_CONFIG_TABLE: toolsConfigTable.tableName,
         AGENT_BUCKET_NAME: code_bucket.bucketName,
         WORKER_QUEUE_URL: workerAgentQueue.queueUrl,
+        MAX_CONCURRENT_FABRICATIONS: '1',
       },
       initialPolicy: [
         new PolicyStatement({
@@ -181,7 +190,21 @@ export class ArbiterStack extends cdk.Stack {
     toolsConfigTable.grantReadWriteData(fabricatorLambda);
     code_bucket.grantReadWrite(fabricatorLambda);
 
-    fabricatorLambda.addEventSource(new SqsEventSource(fabricatorQueue));
+    // Fabrications are expensive Bedrock workloads: each invocation starts one
+    // fabrication (MAX_CONCURRENT_FABRICATIONS), so the event sources' maxConcurrency
+    // bounds concurrent fabrications, 4 in total. The direct queue has its own
+    // event source, which keeps 2 of them for UI-direct requests however long
+    // the orchestration queue is.
+    fabricatorLambda.addEventSource(new SqsEventSource(fabricatorQueue, {
+      batchSize: 1,
+      maxConcurrency: 2,
+      reportBatchItemFailures: true, // Enable partial batch responses
+    }));
+    fabricatorLambda.addEventSource(new SqsEventSource(fabricatorDirectQueue, {
+      batchSize: 1,
+      maxConcurrency: 2, // The lowest value SQS event sources accept
+      reportBatchItemFailures: true,
+    }));
 
     // Seed initial agent configuration
     const seedAgentConfigLambda = new lambda.Function(this, 'SeedAgentConfigFunction', {
@@ -318,6 +318,8 @@ export class BackendStack extends cdk.Stack {
         code: lambda.Code.fromAsset("dist/lambda"),
         environment: {
           TOOLS_CONFIG_TABLE: `agentic-ai-factory-tools-${props.environment}`,
+          CODE_BUCKET_NAME: `agentic-ai-factory-code-${props.environment}-${this.account}-${this.region}`,
+          TOOL_MANIFEST_KEY: 'manifests/tools.json',
         },
         timeout: cdk.Duration.seconds(30),
         logRetention: logs.RetentionDays.ONE_WEEK,
@@ -332,7 +334,8 @@ export class BackendStack extends cdk.Stack {
         handler: "fabricator-request-resolver.handler",
         code: lambda.Code.fromAsset("dist/lambda"),
         environment: {
-          FABRICATOR_QUEUE_URL: `https://sqs.${this.region}.amazonaws.com/${this.account}/agentic-ai-factory-fabricator-queue-${props.environment}`,
+          // UI requests go to the fabricator's direct queue, ahead of orchestration-driven work
+          FABRICATOR_QUEUE_URL: `https://sqs.${this.region}.amazonaws.com/${this.account}/agentic-ai-factory-fabricator-direct-queue-${props.environment}`,
         },
         timeout: cdk.Duration.seconds(30),
         logRetention: logs.RetentionDays.ONE_WEEK,
@@ -372,6 +375,16 @@ export class BackendStack extends cdk.Stack {
         ],
       })
     );
+    // Tool changes invalidate the Agent Fabricator's tool manifest in the arbiter code bucket
+    toolConfigResolverFunction.addToRolePolicy(
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: ['s3:DeleteObject'],
+        resources: [
+          `arn:aws:s3:::agentic-ai-factory-code-${props.environment}-${this.account}-${this.region}/manifests/tools.json`,
+        ],
+      })
+    );
 
     // Grant permissions for fabricator request
     fabricatorRequestResolverFunction.addToRolePolicy(
@@ -379,7 +392,7 @@ export class BackendStack extends cdk.Stack {
         effect: iam.Effect.ALLOW,
         actions: ['sqs:SendMessage', 'sqs:GetQueueUrl'],
         resources: [
-          `arn:aws:sqs:${this.region}:${this.account}:agentic-ai-factory-fabricator-queue-${props.environment}`,
+          `arn:aws:sqs:${this.region}:${this.account}:agentic-ai-factory-fabricator-direct-queue-${props.environment}`,
         ],
       })
     );
@@ -156,7 +156,10 @@ async function sendMessageToAgentCore(
             try {
               // Try to parse as JSON
               const parsed = JSON.parse(data);
-              if (typeof parsed === "string") {
+              if (parsed && parsed.type === "status") {
+                // Tool status updates reach the UI through EventBridge; keep them out of the reply
+                console.log("Agent status:", parsed.stage, parsed.message);
+              } else if (typeof parsed === "string") {
                 dataChunks.push(parsed);
               } else if (parsed.text) {
                 dataChunks.push(parsed.text);
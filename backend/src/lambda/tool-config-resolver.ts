@@ -1,10 +1,14 @@
 import { DynamoDBClient } from '@aws-sdk/client-dynamodb';
 import { DynamoDBDocumentClient, GetCommand, PutCommand, ScanCommand, DeleteCommand } from '@aws-sdk/lib-dynamodb';
+import { S3Client, DeleteObjectCommand } from '@aws-sdk/client-s3';
 
 const client = new DynamoDBClient({});
 const docClient = DynamoDBDocumentClient.from(client);
+const s3Client = new S3Client({});
 
 const TOOLS_CONFIG_TABLE = process.env.TOOLS_CONFIG_TABLE!;
+const CODE_BUCKET_NAME = process.env.CODE_BUCKET_NAME;
+const TOOL_MANIFEST_KEY = process.env.TOOL_MANIFEST_KEY || 'manifests/tools.json';
 
 interface ToolConfig {
   toolId: string;
@@ -46,6 +50,22 @@ export const handler = async (event: any) => {
   }
 };
 
+// The Agent Fabricator reads active tools from a manifest in the code bucket.
+// Deleting it after every change here makes the next fabrication rebuild it
+// from the table, so UI edits reach the fabricator prompt.
+async function invalidateToolManifest(): Promise<void> {
+  if (!CODE_BUCKET_NAME) {
+    console.warn('CODE_BUCKET_NAME not set, skipping tool manifest invalidation');
+    return;
+  }
+  await s3Client.send(
+    new DeleteObjectCommand({
+      Bucket: CODE_BUCKET_NAME,
+      Key: TOOL_MANIFEST_KEY,
+    })
+  );
+}
+
 async function listToolConfigs(): Promise<ToolConfig[]> {
   const result = await docClient.send(
     new ScanCommand({
@@ -106,6 +126,7 @@ async function createToolConfig(input: any): Promise<ToolConfig> {
       Item: toolConfig,
     })
   );
+  await invalidateToolManifest();
 
   return {
     ...toolConfig,
@@ -140,6 +161,7 @@ async function updateToolConfig(input: any): Promise<ToolConfig> {
       Item: updatedConfig,
     })
   );
+  await invalidateToolManifest();
 
   return {
     ...updatedConfig,
@@ -155,6 +177,7 @@ async function deleteToolConfig(toolId: string): Promise<{ success: boolean; mes
         Key: { toolId },
       })
     );
+    await invalidateToolManifest();
 
     return {
       success: true,
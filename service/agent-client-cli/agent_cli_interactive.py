@@ -79,6 +79,9 @@ class AgentChatSession:
                                     formatted_chunk = chunk_data.replace('""', '').replace('\\n', '\n')
                                     print(formatted_chunk, end='', flush=True)
                                     content.append(formatted_chunk)
+                                elif isinstance(chunk_data, dict) and chunk_data.get('type') == 'status':
+                                    # Progress of a long-running tool, not part of the reply
+                                    print(f"\n[{chunk_data.get('stage')}] {chunk_data.get('message')}", flush=True)
                                 else:
                                     print(chunk, end='', flush=True)
                                     content.append(chunk)
@@ -1,16 +1,17 @@
 from bedrock_agentcore import BedrockAgentCoreApp, RequestContext
-from strands.agent.conversation_manager import SummarizingConversationManager
 from strands import Agent
 from strands.tools import tool
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict, Any, List
+import asyncio
 import json
+import threading
+from tools.context_strategy import build_conversation_manager
+from tools.session_registry import SessionRegistry, activate, current_session
+from tools import status_events
 
 app = BedrockAgentCoreApp()
 
-# Global session object for this agent instance
-session = {}
-
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -36,12 +37,13 @@ def query_assessment_guidelines(dimension: str, category: str = None) -> str:
     
     Args:
         dimension: Assessment dimension to query (technical, governance, business, commercial)
-        category: Optional specific category within dimension (e.g., "Current Architecture & Systems")
-                 If not provided, returns overview of all categories in the dimension
+        category: Optional specific category within dimension, by number or name
+                 (e.g., "2" or "Current Architecture & Systems", also "Scoring Guidance").
+                 If not provided, returns a compact outline of all categories and their points to extract
         
     Returns:
-        Formatted guidelines including points to extract from documents/conversations and sample questions
-        to ask users. Use this to ensure comprehensive coverage of assessment requirements.
+        The requested category with its points to extract and sample questions to ask users, or the
+        outline of the dimension. Use this to ensure comprehensive coverage of assessment requirements.
     """
     from tools.query_assessment_guidelines import query_assessment_guidelines as _query_assessment_guidelines
     return _query_assessment_guidelines(dimension, category)
@@ -60,6 +62,7 @@ def extract_document_content(dimension: str) -> str:
     - Uses the last uploaded document from the current session
     - Selects the appropriate blueprint based on document_type
     - Processes the document through Bedrock Data Automation
+    - Splits large PDFs into page ranges that are extracted in parallel and merged
     - Stores full extracted data in SESSION_BUCKET at {session_id}/assessment/{document_type}/output.json
     - Returns summary with key findings and confidence metrics
     
@@ -72,7 +75,7 @@ def extract_document_content(dimension: str) -> str:
         
     Returns:
         Summary response containing:
-        - status: Success/error status
+        - status: Success/error status, or partial with missing_parts when some page ranges failed
         - summary: Brief description of extraction results
         - storage_location: S3 path where full data is stored
         - key_findings: Explainability info with field values and confidence scores
@@ -92,11 +95,36 @@ def extract_document_content(dimension: str) -> str:
         - Confidence scores help assess extraction quality
     """
     from tools.extract_document_content import extract_document_content as _extract_document_content
-    global session
+    session = current_session()
     print("SESSION")
     print(session)
     return _extract_document_content(session['last_document_upload_key'], session['session_id'], dimension)
 
+@tool
+def extract_all_document_content() -> str:
+    """
+    Extract all four assessment dimensions from the last uploaded document in one call.
+    
+    Use this instead of calling extract_document_content once per dimension when the uploaded
+    document covers more than one dimension. The technical, business, commercial and governance
+    blueprint jobs run concurrently, so the call takes about as long as a single extraction.
+    Each dimension is merged and stored at {session_id}/assessment/{dimension}/output.json.
+    
+    Returns:
+        Summary response containing:
+        - status: success, partial (some dimensions failed or miss page ranges, see missing_parts) or error
+        - results: per-dimension summaries with the same fields as extract_document_content
+        - document_key: Original document identifier
+        - session_id: Current session identifier
+        
+    Note:
+        - Requires a document to have been uploaded in the current session
+        - Dimensions without a configured blueprint are reported as errors, the rest still run
+    """
+    from tools.extract_document_content import extract_all_dimensions as _extract_all_dimensions
+    session = current_session()
+    return _extract_all_dimensions(session['last_document_upload_key'], session['session_id'])
+
 @tool
 def save_assessment_data(dimension: str, data: Dict[str, Any]) -> str:
     """
@@ -104,13 +132,13 @@ def save_assessment_data(dimension: str, data: Dict[str, Any]) -> str:
     
     Args:
         dimension: Assessment dimension being evaluated
-        data: Assessment data to save
+        data: Assessment data to save, keyed by the blueprint field names from gap analysis
         
     Returns:
-        Confirmation of data saved with S3 key
+        Confirmation of data saved with the completion, listing keys that are not blueprint fields
     """
     from tools.save_assessment_data import save_assessment_data as _save_assessment_data
-    global session
+    session = current_session()
     return _save_assessment_data(session['session_id'], dimension, data)
 
 @tool
@@ -157,57 +185,55 @@ def get_assessment_data(dimension: str) -> str:
     Note:
         - Returns empty structure if no data exists for the dimension
         - Includes both extracted document data and user-provided responses
-        - Shows intelligent merging results from Nova Pro LLM
+        - Shows field-level merge results (user input > high-confidence extraction > existing extraction)
     """
     from tools.get_assessment_data import get_assessment_data as _get_assessment_data
-    global session
+    session = current_session()
     return _get_assessment_data(session['session_id'], dimension)
 
 @tool
-def get_session_state() -> str:
+def get_session_state(mode: str = "summary", limit: int = 20, cursor: str = None) -> str:
     """
     Retrieve current session state and progress from DynamoDB session memory.
     
-    This tool provides comprehensive visibility into the current assessment session,
-    including completion status, extraction results, and recent activity. Use this
-    to understand what has already been accomplished and what still needs attention.
-    
-    The tool automatically:
-    - Retrieves latest assessment progress and completion percentages
-    - Shows extraction status for all four assessment dimensions
-    - Displays recent session activity and timestamps
-    - Calculates overall progress across all dimensions
-    - Identifies which areas need attention or completion
+    Call this first on every turn. The default summary mode is small and is all you need
+    to resume a session: it returns the latest state of each dimension and overall progress.
+    Only use history mode when you need to see how the assessment evolved.
     
+    Args:
+        mode: "summary" (default) or "history"
+        limit: Maximum number of records per history page (history mode only, max 50)
+        cursor: next_cursor value from a previous history page (history mode only)
+        
     Returns:
-        Formatted session state summary containing:
-        - Overall progress percentage and dimensions completed
-        - Extraction status per dimension (technical, business, commercial, governance)
-        - Field completion statistics and confidence scores
-        - Latest assessment activity and timestamps
-        - Recent session activity log
-        - Recommendations for next steps
+        Summary mode:
+        - overall_percentage: Weighted progress across all four dimensions
+        - all_complete: Whether every dimension is complete
+        - dimensions: Per dimension completion_percentage, is_complete, last_updated,
+          extraction statistics and whether a gap analysis has been saved,
+          or status "not_started"
+        History mode:
+        - records: Timestamped records (most recent first) without data payloads
+        - next_cursor: Pass back as cursor for the next page, null when there are no more
         
     Example:
         get_session_state()
-        # Returns comprehensive session overview with progress tracking
+        # Returns compact session overview with progress tracking
         
     Use Cases:
         - "Let me check what we've covered so far..."
         - Resume interrupted sessions with full context
         - Identify incomplete dimensions needing attention
         - Show progress to users during long assessment sessions
-        - Prioritize remaining work based on completion status
         
     Note:
-        - Accesses DynamoDB session memory for real-time state
-        - Shows both extraction and assessment completion data
-        - Provides actionable insights for session continuation
+        - Use get_assessment_data(dimension) for the collected field values, and
+          get_assessment_data("gap_analysis_<dimension>") for a saved gap analysis
         - Helps avoid redundant questions and work
     """
     from tools.get_session_state import get_session_state as _get_session_state
-    global session
-    return _get_session_state(session['session_id'])
+    session = current_session()
+    return _get_session_state(session['session_id'], mode, limit, cursor)
 
 
 @tool
@@ -245,7 +271,7 @@ def mark_dimension_complete(dimension: str) -> str:
         - Guides user to next dimension or Agent 2
     """
     from tools.mark_dimension_complete import mark_dimension_complete as _mark_dimension_complete
-    global session
+    session = current_session()
     return _mark_dimension_complete(session['session_id'], dimension)
 
 
@@ -255,14 +281,14 @@ def analyze_document_gaps(dimension: str) -> str:
     Analyze gaps between extracted document content and assessment requirements using Claude Sonnet.
     
     This tool performs comprehensive gap analysis by comparing extracted document data against
-    current assessment guidelines. It uses a dedicated Claude Sonnet 3.5 model to provide
-    expert-level analysis of what information is missing, incomplete, or needs verification.
+    current assessment guidelines. Missing, low-confidence and incomplete fields are determined
+    directly from the extraction; a model only writes the follow-up questions for them.
     
     The tool automatically:
     - Retrieves current assessment guidelines for the specified dimension
     - Loads extracted document data from the session's S3 storage
-    - Analyzes field completeness and confidence scores
-    - Uses Claude Sonnet to identify critical gaps and generate targeted questions
+    - Classifies every field by completeness and confidence score
+    - Generates targeted questions for the fields with gaps
     - Returns structured analysis with prioritized follow-up actions
     
     Args:
@@ -287,12 +313,13 @@ def analyze_document_gaps(dimension: str) -> str:
         
     Note:
         - Requires extracted document data to exist for the specified dimension
-        - Uses Claude Sonnet 3.5 for sophisticated reasoning and analysis
         - Compares against current assessment guidelines from Confluence
         - Provides actionable insights for completing the assessment
+        - Calling it again without changes to the extracted data returns the cached analysis
+          instantly; after changes only questions for the changed fields are regenerated
     """
     from tools.analyze_document_gaps import analyze_document_gaps as _analyze_document_gaps
-    global session
+    session = current_session()
     return _analyze_document_gaps(session['session_id'], dimension)
 
 
@@ -300,11 +327,7 @@ def analyze_document_gaps(dimension: str) -> str:
 
 
 
-agent = Agent(
-    model="amazon.nova-pro-v1:0",
-    conversation_manager=None,
-    tools=[query_assessment_guidelines, extract_document_content, save_assessment_data, analyze_document_gaps, get_session_state, get_assessment_data, mark_dimension_complete],
-    system_prompt="""You are Agent 1 - Document Review & Information Gathering Agent for the Agentic AI Factory.
+SYSTEM_PROMPT = """You are Agent 1 - Document Review & Information Gathering Agent for the Agentic AI Factory.
 
 CONTEXT: The Agentic AI Factory is a transformation system that helps organizations migrate FROM traditional applications TO agentic AI-powered solutions. Most organizations are starting with traditional systems and want to understand how to transform them into agentic AI workflows. You are NOT assessing existing AI capabilities - you are gathering information about their current traditional systems and business requirements to design their future agentic AI transformation.
 
@@ -327,7 +350,7 @@ DO NOT ask about their existing AI expertise, prompt engineering knowledge, or c
 Assessment Workflow:
 1. **Session State Check**: IMMEDIATELY use get_session_state() to check existing progress and resume appropriately - if assessments exist, proceed with gap analysis and additional information gathering without requiring document re-upload
 2. **Guidelines Retrieval**: Use query_assessment_guidelines(dimension) to retrieve current assessment requirements for relevant dimensions
-3. **Document Upload & Extraction**: Only if no existing extraction data - when a user uploads a document, extract structured information using extract_document_content(dimension) where dimension is one of: technical, business, commercial, governance
+3. **Document Upload & Extraction**: Only if no existing extraction data - when a user uploads a document, extract structured information using extract_document_content(dimension) where dimension is one of: technical, business, commercial, governance. If the document covers several dimensions, use extract_all_document_content() to extract all four at once
 4. **AUTOMATIC Gap Analysis**: IMMEDIATELY after successful extraction, call analyze_document_gaps(dimension) for the same dimension to get completion percentage and gap priorities
 5. **Save Gap Analysis**: Use save_assessment_data() to persist gap analysis results with dimension "gap_analysis_{dimension}" including completion percentage
 6. **Interactive Gap Filling**: Query the user with targeted questions to fill identified gaps based on current guidelines and gap analysis priorities
@@ -349,7 +372,7 @@ Document Processing Steps:
 1. IMMEDIATELY check session state using get_session_state() to understand existing progress
 2. If extraction data exists for any dimension, proceed directly to gap analysis and questioning - NO need to re-upload documents
 3. If no extraction data exists, ask user which dimension they want to assess (technical, business, commercial, governance)
-4. For new uploads: Use extract_document_content(dimension) with the appropriate dimension parameter
+4. For new uploads: Use extract_document_content(dimension) with the appropriate dimension parameter, or extract_all_document_content() when the document covers all dimensions
 5. **MANDATORY AFTER EXTRACTION**: Immediately after extract_document_content() completes successfully, AUTOMATICALLY call analyze_document_gaps(dimension) for the same dimension to get gap analysis and completion percentage
 6. **SAVE GAP ANALYSIS RESULTS**: After analyze_document_gaps(), use save_assessment_data() to persist the gap analysis results including completion percentage with dimension "gap_analysis_{dimension}"
 7. For existing or new extractions: Retrieve assessment guidelines using query_assessment_guidelines(dimension) for the relevant dimension
@@ -368,6 +391,7 @@ Question Guidelines:
 - Start with critical missing information identified in the gap analysis
 - Ask follow-up questions based on document gaps and missing requirements
 - **MANDATORY**: After receiving ANY user response with information, IMMEDIATELY call save_assessment_data() with the session_id, dimension, response data, and completion_percentage (estimate 0-100% based on gaps filled)
+- **USE BLUEPRINT FIELD NAMES**: Key the saved data by the exact field names that analyze_document_gaps() returns for each gap (e.g. the "field" of a gap), not paraphrased or new names - completion only counts the blueprint's fields, and save_assessment_data() lists any keys it does not recognise so you can re-save them under the right name
 - **HANDLE UNKNOWNS**: If user says they don't know something, ask for explicit confirmation (e.g., "Should I record that [specific field] is currently unknown?") then save the response as "Unknown - confirmed by user" using save_assessment_data() and INCREMENT the completion_percentage as if the question was answered - this allows progress to continue
 - **UNKNOWN = PROGRESS**: Treat confirmed unknowns as valid responses that contribute to completion percentage - the goal is to gather what's available, not to block on missing information
 - Use retrieved assessment guidelines to ensure comprehensive coverage
@@ -383,18 +407,50 @@ Completion Criteria:
 Once all dimensions are marked complete, inform the user: "Assessment complete across all four dimensions. Your readiness data is now available for Agent 2 to generate high-level architecture designs."
 
 Always maintain a conversational, consultative tone while ensuring thorough information gathering. Leverage document extraction to minimize user burden while ensuring complete assessment coverage across all dimensions."""
-)
+
+
+def create_agent() -> Agent:
+    """Build the agent for one session; every session keeps its own conversation"""
+    return Agent(
+        model="amazon.nova-pro-v1:0",
+        # Bounded context: old tool results truncated, finished dimensions summarized
+        conversation_manager=build_conversation_manager(
+            max_input_tokens=40000,
+            tool_result_max_chars=4000,
+            preserve_recent_messages=10,
+            window_size=40,
+            checkpoint_tool='mark_dimension_complete',
+            checkpoint_arg='dimension',
+            checkpoint_label='dimension',
+            review_hint='Their data is saved; use get_session_state() or get_assessment_data(dimension) to review it.'
+        ),
+        tools=[query_assessment_guidelines, extract_document_content, extract_all_document_content, save_assessment_data, analyze_document_gaps, get_session_state, get_assessment_data, mark_dimension_complete],
+        system_prompt=SYSTEM_PROMPT
+    )
+
+
+def _release_session(runtime_session):
+    """Write out and forget whatever an evicted session still holds in this process"""
+    from tools import session_cache, session_memory
+    session_cache.invalidate(runtime_session.session_id)
+    # Eviction happens on the event loop; the DynamoDB write must not block it
+    threading.Thread(target=session_memory.flush, args=(runtime_session.session_id,),
+                     name=f"evict-{runtime_session.session_id}").start()
+
+
+sessions = SessionRegistry(create_agent, on_evict=_release_session)
 
 @app.entrypoint
 async def invoke(payload, context: RequestContext):
     """Agent 1 - Document Review & Information Gathering"""
-    global session
     print("==================INVOKING AGENT 1===================")
 
     print(context)
     print(payload)
-    if session.get('session_id') is None:
-        session['session_id'] = payload.get("session_id", "")
+    session_id = payload.get("session_id") or getattr(context, 'session_id', None) or ""
+    runtime_session = sessions.get(session_id)
+    activate(runtime_session)
+    session = runtime_session.state
     user_message = payload.get("prompt", "Hello!")
     
     input_message_list = [{"text": user_message}]
@@ -405,15 +461,29 @@ async def invoke(payload, context: RequestContext):
     document_key = metadata.get('document_upload_key')
 
 
-    if document_key:
-        input_message_list = input_message_list + [{"text": "Uploaded document to :" + document_key}]
-        session['last_document_upload_key'] = document_key
-        print("Last doc key updated: " + document_key)
-
-    stream = agent.stream_async(input_message_list)
-    async for event in stream:
-        if "data" in event:
-            yield event["data"]
+    # Requests for the same session run one at a time on that session's agent
+    async with runtime_session.lock:
+        if document_key:
+            input_message_list = input_message_list + [{"text": "Uploaded document to :" + document_key}]
+            session['last_document_upload_key'] = document_key
+            print("Last doc key updated: " + document_key)
+
+        # Status events of long-running tools are streamed alongside the agent's output
+        channel = status_events.open_channel(session_id)
+        stream = runtime_session.agent.stream_async(input_message_list)
+        try:
+            async for source, event in status_events.merge_with_status(stream, channel):
+                if source == 'status':
+                    yield event
+                elif "data" in event:
+                    yield event["data"]
+        finally:
+            status_events.close_channel(session_id, channel)
+            # Write any session memory records buffered during this turn before the
+            # next request of this session can read them; queued progress events are
+            # drained by the background publisher and do not hold up the turn
+            from tools import session_memory
+            await asyncio.to_thread(session_memory.flush, session_id)
 
 if __name__ == "__main__":
     app.run()
@@ -0,0 +1 @@
+# Local stand-ins for the AWS services Agent 1 tools depend on
@@ -0,0 +1,403 @@
+import base64
+import contextlib
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+
+from botocore.exceptions import ClientError
+
+from harness.bda import LocalDataAutomation
+
+
+def _client_error(code: str, operation: str, message: str = '') -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': message or code}}, operation)
+
+
+def _size(value) -> int:
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    return len(json.dumps(value, default=str).encode('utf-8'))
+
+
+class CallRecorder:
+    """
+    Counts calls and bytes per service and operation.
+
+    Calls are attributed to the current step (set by the benchmark around each
+    tool call); bytes_in is what the caller sent, bytes_out what it received.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.step = None
+        self.calls = defaultdict(lambda: defaultdict(int))  # step -> 'service.operation' -> count
+        self.bytes = defaultdict(lambda: defaultdict(int))  # step -> 'service.in'/'service.out' -> bytes
+
+    def record(self, service: str, operation: str, bytes_in: int = 0, bytes_out: int = 0):
+        with self._lock:
+            self.calls[self.step][f'{service}.{operation}'] += 1
+            self.bytes[self.step][f'{service}.in'] += bytes_in
+            self.bytes[self.step][f'{service}.out'] += bytes_out
+
+    def take(self, step) -> dict:
+        """Return and forget the calls and bytes recorded for a step"""
+        with self._lock:
+            return {'calls': dict(self.calls.pop(step, {})), 'bytes': dict(self.bytes.pop(step, {}))}
+
+
+class LocalS3:
+    """In-memory S3 client supporting the calls the tools make, including conditional reads and writes"""
+
+    def __init__(self, recorder: CallRecorder, latency: float = 0.0):
+        self.recorder = recorder
+        self.latency = latency
+        self.objects = {}  # (bucket, key) -> {'body', 'etag', 'content_type', 'content_encoding'}
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def put_object(self, Bucket: str, Key: str, Body, ContentType: str = None, ContentEncoding: str = None,
+                   IfMatch: str = None, IfNoneMatch: str = None, **kwargs) -> dict:
+        body = Body.encode('utf-8') if isinstance(Body, str) else bytes(Body)
+        self._wait()
+        self.recorder.record('s3', 'put_object', bytes_in=len(body))
+        with self._lock:
+            current = self.objects.get((Bucket, Key))
+            if IfNoneMatch == '*' and current is not None:
+                raise _client_error('PreconditionFailed', 'PutObject')
+            if IfMatch is not None and (current is None or current['etag'] != IfMatch):
+                raise _client_error('PreconditionFailed', 'PutObject')
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            self.objects[(Bucket, Key)] = {
+                'body': body,
+                'etag': etag,
+                'content_type': ContentType,
+                'content_encoding': ContentEncoding
+            }
+        return {'ETag': etag}
+
+    def get_object(self, Bucket: str, Key: str, IfNoneMatch: str = None, **kwargs) -> dict:
+        self._wait()
+        with self._lock:
+            current = self.objects.get((Bucket, Key))
+        if current is None:
+            self.recorder.record('s3', 'get_object')
+            raise _client_error('NoSuchKey', 'GetObject')
+        if IfNoneMatch is not None and IfNoneMatch == current['etag']:
+            self.recorder.record('s3', 'get_object')
+            raise _client_error('304', 'GetObject', 'Not Modified')
+        self.recorder.record('s3', 'get_object', bytes_out=len(current['body']))
+        response = {
+            'Body': io.BytesIO(current['body']),
+            'ETag': current['etag'],
+            'ContentLength': len(current['body']),
+            'ContentType': current['content_type']
+        }
+        if current['content_encoding']:
+            response['ContentEncoding'] = current['content_encoding']
+        return response
+
+    def head_object(self, Bucket: str, Key: str, ChecksumMode: str = None, **kwargs) -> dict:
+        self._wait()
+        self.recorder.record('s3', 'head_object')
+        with self._lock:
+            current = self.objects.get((Bucket, Key))
+        if current is None:
+            raise _client_error('404', 'HeadObject')
+        response = {'ETag': current['etag'], 'ContentLength': len(current['body'])}
+        if ChecksumMode == 'ENABLED':
+            # Uploads from the UI carry a full-object SHA-256 checksum
+            response['ChecksumSHA256'] = base64.b64encode(hashlib.sha256(current['body']).digest()).decode()
+            response['ChecksumType'] = 'FULL_OBJECT'
+        return response
+
+
+def _projection(item: dict, projection: str, names: dict) -> dict:
+    if not projection:
+        return dict(item)
+    attributes = [names.get(name.strip(), name.strip()) for name in projection.split(',')]
+    return {name: item[name] for name in attributes if name in item}
+
+
+class LocalTable:
+    """In-memory DynamoDB Table resource keyed on p_key/s_key"""
+
+    def __init__(self, name: str, store: dict, recorder: CallRecorder, latency: float, lock, client):
+        self.name = name
+        self.table_name = name
+        self._store = store  # (p_key, s_key) -> item
+        self._recorder = recorder
+        self._latency = latency
+        self._lock = lock
+        self.meta = type('Meta', (), {'client': client})()
+
+    def _wait(self):
+        if self._latency:
+            time.sleep(self._latency)
+
+    def get_item(self, Key: dict, ProjectionExpression: str = None, ExpressionAttributeNames: dict = None,
+                 **kwargs) -> dict:
+        self._wait()
+        with self._lock:
+            item = self._store.get((Key['p_key'], Key['s_key']))
+            item = _projection(item, ProjectionExpression, ExpressionAttributeNames or {}) if item else None
+        self._recorder.record('dynamodb', 'get_item', bytes_out=_size(item) if item else 0)
+        return {'Item': item} if item else {}
+
+    def put_item(self, Item: dict, **kwargs) -> dict:
+        self._wait()
+        self._recorder.record('dynamodb', 'put_item', bytes_in=_size(Item))
+        with self._lock:
+            self._store[(Item['p_key'], Item['s_key'])] = dict(Item)
+        return {}
+
+    def update_item(self, Key: dict, UpdateExpression: str, ExpressionAttributeValues: dict = None,
+                    ExpressionAttributeNames: dict = None, **kwargs) -> dict:
+        """Supports 'SET a = :x, b = :y' expressions"""
+        self._wait()
+        values = ExpressionAttributeValues or {}
+        names = ExpressionAttributeNames or {}
+        self._recorder.record('dynamodb', 'update_item', bytes_in=_size(values))
+        match = re.fullmatch(r'\s*SET\s+(.+)', UpdateExpression, re.IGNORECASE)
+        if not match:
+            raise NotImplementedError(f"Unsupported update expression: {UpdateExpression}")
+        with self._lock:
+            item = self._store.setdefault((Key['p_key'], Key['s_key']), dict(Key))
+            for assignment in match.group(1).split(','):
+                name, value = (part.strip() for part in assignment.split('='))
+                item[names.get(name, name)] = values[value]
+        return {}
+
+    def query(self, KeyConditionExpression: str, ExpressionAttributeValues: dict,
+              ProjectionExpression: str = None, ExpressionAttributeNames: dict = None,
+              ScanIndexForward: bool = True, Limit: int = None, ExclusiveStartKey: dict = None, **kwargs) -> dict:
+        """Supports 'p_key = :pk' optionally followed by 'AND begins_with(s_key, :sk)'"""
+        self._wait()
+        match = re.fullmatch(r'\s*p_key\s*=\s*(:\w+)(?:\s+AND\s+begins_with\(\s*s_key\s*,\s*(:\w+)\s*\))?\s*',
+                             KeyConditionExpression, re.IGNORECASE)
+        if not match:
+            raise NotImplementedError(f"Unsupported key condition: {KeyConditionExpression}")
+        p_key = ExpressionAttributeValues[match.group(1)]
+        prefix = ExpressionAttributeValues[match.group(2)] if match.group(2) else ''
+        with self._lock:
+            keys = sorted(s_key for (pk, s_key) in self._store if pk == p_key and s_key.startswith(prefix))
+            if not ScanIndexForward:
+                keys.reverse()
+            if ExclusiveStartKey:
+                keys = keys[keys.index(ExclusiveStartKey['s_key']) + 1:]
+            page = keys[:Limit] if Limit else keys
+            items = [_projection(self._store[(p_key, s_key)], ProjectionExpression, ExpressionAttributeNames or {})
+                     for s_key in page]
+        self._recorder.record('dynamodb', 'query', bytes_out=_size(items))
+        response = {'Items': items, 'Count': len(items)}
+        if Limit and len(keys) > Limit:
+            response['LastEvaluatedKey'] = {'p_key': p_key, 's_key': page[-1]}
+        return response
+
+
+class LocalDynamoDB:
+    """In-memory DynamoDB resource; Table().meta.client provides batch_get_item and transact_write_items"""
+
+    def __init__(self, recorder: CallRecorder, latency: float = 0.0):
+        self.recorder = recorder
+        self.latency = latency
+        self.tables = defaultdict(dict)  # table name -> {(p_key, s_key): item}
+        self._lock = threading.Lock()
+
+    def Table(self, name: str) -> LocalTable:
+        return LocalTable(name, self.tables[name], self.recorder, self.latency, self._lock, self)
+
+    def batch_get_item(self, RequestItems: dict, **kwargs) -> dict:
+        if self.latency:
+            time.sleep(self.latency)
+        responses = {}
+        with self._lock:
+            for name, request in RequestItems.items():
+                store = self.tables[name]
+                names = request.get('ExpressionAttributeNames', {})
+                responses[name] = [
+                    _projection(store[(key['p_key'], key['s_key'])], request.get('ProjectionExpression'), names)
+                    for key in request['Keys'] if (key['p_key'], key['s_key']) in store
+                ]
+        self.recorder.record('dynamodb', 'batch_get_item', bytes_out=_size(responses))
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def transact_write_items(self, TransactItems: list, **kwargs) -> dict:
+        if self.latency:
+            time.sleep(self.latency)
+        self.recorder.record('dynamodb', 'transact_write_items', bytes_in=_size(TransactItems))
+        with self._lock:
+            for operation in TransactItems:
+                put = operation['Put']
+                item = put['Item']
+                self.tables[put['TableName']][(item['p_key'], item['s_key'])] = dict(item)
+        return {}
+
+
+def canned_questions(prompt: str) -> str:
+    """Model reply for a gap analysis prompt: one question per listed gap field"""
+    match = re.search(r'^GAPS.*?\n(\[.*?\])\s*$', prompt, re.MULTILINE | re.DOTALL)
+    gaps = json.loads(match.group(1)) if match else []
+    return json.dumps({gap['field']: [f"Can you tell us more about {gap['field'].replace('_', ' ')}?"]
+                       for gap in gaps})
+
+
+def canned_merge(prompt: str) -> str:
+    """Model reply for a merge conflict prompt: both values joined"""
+    match = re.search(r'^FIELDS:\n(\{.*?\})\s*$', prompt, re.MULTILINE | re.DOTALL)
+    conflicts = json.loads(match.group(1)) if match else {}
+    return json.dumps({name: f"{values['existing']} {values['new']}" for name, values in conflicts.items()})
+
+
+class LocalBedrockRuntime:
+    """
+    In-memory bedrock-runtime client answering invoke_model with Nova-shaped responses.
+
+    Args:
+        delay: Seconds each model call takes
+        responder: Callable(prompt) -> reply text; defaults to the canned gap/merge replies
+    """
+
+    def __init__(self, recorder: CallRecorder, delay: float = 0.0, responder=None):
+        self.recorder = recorder
+        self.delay = delay
+        self.responder = responder or self._default_reply
+
+    @staticmethod
+    def _default_reply(prompt: str) -> str:
+        if '\nFIELDS:\n' in prompt:
+            return canned_merge(prompt)
+        return canned_questions(prompt)
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:
+        request = json.loads(body)
+        prompt = request['messages'][0]['content'][0]['text']
+        if self.delay:
+            time.sleep(self.delay)
+        reply = json.dumps({'output': {'message': {'role': 'assistant', 'content': [{'text': self.responder(prompt)}]}}})
+        self.recorder.record('bedrock', 'invoke_model', bytes_in=_size(body), bytes_out=_size(reply))
+        return {'body': io.BytesIO(reply.encode('utf-8'))}
+
+
+class LocalEvents:
+    """In-memory EventBridge client keeping every published entry"""
+
+    def __init__(self, recorder: CallRecorder):
+        self.recorder = recorder
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def put_events(self, Entries: list, **kwargs) -> dict:
+        self.recorder.record('events', 'put_events', bytes_in=_size(Entries))
+        with self._lock:
+            self.entries.extend(Entries)
+        return {'FailedEntryCount': 0, 'Entries': [{'EventId': str(i)} for i in range(len(Entries))]}
+
+
+class LocalSTS:
+    def __init__(self, recorder: CallRecorder):
+        self.recorder = recorder
+
+    def get_caller_identity(self, **kwargs) -> dict:
+        self.recorder.record('sts', 'get_caller_identity')
+        return {'Account': '000000000000', 'Arn': 'arn:aws:iam::000000000000:user/local', 'UserId': 'local'}
+
+
+class RecordingDataAutomation(LocalDataAutomation):
+    """LocalDataAutomation that records its calls and writes canned custom output to the local S3"""
+
+    def __init__(self, recorder: CallRecorder, s3: LocalS3, outputs: dict, **kwargs):
+        super().__init__(**kwargs)
+        self.recorder = recorder
+        self.s3 = s3
+        self.outputs = outputs  # blueprint ARN (or 'default') -> custom_output dict
+
+    def invoke_data_automation_async(self, **params) -> dict:
+        self.recorder.record('bda', 'invoke_data_automation_async', bytes_in=_size(params))
+        return super().invoke_data_automation_async(**params)
+
+    def get_data_automation_status(self, invocationArn: str) -> dict:
+        self.recorder.record('bda', 'get_data_automation_status')
+        response = super().get_data_automation_status(invocationArn)
+        job = self.jobs[invocationArn]
+        if response['status'] == 'Success' and not job.get('written'):
+            self._write_output(job, response['outputConfiguration']['s3Uri'])
+        return response
+
+    def _write_output(self, job: dict, metadata_uri: str):
+        blueprint_arn = job['params'].get('blueprints', [{}])[0].get('blueprintArn', 'default')
+        custom_output = self.outputs.get(blueprint_arn, self.outputs.get('default', {}))
+        bucket, metadata_key = metadata_uri.split('/', 3)[2:]
+        result_key = metadata_key.rsplit('/', 1)[0] + '/custom_output/0/result.json'
+        metadata = {'output_metadata': [{'segment_metadata': [
+            {'custom_output_status': 'MATCH', 'custom_output_path': f's3://{bucket}/{result_key}'}
+        ]}]}
+        # Written directly so the stand-in's own writes do not count as tool calls
+        for key, payload in ((result_key, custom_output), (metadata_key, metadata)):
+            body = json.dumps(payload).encode('utf-8')
+            self.s3.objects[(bucket, key)] = {'body': body, 'etag': f'"{hashlib.md5(body).hexdigest()}"',
+                                              'content_type': 'application/json', 'content_encoding': None}
+        job['written'] = True
+
+
+class LocalAWS:
+    """
+    In-memory stand-ins for every AWS service the Agent 1 tools call.
+
+    Use patch() to make boto3.client / boto3.resource return the stand-ins.
+
+    Args:
+        outputs: Canned BDA custom_output per blueprint ARN ('default' applies otherwise)
+        job_seconds: BDA job durations per blueprint ARN ('default' applies otherwise)
+        model_delay: Seconds each Bedrock invoke_model call takes
+        round_trip: Seconds added to every S3 and DynamoDB call
+    """
+
+    def __init__(self, outputs: dict = None, job_seconds: dict = None, model_delay: float = 0.0,
+                 round_trip: float = 0.0):
+        self.recorder = CallRecorder()
+        self.s3 = LocalS3(self.recorder, round_trip)
+        self.dynamodb = LocalDynamoDB(self.recorder, round_trip)
+        self.bda = RecordingDataAutomation(self.recorder, self.s3, outputs or {},
+                                           durations=job_seconds or {'default': 0.5})
+        self.bedrock = LocalBedrockRuntime(self.recorder, model_delay)
+        self.events = LocalEvents(self.recorder)
+        self.sts = LocalSTS(self.recorder)
+
+    def client(self, service_name: str, *args, **kwargs):
+        clients = {
+            's3': self.s3,
+            'bedrock-data-automation-runtime': self.bda,
+            'bedrock-runtime': self.bedrock,
+            'events': self.events,
+            'sts': self.sts,
+            'dynamodb': self.dynamodb
+        }
+        if service_name not in clients:
+            raise NotImplementedError(f"No local stand-in for {service_name}")
+        return clients[service_name]
+
+    def resource(self, service_name: str, *args, **kwargs):
+        if service_name != 'dynamodb':
+            raise NotImplementedError(f"No local stand-in for {service_name} resource")
+        return self.dynamodb
+
+    @contextlib.contextmanager
+    def patch(self):
+        """Route boto3.client and boto3.resource to the stand-ins"""
+        import boto3
+
+        original = boto3.client, boto3.resource
+        boto3.client, boto3.resource = self.client, self.resource
+        try:
+            yield self
+        finally:
+            boto3.client, boto3.resource = original
@@ -0,0 +1,99 @@
+import itertools
+import time
+
+
+class SimulatedClock:
+    """A clock whose sleep advances time instantly, for deterministic polling runs"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+        self.slept += seconds
+
+
+class LocalDataAutomation:
+    """
+    In-memory stand-in for the bedrock-data-automation-runtime client.
+
+    Jobs move from Created to InProgress to their final status after a
+    configurable duration measured on the supplied clock. Status calls are
+    counted so polling strategies can be compared without live AWS.
+
+    Args:
+        durations: Seconds each job takes, keyed by blueprint ARN ('default' applies otherwise)
+        outcome: Final status of every job (e.g. 'Success', 'ServiceError')
+        clock: Zero-argument callable returning the current time
+        output_uri: Format string for the job metadata URI, given the job number
+    """
+
+    def __init__(self, durations: dict = None, outcome: str = 'Success', clock=time.monotonic,
+                 output_uri: str = 's3://local-bda-output/job-{job}/job_metadata.json'):
+        self.durations = durations or {'default': 30.0}
+        self.outcome = outcome
+        self.clock = clock
+        self.output_uri = output_uri
+        self.jobs = {}
+        self.status_calls = 0
+        self.invocations = 0
+        self._ids = itertools.count(1)
+
+    def invoke_data_automation_async(self, **params) -> dict:
+        self.invocations += 1
+        job = next(self._ids)
+        blueprint_arn = params.get('blueprints', [{}])[0].get('blueprintArn', 'default')
+        invocation_arn = f"arn:aws:bedrock:local:000000000000:data-automation-invocation/job-{job}"
+        self.jobs[invocation_arn] = {
+            'job': job,
+            'params': params,
+            'started': self.clock(),
+            'duration': self.durations.get(blueprint_arn, self.durations.get('default', 30.0)),
+        }
+        return {'invocationArn': invocation_arn}
+
+    def get_data_automation_status(self, invocationArn: str) -> dict:
+        self.status_calls += 1
+        job = self.jobs[invocationArn]
+        elapsed = self.clock() - job['started']
+        if elapsed < min(1.0, job['duration']):
+            return {'status': 'Created'}
+        if elapsed < job['duration']:
+            return {'status': 'InProgress'}
+        response = {'status': self.outcome}
+        if self.outcome == 'Success':
+            response['outputConfiguration'] = {'s3Uri': self.output_uri.format(job=job['job'])}
+        return response
+
+
+def compare_polling(job_seconds: float = 95.0, fixed_interval: float = 10.0) -> dict:
+    """Compare dead time and status calls of fixed-interval and adaptive polling for one job"""
+    from tools.bda_polling import wait_for_data_automation
+
+    results = {}
+
+    clock = SimulatedClock()
+    bda = LocalDataAutomation({'default': job_seconds}, clock=clock.time)
+    arn = bda.invoke_data_automation_async(blueprints=[{}])['invocationArn']
+    while bda.get_data_automation_status(invocationArn=arn)['status'] in ['Created', 'InProgress']:
+        clock.sleep(fixed_interval)
+    results['fixed'] = {'wait_seconds': clock.now, 'dead_seconds': clock.now - job_seconds,
+                        'status_calls': bda.status_calls}
+
+    clock = SimulatedClock()
+    bda = LocalDataAutomation({'default': job_seconds}, clock=clock.time)
+    arn = bda.invoke_data_automation_async(blueprints=[{}])['invocationArn']
+    wait_for_data_automation(bda, arn, sleep=clock.sleep, clock=clock.time)
+    results['adaptive'] = {'wait_seconds': clock.now, 'dead_seconds': clock.now - job_seconds,
+                           'status_calls': bda.status_calls}
+    return results
+
+
+if __name__ == "__main__":
+    import json
+    for seconds in (5.0, 45.0, 95.0, 300.0):
+        print(seconds, json.dumps(compare_polling(seconds)))
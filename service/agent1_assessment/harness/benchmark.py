@@ -0,0 +1,275 @@
+"""
+Scripted assessment sessions against local AWS stand-ins.
+
+Runs the Agent 1 tools the way a session uses them and reports, per tool,
+latency, S3/DynamoDB/BDA/Bedrock calls and bytes moved. Round-trip counts are
+compared with harness/baseline.json and increases are flagged as regressions.
+
+    python -m harness.benchmark                    # run every scenario, compare with the baseline
+    python -m harness.benchmark --update-baseline  # accept the current counts
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+DIMENSIONS = ['technical', 'business', 'commercial', 'governance']
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Status polls and EventBridge batches depend on timing, so they are reported but not compared
+UNCOMPARED_CALLS = ('bda.get_data_automation_status', 'events.put_events')
+
+LOCAL_ENVIRONMENT = {
+    'AWS_REGION': 'ap-southeast-2',
+    'SESSION_BUCKET': 'local-session-bucket',
+    'DOCUMENT_BUCKET': 'local-document-bucket',
+    'SESSION_MEMORY_TABLE': 'local-session-memory',
+    'EVENT_BUS_NAME': 'local-event-bus',
+    'BDA_POLL_INITIAL_SECONDS': '0.05',
+    'BDA_POLL_MAX_SECONDS': '0.1',
+    'PROGRESS_EVENT_COALESCE_SECONDS': '0',
+    **{f'EXTRACT_BLUEPRINT_ARN_{dim.upper()}': f'arn:aws:bedrock:local:000000000000:blueprint/{dim}'
+       for dim in DIMENSIONS}
+}
+
+
+def configure_environment():
+    """Point the tools at the local resources; variables that are already set win"""
+    for key, value in LOCAL_ENVIRONMENT.items():
+        os.environ.setdefault(key, value)
+
+
+def field_names(dimension: str, field_count: int = 40) -> list:
+    """The dimension's blueprint fields from the field catalog, or synthetic names without one"""
+    from tools.field_catalog import FIELD_CATALOG
+
+    if dimension in FIELD_CATALOG:
+        return [field['name'] for field in FIELD_CATALOG[dimension]['fields']]
+    return [f'{dimension}_field_{i:02d}' for i in range(field_count)]
+
+
+def canned_output(dimension: str) -> dict:
+    """
+    BDA custom_output for a dimension: every fifth field is empty and every
+    fourth has low confidence, so gap analysis and merging have work to do.
+    """
+    inference_result = {}
+    explainability = {}
+    for i, name in enumerate(field_names(dimension)):
+        inference_result[name] = '' if i % 5 == 4 else f'{dimension} detail {i} from the uploaded document'
+        explainability[name] = {'confidence': 0.55 if i % 4 == 3 else 0.95, 'geometry': []}
+    return {
+        'matched_blueprint': {'arn': LOCAL_ENVIRONMENT[f'EXTRACT_BLUEPRINT_ARN_{dimension.upper()}'],
+                              'name': f'{dimension}-assessment', 'confidence': 1},
+        'document_class': {'type': f'{dimension}-assessment'},
+        'inference_result': inference_result,
+        'explainability_info': [explainability]
+    }
+
+
+def answers(dimension: str, fields: range) -> dict:
+    names = field_names(dimension)
+    return {names[i]: f'User answer for {dimension} field {i}' for i in fields}
+
+
+# Each step is (tool, arguments); 'session' picks one of the scenario's sessions (default 'a')
+SCENARIOS = {
+    'single_dimension': [
+        ('extract_document_content', {'dimension': 'technical'}),
+        ('analyze_document_gaps', {'dimension': 'technical'}),
+        ('save_assessment_data', {'dimension': 'technical', 'data': answers('technical', range(4, 20, 5))}),
+        ('analyze_document_gaps', {'dimension': 'technical'}),
+        ('get_assessment_data', {'dimension': 'technical'}),
+        ('get_session_state', {}),
+        ('mark_dimension_complete', {'dimension': 'technical'}),
+    ],
+    'all_dimensions': [
+        ('extract_all_dimensions', {}),
+        *[('analyze_document_gaps', {'dimension': dim}) for dim in DIMENSIONS],
+        *[('save_assessment_data', {'dimension': dim, 'data': answers(dim, range(4, 40, 5))}) for dim in DIMENSIONS],
+        ('get_session_state', {}),
+        ('get_session_state', {'mode': 'history'}),
+        *[('mark_dimension_complete', {'dimension': dim}) for dim in DIMENSIONS],
+    ],
+    'repeat_upload': [
+        ('extract_document_content', {'dimension': 'technical'}),
+        ('save_assessment_data', {'dimension': 'technical', 'data': answers('technical', range(0, 10))}),
+        ('extract_document_content', {'dimension': 'technical'}),
+        ('extract_document_content', {'dimension': 'technical', 'session': 'b'}),
+        ('analyze_document_gaps', {'dimension': 'technical', 'session': 'b'}),
+        ('analyze_document_gaps', {'dimension': 'technical', 'session': 'b'}),
+    ],
+}
+
+
+def _tools() -> dict:
+    # Imported late so LOCAL_ENVIRONMENT is in place when the tools read their settings
+    from tools.analyze_document_gaps import analyze_document_gaps
+    from tools.extract_document_content import extract_all_dimensions, extract_document_content
+    from tools.get_assessment_data import get_assessment_data
+    from tools.get_session_state import get_session_state
+    from tools.mark_dimension_complete import mark_dimension_complete
+    from tools.save_assessment_data import save_assessment_data
+    return {
+        'extract_document_content': extract_document_content,
+        'extract_all_dimensions': extract_all_dimensions,
+        'analyze_document_gaps': analyze_document_gaps,
+        'save_assessment_data': save_assessment_data,
+        'get_assessment_data': get_assessment_data,
+        'get_session_state': get_session_state,
+        'mark_dimension_complete': mark_dimension_complete,
+    }
+
+
+def _failed(result) -> bool:
+    if isinstance(result, dict):
+        return 'error' in result
+    return isinstance(result, str) and (result.startswith('Error') or '"error"' in result[:200])
+
+
+def run_scenario(name: str, job_seconds: float = 0.5, model_delay: float = 0.2, round_trip: float = 0.002) -> list:
+    """
+    Run one scripted session against fresh local stand-ins.
+
+    Returns:
+        One record per step with the tool, latency, calls and bytes
+    """
+    configure_environment()
+    from harness.aws import LocalAWS
+    from tools import progress_events, session_memory
+
+    aws = LocalAWS(outputs={LOCAL_ENVIRONMENT[f'EXTRACT_BLUEPRINT_ARN_{dim.upper()}']: canned_output(dim)
+                            for dim in DIMENSIONS},
+                   job_seconds={'default': job_seconds}, model_delay=model_delay, round_trip=round_trip)
+    tools = _tools()
+    document_key = 'assessment-input.docx'
+    document = (f'{name} assessment document\n' * 4096).encode('utf-8')
+    for session in {args.get('session', 'a') for _, args in SCENARIOS[name]}:
+        aws.s3.objects[(os.environ['DOCUMENT_BUCKET'], f'{name}-{session}/{document_key}')] = {
+            'body': document, 'etag': '"upload"', 'content_type': None, 'content_encoding': None
+        }
+
+    records = []
+    with aws.patch():
+        progress_events.publisher._client = None  # Drop a client created outside the stand-ins
+        for index, (tool, arguments) in enumerate(SCENARIOS[name]):
+            arguments = dict(arguments)
+            session_id = f"{name}-{arguments.pop('session', 'a')}"
+            if tool.startswith('extract'):
+                arguments['document_key'] = document_key
+            step = f"{index:02d}-{tool}" + (f"-{arguments['dimension']}" if 'dimension' in arguments else '')
+
+            aws.recorder.step = step
+            started = time.perf_counter()
+            result = tools[tool](session_id=session_id, **arguments)
+            # What the runtime does at the end of every turn
+            session_memory.flush(session_id)
+            progress_events.flush(timeout=5)
+            seconds = time.perf_counter() - started
+            aws.recorder.step = None
+
+            records.append({'step': step, 'tool': tool, 'seconds': round(seconds, 4),
+                            'ok': not _failed(result), **aws.recorder.take(step)})
+            if _failed(result):
+                print(f"{name} {step} failed: {str(result)[:300]}")
+    return records
+
+
+def round_trips(records: list) -> dict:
+    """Compared call counts per step"""
+    return {
+        record['step']: {call: count for call, count in sorted(record['calls'].items()) if call not in UNCOMPARED_CALLS}
+        for record in records
+    }
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """List of (step, call, baseline count, current count) where the current run makes more calls"""
+    regressions = []
+    for step, calls in current.items():
+        previous = baseline.get(step)
+        if previous is None:
+            continue  # New step, nothing to compare with
+        for call, count in calls.items():
+            if count > previous.get(call, 0):
+                regressions.append((step, call, previous.get(call, 0), count))
+    return regressions
+
+
+def summarize(records: list) -> dict:
+    """Latency, calls and bytes per tool"""
+    tools = defaultdict(lambda: {'runs': 0, 'seconds': 0.0, 's3': 0, 'dynamodb': 0, 'bda': 0, 'bedrock': 0,
+                                 'events': 0, 'bytes': 0})
+    for record in records:
+        summary = tools[record['tool']]
+        summary['runs'] += 1
+        summary['seconds'] += record['seconds']
+        for call, count in record['calls'].items():
+            service = call.split('.')[0]
+            if service in summary:
+                summary[service] += count
+        summary['bytes'] += sum(record['bytes'].values())
+    return dict(tools)
+
+
+def print_report(name: str, records: list, regressions: list):
+    print(f"\n== {name} ==")
+    print(f"{'tool':<28}{'runs':>5}{'mean s':>9}{'s3':>6}{'ddb':>6}{'bda':>6}{'llm':>6}{'events':>8}{'KiB':>10}")
+    for tool, summary in summarize(records).items():
+        print(f"{tool:<28}{summary['runs']:>5}{summary['seconds'] / summary['runs']:>9.3f}{summary['s3']:>6}"
+              f"{summary['dynamodb']:>6}{summary['bda']:>6}{summary['bedrock']:>6}{summary['events']:>8}"
+              f"{summary['bytes'] / 1024:>10.1f}")
+    failed = [record['step'] for record in records if not record['ok']]
+    if failed:
+        print(f"Failed steps: {', '.join(failed)}")
+    for step, call, before, after in regressions:
+        print(f"REGRESSION {step}: {call} {before} -> {after}")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Round-trip baseline file')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the current counts to the baseline')
+    parser.add_argument('--job-seconds', type=float, default=0.5, help='Duration of every BDA job')
+    parser.add_argument('--model-seconds', type=float, default=0.2, help='Duration of every Bedrock model call')
+    parser.add_argument('--round-trip-ms', type=float, default=2.0, help='Latency added to S3 and DynamoDB calls')
+    parser.add_argument('--json', help='Also write the per-step records to this file')
+    args = parser.parse_args(argv)
+
+    configure_environment()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = 0
+    for name in args.scenario or SCENARIOS:
+        records = run_scenario(name, args.job_seconds, args.model_seconds, args.round_trip_ms / 1000)
+        results[name] = records
+        found = [] if args.update_baseline else compare(baseline.get(name, {}), round_trips(records))
+        regressions += len(found)
+        print_report(name, records, found)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        baseline.update({name: round_trips(records) for name, records in results.items()})
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+    elif regressions:
+        print(f"\n{regressions} round-trip regressions against {args.baseline}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
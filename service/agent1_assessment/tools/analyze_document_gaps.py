@@ -1,129 +1,194 @@
 import boto3
 import json
 import os
-from tools.query_assessment_guidelines import query_assessment_guidelines
+import re
+from tools import gap_cache
+from tools.assessment_store import read_assessment_cached, read_assessment_summary
+from tools.gap_rules import classify_fields, gap_fields, build_analysis
+from tools.query_assessment_guidelines import guideline_points
 
+MAX_QUESTION_FIELDS = int(os.environ.get('GAP_MAX_QUESTION_FIELDS', '10'))
 
-def analyze_document_gaps(session_id: str, dimension: str) -> str:
+# Part of the gap analysis cache key: changing any of these invalidates cached analyses.
+# The output budget allows two questions per field (about 100 tokens) plus the JSON
+# object, so a full batch of gap fields is not cut off mid-object.
+GAP_MODEL_CONFIG = {
+    'model_id': 'amazon.nova-pro-v1:0',
+    'max_new_tokens': 64 + 100 * MAX_QUESTION_FIELDS,
+    'temperature': 0.2,
+    'top_p': 0.9,
+    'max_question_fields': MAX_QUESTION_FIELDS,
+    'prompt': 'questions-v1'
+}
+
+
+def _invoke_model(bedrock, prompt: str) -> str:
+    response = bedrock.invoke_model(
+        modelId=GAP_MODEL_CONFIG['model_id'],
+        contentType='application/json',
+        accept='application/json',
+        body=json.dumps({
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"text": prompt}
+                    ]
+                }
+            ],
+            "inferenceConfig": {
+                "max_new_tokens": GAP_MODEL_CONFIG['max_new_tokens'],
+                "temperature": GAP_MODEL_CONFIG['temperature'],
+                "top_p": GAP_MODEL_CONFIG['top_p']
+            }
+        })
+    )
+    response_body = json.loads(response['body'].read())
+    return response_body["output"]["message"]["content"][0]["text"]
+
+
+def _generate_questions(bedrock, dimension: str, guidelines: str, fields: list, classification: dict,
+                        inference_result: dict, explainability_info: dict):
     """
-    Analyze gaps between extracted document content and assessment requirements using Claude Sonnet.
-    
+    Ask the model for follow-up questions for the given gap fields only.
+
+    Returns:
+        Questions by field name, or None if the model call failed or its output
+        could not be parsed; the rule-based analysis stands without them
+    """
+    gaps = []
+    for field_name in fields:
+        gap = {'field': field_name, 'issue': classification[field_name]}
+        if classification[field_name] != 'missing':
+            gap['current_value'] = inference_result.get(field_name)
+            confidence = (explainability_info.get(field_name) or {}).get('confidence')
+            if confidence is not None:
+                gap['confidence'] = confidence
+        gaps.append(gap)
+
+    prompt = f"""You write follow-up questions for a {dimension} readiness assessment interview.
+
+ASSESSMENT GUIDELINES (categories and points to extract):
+{guidelines}
+
+GAPS (missing = no information, low_confidence = needs verification, incomplete = partially answered):
+{json.dumps(gaps, separators=(',', ':'), default=str)}
+
+For each gap write 1-2 short, specific questions to ask the user. For low_confidence and incomplete
+gaps, refer to the current value so the user can confirm or complete it.
+
+Return ONLY a JSON object mapping each field name to a list of question strings."""
+
+    try:
+        text = _invoke_model(bedrock, prompt)
+        json_match = re.search(r'\{.*\}', text, re.DOTALL)
+        if not json_match:
+            print(f"Gap analysis model returned no JSON for {dimension}")
+            return None
+        questions = json.loads(json_match.group())
+    except Exception as e:
+        print(f"Unable to generate gap questions for {dimension}: {e}")
+        return None
+    if not isinstance(questions, dict):
+        print(f"Gap analysis model returned no question object for {dimension}")
+        return None
+    return {
+        field_name: [q for q in value if isinstance(q, str) and q.strip()][:2]
+        for field_name, value in questions.items()
+        if field_name in fields and isinstance(value, list)
+    }
+
+
+def analyze_document_gaps(session_id: str, dimension: str, incremental: bool = True) -> str:
+    """
+    Analyze gaps between extracted document content and assessment requirements.
+
+    Missing, low-confidence and incomplete fields are determined locally from the
+    extraction and its explainability info; the model is only asked to write
+    follow-up questions for those fields.
+
+    Results are cached in the session table. An unchanged extraction returns the cached
+    analysis without a model call; with incremental=True the questions of unchanged
+    gap fields are reused and only changed fields are sent to the model.
+
     Args:
         session_id: Unique session identifier
         dimension: Assessment dimension (technical, business, commercial, governance)
-        
+        incremental: Whether questions from a cached analysis may be reused
+
     Returns:
-        Gap analysis with prioritized follow-up questions
+        Gap analysis JSON with prioritized follow-up questions
     """
     try:
         session_bucket = os.environ['SESSION_BUCKET']
         region = os.environ.get('AWS_REGION', 'ap-southeast-2')
-        
+
         # Initialize clients
         s3 = boto3.client('s3', region_name=region)
         bedrock = boto3.client('bedrock-runtime', region_name=region)
-        
-        # Get assessment guidelines
-        guidelines = query_assessment_guidelines(dimension)
-        
-        # Load extracted document data from S3
-        document_key = f"{session_id}/assessment/{dimension}/output.json"
-        
-        try:
-            response = s3.get_object(Bucket=session_bucket, Key=document_key)
-            extracted_data = json.loads(response['Body'].read())
-        except s3.exceptions.NoSuchKey:
+
+        # Only the points to extract matter for gap analysis; sample questions are left out
+        guidelines = guideline_points(dimension)
+        if not guidelines:
+            return f"Error: No assessment guidelines available for {dimension} dimension"
+
+        # Check the cache before doing any work; the assessment summary carries
+        # the field hashes, so an unchanged assessment is not read in full
+        context = gap_cache.context_hash(guidelines, GAP_MODEL_CONFIG)
+        cached = None
+        if gap_cache.cache_enabled():
+            try:
+                cached = gap_cache.get_cached_analysis(session_id, dimension)
+            except Exception as e:
+                print(f"Unable to read gap analysis cache for {dimension}: {e}")
+        if cached:
+            summary = read_assessment_summary(s3, session_bucket, session_id, dimension)
+            if summary and gap_cache.analysis_key(context, summary.get('field_hashes', {})) == cached.get('analysis_key'):
+                print(f"Gap analysis cache hit for {dimension}")
+                return cached['analysis']
+
+        # Load extracted document data from S3, reusing this session's cached copy
+        extracted_data, _ = read_assessment_cached(s3, session_bucket, session_id, dimension)
+        if extracted_data is None:
             return f"No extracted document found for {dimension} dimension in session {session_id}"
-        
+
         # Get inference result and metadata
         inference_result = extracted_data.get('inference_result', {})
         explainability_info = extracted_data.get('explainability_info', [{}])[0]
-        
-        # Calculate field statistics
-        total_fields = len(inference_result)
-        empty_fields = sum(1 for value in inference_result.values() if not value or (isinstance(value, str) and value.strip() == ""))
-        filled_fields = total_fields - empty_fields
-        
-        # Calculate confidence metrics
-        confidence_values = []
-        for field_data in explainability_info.values():
-            if isinstance(field_data, dict) and 'confidence' in field_data:
-                confidence_values.append(field_data['confidence'])
-        
-        min_confidence = min(confidence_values) if confidence_values else 0
-        avg_confidence = sum(confidence_values) / len(confidence_values) if confidence_values else 0
-        
-        # Prepare prompt for Claude Sonnet
-        prompt = f"""You are an expert assessment gap analyzer. Perform a comprehensive analysis of document extraction completeness for {dimension} assessment.
-
-ASSESSMENT GUIDELINES:
-{guidelines}
+        field_sources = extracted_data.get('_metadata', {}).get('field_sources', {})
+
+        hashes = gap_cache.field_hashes(inference_result, explainability_info, field_sources)
+        key = gap_cache.analysis_key(context, hashes)
+        if cached and cached.get('analysis_key') == key:
+            print(f"Gap analysis cache hit for {dimension}")
+            return cached['analysis']
+
+        # Deterministic pre-pass
+        classification = classify_fields(inference_result, explainability_info, field_sources)
+        question_fields = gap_fields(classification)[:GAP_MODEL_CONFIG['max_question_fields']]
+
+        # Reuse questions of gap fields that did not change since the cached analysis
+        questions = {}
+        if incremental and cached and cached.get('context_hash') == context:
+            previous_hashes = cached.get('field_hashes', {})
+            unchanged = set(question_fields) - set(gap_cache.changed_fields(previous_hashes, hashes))
+            questions = {name: list(q) for name, q in cached.get('questions', {}).items() if name in unchanged}
+
+        pending = [name for name in question_fields if name not in questions]
+        print(f"Gap analysis for {dimension}: {len(question_fields)} gap fields, {len(pending)} sent to the model")
+        generated = {}
+        if pending:
+            generated = _generate_questions(
+                bedrock, dimension, guidelines, pending, classification, inference_result, explainability_info
+            )
+            questions.update(generated or {})
+
+        gap_analysis = json.dumps(build_analysis(dimension, classification, questions), indent=2)
+        # An analysis whose questions could not be generated is not cached, so the next call retries
+        if gap_cache.cache_enabled() and generated is not None:
+            gap_cache.put_cached_analysis(session_id, dimension, key, context, hashes, gap_analysis, questions)
 
-EXTRACTED DOCUMENT DATA:
-{json.dumps(inference_result, indent=2)}
-
-EXTRACTION CONFIDENCE DATA:
-{json.dumps(explainability_info, indent=2)}
-
-EXTRACTION METADATA:
-- Total fields: {total_fields}
-- Filled fields: {filled_fields}
-- Empty fields: {empty_fields}
-- Confidence range: {min_confidence:.4f} - {avg_confidence:.4f}
-
-ANALYSIS REQUIRED:
-Analyze the extracted data against the assessment guidelines and provide:
-
-1. **Critical Missing Information**: Key requirements from guidelines not found in extracted data
-2. **Low Confidence Extractions**: Fields with confidence < 0.7 that need verification
-3. **Incomplete Responses**: Fields that are partially filled or unclear
-4. **Follow-up Questions**: Prioritized questions to fill gaps (high/medium/low priority). 
-    **VERY Important**: Max 2 questions per low confidence or missing area
-5. **Completeness Assessment**: Overall percentage and readiness for next phase
-
-Return your analysis in this JSON structure:
-{{
-    "critical_missing": ["list of missing critical fields"],
-    "low_confidence_fields": ["fields needing verification"],
-    "incomplete_responses": ["partially filled fields"],
-    "follow_up_questions": {{
-        "high_priority": ["urgent questions"],
-        "medium_priority": ["important questions"],
-        "low_priority": ["nice-to-have questions"]
-    }},
-    "completeness_percentage": 85,
-    "readiness_assessment": "description of current state and next steps"
-}}
-
-Focus on actionable insights that will help complete the {dimension} assessment."""
-
-        # Call Nova Pro
-        response = bedrock.invoke_model(
-            modelId='amazon.nova-pro-v1:0',
-            contentType='application/json',
-            accept='application/json',
-            body=json.dumps({
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {"text": prompt}
-                        ]
-                    }
-                ],
-                "inferenceConfig": {
-                    "max_new_tokens": 512,
-                    "temperature": 0.7,
-                    "top_p": 0.9
-                }
-            })
-        )
-        
-        # Parse response
-        response_body = json.loads(response['body'].read())
-        gap_analysis = response_body["output"]["message"]["content"][0]["text"]
-        
         return gap_analysis
-        
+
     except Exception as e:
         return f"Error analyzing document gaps: {str(e)}"
@@ -0,0 +1,230 @@
+import gzip
+import json
+import os
+import random
+import time
+
+from botocore.exceptions import ClientError
+
+from tools import gap_cache, session_cache
+from tools.field_catalog import is_filled
+
+# Optimistic concurrency for assessment/<dimension>/output.json: every write is
+# conditional on the ETag that was read, so two tool calls updating the same
+# dimension retry instead of silently overwriting each other.
+#
+# output.json is stored as compact JSON, gzip-encoded with ASSESSMENT_GZIP=true.
+# Next to it, summary.json indexes the fields (fill status, confidence, source
+# and the per-field hashes of the gap analysis cache) for readers that do not
+# need the values.
+MAX_WRITE_ATTEMPTS = 5
+CONFLICT_CODES = ('PreconditionFailed', 'ConditionalRequestConflict', '412', '409')
+NOT_MODIFIED_CODES = ('304', 'NotModified')
+
+
+class AssessmentWriteConflict(Exception):
+    """Raised when an assessment file keeps changing underneath a writer"""
+
+
+def assessment_key(session_id: str, dimension: str) -> str:
+    return f"{session_id}/assessment/{dimension}/output.json"
+
+
+def summary_key(session_id: str, dimension: str) -> str:
+    return f"{session_id}/assessment/{dimension}/summary.json"
+
+
+def gzip_enabled() -> bool:
+    return os.environ.get('ASSESSMENT_GZIP', 'false').lower() == 'true'
+
+
+def summary_enabled() -> bool:
+    return os.environ.get('ASSESSMENT_SUMMARY_ENABLED', 'true').lower() == 'true'
+
+
+def decode_body(response: dict):
+    """Parse a get_object response body, plain or gzip-encoded"""
+    body = response['Body'].read()
+    if response.get('ContentEncoding') == 'gzip' or body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def _encode(payload: dict) -> dict:
+    """put_object Body and encoding parameters for a JSON payload"""
+    body = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+    if gzip_enabled():
+        return {'Body': gzip.compress(body), 'ContentEncoding': 'gzip', 'ContentType': 'application/json'}
+    return {'Body': body, 'ContentType': 'application/json'}
+
+
+def build_summary(data: dict, etag: str = None) -> dict:
+    """Field index of an assessment file: fill status, confidence and source of every field"""
+    inference_result = data.get('inference_result', {})
+    explainability_info = (data.get('explainability_info') or [{}])[0]
+    metadata = data.get('_metadata', {})
+    field_sources = metadata.get('field_sources', {})
+    fields = {}
+    for field_name, value in inference_result.items():
+        confidence = (explainability_info.get(field_name) or {}).get('confidence')
+        fields[field_name] = {
+            'filled': is_filled(value),
+            'confidence': confidence,
+            'source': field_sources.get(field_name, {}).get('source', 'extraction')
+        }
+    return {
+        'payload_etag': etag,
+        'last_updated': metadata.get('last_updated'),
+        'completion': metadata.get('completion'),
+        'fields': fields,
+        'field_hashes': gap_cache.field_hashes(inference_result, explainability_info, field_sources)
+    }
+
+
+def read_assessment(s3, bucket: str, session_id: str, dimension: str):
+    """
+    Read a dimension's assessment file.
+
+    Returns:
+        (data, etag); (None, None) when the file does not exist yet
+    """
+    try:
+        response = s3.get_object(Bucket=bucket, Key=assessment_key(session_id, dimension))
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None, None
+        raise
+    return decode_body(response), response.get('ETag')
+
+
+def read_assessment_summary(s3, bucket: str, session_id: str, dimension: str):
+    """
+    Read a dimension's summary.json, or build it from this session's cached assessment.
+
+    The summary is written after the payload and may be missing or stale (a failed
+    summary write, racing writers); it is only returned when its payload_etag
+    matches the current output.json.
+
+    Returns:
+        The summary (see build_summary), or None when there is no current one
+    """
+    if not summary_enabled():
+        return None
+    entry = session_cache.get(session_id, dimension)
+    if entry is not None and not session_cache.validate_reads():
+        return build_summary(entry['data'], entry['etag'])
+    try:
+        response = s3.get_object(Bucket=bucket, Key=summary_key(session_id, dimension))
+        summary = decode_body(response)
+        head = s3.head_object(Bucket=bucket, Key=assessment_key(session_id, dimension))
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None
+        raise
+    if head.get('ETag') != summary.get('payload_etag'):
+        print(f"Summary of {dimension} assessment is stale, reading the full file")
+        return None
+    return summary
+
+
+def read_assessment_cached(s3, bucket: str, session_id: str, dimension: str):
+    """
+    Read a dimension's assessment file through the per-session cache.
+
+    Returns:
+        (data, etag) like read_assessment; the data is a private copy
+    """
+    entry = session_cache.get(session_id, dimension)
+    if entry is not None:
+        if not session_cache.validate_reads():
+            return entry['data'], entry['etag']
+        try:
+            response = s3.get_object(Bucket=bucket, Key=assessment_key(session_id, dimension),
+                                     IfNoneMatch=entry['etag'])
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            if code in NOT_MODIFIED_CODES:
+                return entry['data'], entry['etag']
+            if code in ('NoSuchKey', '404'):
+                session_cache.invalidate(session_id, dimension)
+                return None, None
+            raise
+        data, etag = decode_body(response), response.get('ETag')
+    else:
+        data, etag = read_assessment(s3, bucket, session_id, dimension)
+    if data is not None:
+        session_cache.put(session_id, dimension, data, etag)
+    return data, etag
+
+
+def write_assessment(s3, bucket: str, session_id: str, dimension: str, data: dict, etag: str = None) -> str:
+    """
+    Conditionally write a dimension's assessment file.
+
+    Args:
+        etag: ETag the data was based on; None means the file must not exist yet
+
+    Returns:
+        ETag of the written object
+
+    Raises:
+        ClientError: PreconditionFailed/ConditionalRequestConflict when the file changed
+    """
+    params = {
+        'Bucket': bucket,
+        'Key': assessment_key(session_id, dimension),
+        **_encode(data)
+    }
+    if etag:
+        params['IfMatch'] = etag
+    else:
+        params['IfNoneMatch'] = '*'
+    response = s3.put_object(**params)
+    new_etag = response.get('ETag')
+
+    if summary_enabled():
+        try:
+            # Written after the payload, so it names the payload version it describes
+            s3.put_object(
+                Bucket=bucket,
+                Key=summary_key(session_id, dimension),
+                **_encode(build_summary(data, new_etag))
+            )
+        except ClientError as e:
+            print(f"Unable to write {dimension} assessment summary: {e}")
+    return new_etag
+
+
+def update_assessment(s3, bucket: str, session_id: str, dimension: str, apply, max_attempts: int = MAX_WRITE_ATTEMPTS):
+    """
+    Read-modify-write a dimension's assessment file with optimistic concurrency.
+
+    Args:
+        apply: Callable taking the current data (None if absent) and returning the new data.
+               It is called again with fresh data after a conflict, so it must not
+               have side effects beyond building the result.
+
+    Returns:
+        (data, etag) as written
+
+    Raises:
+        AssessmentWriteConflict: If every attempt lost a race with another writer
+    """
+    for attempt in range(max_attempts):
+        # The first attempt may start from the cached version; a conflict means it was stale
+        if attempt == 0:
+            current, etag = read_assessment_cached(s3, bucket, session_id, dimension)
+        else:
+            current, etag = read_assessment(s3, bucket, session_id, dimension)
+        updated = apply(current)
+        try:
+            new_etag = write_assessment(s3, bucket, session_id, dimension, updated, etag)
+            session_cache.put(session_id, dimension, updated, new_etag)
+            return updated, new_etag
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in CONFLICT_CODES:
+                raise
+            session_cache.invalidate(session_id, dimension)
+            print(f"Concurrent update to {dimension} assessment, retrying ({attempt + 1}/{max_attempts})")
+            time.sleep(random.uniform(0.05, 0.2) * (attempt + 1))
+    raise AssessmentWriteConflict(f"Unable to update {dimension} assessment after {max_attempts} attempts")
@@ -0,0 +1,64 @@
+import os
+import time
+
+# Adaptive polling: start short so fast jobs are picked up quickly, grow the
+# interval geometrically so long jobs do not burn status calls, and give up
+# after an overall timeout instead of blocking the agent forever.
+POLL_INITIAL_SECONDS = float(os.environ.get('BDA_POLL_INITIAL_SECONDS', '1'))
+POLL_MAX_SECONDS = float(os.environ.get('BDA_POLL_MAX_SECONDS', '5'))
+POLL_BACKOFF = float(os.environ.get('BDA_POLL_BACKOFF', '1.5'))
+POLL_TIMEOUT_SECONDS = float(os.environ.get('BDA_POLL_TIMEOUT_SECONDS', '1800'))
+
+PENDING_STATUSES = ["Created", "InProgress"]
+
+
+def poll_intervals(initial: float = POLL_INITIAL_SECONDS, maximum: float = POLL_MAX_SECONDS,
+                   backoff: float = POLL_BACKOFF):
+    """Yield successive sleep intervals: initial, initial*backoff, ... capped at maximum"""
+    interval = initial
+    while True:
+        yield min(interval, maximum)
+        interval = min(interval * backoff, maximum)
+
+
+def wait_for_data_automation(bda, invocation_arn: str, timeout: float = POLL_TIMEOUT_SECONDS,
+                             initial: float = POLL_INITIAL_SECONDS, maximum: float = POLL_MAX_SECONDS,
+                             backoff: float = POLL_BACKOFF, sleep=time.sleep, clock=time.monotonic,
+                             on_poll=None) -> dict:
+    """
+    Poll a Bedrock Data Automation job until it leaves the Created/InProgress states.
+
+    Args:
+        bda: bedrock-data-automation-runtime client (or a local stand-in)
+        invocation_arn: ARN returned by invoke_data_automation_async
+        timeout: Seconds to wait overall before giving up
+        initial: First polling interval in seconds
+        maximum: Cap on the polling interval in seconds
+        backoff: Multiplier applied to the interval after each poll
+        sleep: Sleep function, replaceable for deterministic local runs
+        clock: Monotonic clock function, replaceable for deterministic local runs
+        on_poll: Optional callback(status, elapsed_seconds) invoked after each status call
+
+    Returns:
+        The final get_data_automation_status response
+
+    Raises:
+        TimeoutError: If the job is still pending after the timeout
+    """
+    started = clock()
+    intervals = poll_intervals(initial, maximum, backoff)
+    while True:
+        status_resp = bda.get_data_automation_status(invocationArn=invocation_arn)
+        status = status_resp["status"]
+        elapsed = clock() - started
+
+        if on_poll is not None:
+            on_poll(status, elapsed)
+
+        if status not in PENDING_STATUSES:
+            return status_resp
+
+        if elapsed >= timeout:
+            raise TimeoutError(f"Data automation job {invocation_arn} still {status} after {int(elapsed)}s")
+
+        sleep(min(next(intervals), max(timeout - elapsed, 0)))
@@ -0,0 +1,75 @@
+import io
+import os
+
+# Large PDFs are cut into page ranges that Data Automation processes as
+# parallel jobs. Parts are written next to the upload under the session
+# prefix, so they can be passed to the extraction like any uploaded document.
+SPLIT_MIN_PAGES = int(os.environ.get('EXTRACT_SPLIT_MIN_PAGES', '50'))
+CHUNK_PAGES = int(os.environ.get('EXTRACT_CHUNK_PAGES', '25'))
+MAX_CHUNKS = int(os.environ.get('EXTRACT_MAX_CHUNKS', '10'))
+CHUNK_PREFIX = 'chunks'
+
+
+def page_ranges(page_count: int, chunk_pages: int = CHUNK_PAGES, max_chunks: int = MAX_CHUNKS) -> list:
+    """
+    Split page_count pages into (start, end) ranges, 0-based and end-exclusive.
+
+    The chunk size grows when needed so there are never more than max_chunks ranges.
+    """
+    if page_count <= 0:
+        return []
+    chunk_pages = max(chunk_pages, -(-page_count // max_chunks))
+    return [(start, min(start + chunk_pages, page_count)) for start in range(0, page_count, chunk_pages)]
+
+
+def chunk_key(document_key: str, start: int, end: int) -> str:
+    return f"{CHUNK_PREFIX}/{document_key}/pages-{start + 1:04d}-{end:04d}.pdf"
+
+
+def split_document(s3, bucket: str, session_id: str, document_key: str) -> list:
+    """
+    Split a large uploaded PDF into page-range parts.
+
+    Documents that are not PDFs, are below EXTRACT_SPLIT_MIN_PAGES pages, or
+    cannot be read are returned unsplit.
+
+    Returns:
+        Document keys (relative to the session prefix) to extract: either
+        [document_key] or one key per page range
+    """
+    if not document_key.lower().endswith('.pdf'):
+        return [document_key]
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        print("pypdf is not installed, extracting the document without splitting")
+        return [document_key]
+
+    try:
+        body = s3.get_object(Bucket=bucket, Key=f"{session_id}/{document_key}")['Body'].read()
+        reader = PdfReader(io.BytesIO(body))
+        page_count = len(reader.pages)
+    except Exception as e:
+        print(f"Unable to read {document_key} for splitting, extracting it whole: {e}")
+        return [document_key]
+
+    if page_count < SPLIT_MIN_PAGES:
+        return [document_key]
+
+    part_keys = []
+    for start, end in page_ranges(page_count):
+        writer = PdfWriter()
+        for page_number in range(start, end):
+            writer.add_page(reader.pages[page_number])
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        key = chunk_key(document_key, start, end)
+        s3.put_object(
+            Bucket=bucket,
+            Key=f"{session_id}/{key}",
+            Body=buffer.getvalue(),
+            ContentType='application/pdf'
+        )
+        part_keys.append(key)
+    print(f"Split {document_key} ({page_count} pages) into {len(part_keys)} parts")
+    return part_keys
@@ -2,270 +2,453 @@ import boto3
 import os
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal
+from tools.bda_polling import wait_for_data_automation
+from tools.document_splitter import split_document
+from tools.field_catalog import completion_state
+from tools.merge_assessment import merge_extraction, merge_segment_outputs
+from tools.assessment_store import assessment_key, update_assessment
+from tools.session_memory import record_assessment
+from tools.status_events import emit, poll_reporter
+from tools.extraction_cache import (blueprint_version, cache_enabled, document_content_hash,
+                                    get_cached_extraction, put_cached_extraction)
+
+DIMENSIONS = ['technical', 'business', 'commercial', 'governance']
+
+
+def _blueprint_arn(dimension: str):
+    """Return (blueprint ARN, env var name) for a dimension"""
+    blueprint_env_var = f'EXTRACT_BLUEPRINT_ARN_{dimension.upper()}'
+    return os.environ.get(blueprint_env_var), blueprint_env_var
+
+
+def _start_extraction(bda, region: str, account_id: str, bucket_name: str, session_id: str,
+                      document_key: str, dimension: str, blueprint_arn: str) -> str:
+    """Submit a Bedrock Data Automation job and return its invocation ARN"""
+    # Configure URIs
+    input_uri = f's3://{bucket_name}/{session_id}/{document_key}'
+    output_uri = f's3://{bucket_name}/{session_id}/extracted/{document_key}/{dimension}'
+    print(input_uri)
+    data_automation_profile_name = "us.data-automation-v1"
+    #change the profile based on region
+    if region[0:2] == "ap":
+        data_automation_profile_name = "apac.data-automation-v1"
+    # Invoke data automation
+    params = {
+        "inputConfiguration": {"s3Uri": input_uri},
+        "outputConfiguration": {"s3Uri": output_uri},
+        "blueprints" :[
+            {
+                'blueprintArn': blueprint_arn
+            },
+        ],
+        "dataAutomationProfileArn": f"arn:aws:bedrock:{region}:{account_id}:data-automation-profile/{data_automation_profile_name}"
+    }
+    # Optionally have BDA publish job completion to EventBridge for other consumers (e.g. the UI)
+    if os.environ.get('BDA_EVENTBRIDGE_NOTIFICATIONS', 'false').lower() == 'true':
+        params["notificationConfiguration"] = {"eventBridgeConfiguration": {"eventBridgeEnabled": True}}
+
+    response = bda.invoke_data_automation_async(**params)
+    return response["invocationArn"]
+
+
+def _wait_for_job(bda, invocation_arn: str, on_poll=None) -> dict:
+    """Block until a data automation job leaves the Created/InProgress states"""
+    return wait_for_data_automation(bda, invocation_arn, on_poll=on_poll)
+
+
+def _load_segment_outputs(s3, status_resp: dict) -> list:
+    """Read the custom output of every segment produced by a successful data automation job"""
+    # Get job metadata
+    metadata_uri = status_resp["outputConfiguration"]["s3Uri"]
+    metadata_bucket = metadata_uri.split("/")[2]
+    metadata_key = "/".join(metadata_uri.split("/")[3:])
+
+    metadata_obj = s3.get_object(Bucket=metadata_bucket, Key=metadata_key)
+    metadata = json.loads(metadata_obj["Body"].read())
+
+    outputs = []
+    for output_metadata in metadata.get("output_metadata", []):
+        for segment in output_metadata.get("segment_metadata", []):
+            # Segments that matched no blueprint have no custom output
+            custom_output_path = segment.get("custom_output_path")
+            if not custom_output_path:
+                continue
+            result_bucket = custom_output_path.split("/")[2]
+            result_key = "/".join(custom_output_path.split("/")[3:])
+            result_obj = s3.get_object(Bucket=result_bucket, Key=result_key)
+            outputs.append(json.loads(result_obj["Body"].read()))
+    return outputs
+
+
+def _split_for_extraction(s3, bucket_name: str, session_id: str, document_key: str) -> list:
+    """Split a large document into page-range parts, reporting the split on the status stream"""
+    part_keys = split_document(s3, bucket_name, session_id, document_key)
+    if len(part_keys) > 1:
+        emit(session_id, 'split', f"Split {document_key} into {len(part_keys)} parts for parallel extraction",
+             parts=len(part_keys))
+    return part_keys
+
+
+def _start_extractions(bda, region: str, account_id: str, bucket_name: str, session_id: str,
+                       part_keys: list, dimension: str, blueprint_arn: str) -> list:
+    """Submit one data automation job per document part and return their invocation ARNs"""
+    return [
+        _start_extraction(bda, region, account_id, bucket_name, session_id, part_key, dimension, blueprint_arn)
+        for part_key in part_keys
+    ]
+
+
+def _collect_extractions(bda, s3, session_id: str, dimension: str, invocation_arns: list, part_keys: list):
+    """
+    Wait for every part's job and merge all their segments by field confidence.
+
+    The jobs run concurrently in Data Automation, so waiting on them in turn
+    takes as long as the slowest one.
+
+    Returns:
+        (extracted_data, status_response, failed_parts): extracted_data is None if
+        every job failed; failed_parts lists the part keys whose job failed, so a
+        partial extraction can be reported and kept out of the extraction cache
+    """
+    outputs = []
+    failed = []
+    failed_parts = []
+    for part_key, invocation_arn in zip(part_keys, invocation_arns):
+        status_resp = _wait_for_job(bda, invocation_arn, poll_reporter(session_id, dimension))
+        if status_resp["status"] != "Success":
+            failed.append(status_resp)
+            failed_parts.append(part_key)
+            continue
+        outputs.extend(_load_segment_outputs(s3, status_resp))
+    if failed:
+        print(f"{len(failed)} of {len(invocation_arns)} {dimension} extraction jobs failed: {', '.join(failed_parts)}")
+    if not outputs:
+        return None, failed[0] if failed else {"status": "NoOutput"}, failed_parts
+    return merge_segment_outputs(outputs), None, failed_parts
+
+
+def _mark_partial(result: dict, failed_parts: list) -> dict:
+    """Report an extraction that is missing the pages of failed part jobs"""
+    result['status'] = 'partial'
+    result['missing_parts'] = failed_parts
+    result['summary'] += f" - incomplete, extraction failed for {', '.join(failed_parts)}"
+    return result
+
+
+def _store_extraction(s3, region: str, session_id: str, document_key: str, dimension: str,
+                      extracted_data: dict) -> dict:
+    """Merge, persist to S3 and DynamoDB, and summarise one dimension's extraction"""
+    session_bucket = os.environ['SESSION_BUCKET']
+    storage_key = assessment_key(session_id, dimension)
+    emit(session_id, 'merging', f"Merging {dimension} extraction into the assessment", dimension=dimension)
+
+    # Merge with any existing assessment data and store the result; the write is
+    # conditional on the ETag read, so a concurrent save triggers a re-merge
+    def apply_merge(existing_data):
+        if existing_data is None:
+            print(f"No existing data found for {dimension}, using new extraction as-is")
+        else:
+            print(f"Found existing data for {dimension}, performing field-level merge...")
+        # User input > high-confidence extraction > existing extraction; the LLM only
+        # sees free-text fields where neither side clearly wins
+        merged_data, stats = merge_extraction(existing_data, extracted_data, region)
+        print(f"Merged {dimension} extraction: {stats}")
+        # Only fields the new extraction covers can change completion
+        previous = (existing_data or {}).get('_metadata', {}).get('completion')
+        merged_data['_metadata']['completion'] = completion_state(
+            dimension, merged_data.get('inference_result', {}), previous,
+            extracted_data.get('inference_result', {}).keys()
+        )
+        return merged_data
+
+    extracted_data, _ = update_assessment(s3, session_bucket, session_id, dimension, apply_merge)
+
+    # Get explainability info for summary
+    explainability_info = extracted_data.get('explainability_info', [{}])[0]
+
+    # Field completeness against the dimension's blueprint fields
+    completion = extracted_data['_metadata']['completion']
+    total_fields = completion['total_fields']
+    filled_fields = completion['filled_fields']
+    empty_fields = total_fields - filled_fields
+    completion_percentage = completion['percentage']
+
+    # Calculate confidence metrics
+    confidence_values = []
+    for field_name, field_data in explainability_info.items():
+        if isinstance(field_data, dict) and 'confidence' in field_data:
+            confidence_values.append(field_data['confidence'])
+
+    min_confidence = min(confidence_values) if confidence_values else 0
+    avg_confidence = sum(confidence_values) / len(confidence_values) if confidence_values else 0
+
+    # Write to DynamoDB
+    table_name = os.environ['SESSION_MEMORY_TABLE']
+    dynamodb = boto3.resource('dynamodb', region_name=region)
+    table = dynamodb.Table(table_name)
+
+    timestamp = int(time.time())
+
+    # Document extraction record
+    extraction_record = {
+        'document_key': document_key,
+        'dimension': dimension,
+        'total_fields': total_fields,
+        'filled_fields': filled_fields,
+        'empty_fields': empty_fields,
+        'min_confidence': Decimal(str(round(min_confidence, 4))),
+        'avg_confidence': Decimal(str(round(avg_confidence, 4))),
+        'storage_location': f's3://{session_bucket}/{storage_key}',
+        'extraction_timestamp': timestamp
+    }
+
+    # Save the timestamped extraction record and the latest extraction state together
+    record_assessment(
+        session_id,
+        dimension,
+        snapshot={
+            'document_key': document_key,
+            'extraction_data': extraction_record,
+            'record_type': 'extraction'
+        },
+        latest={
+            'document_key': document_key,
+            'extraction_data': extraction_record,
+            'completion_percentage': completion_percentage,
+            'record_type': 'extraction'
+        },
+        table=table
+    )
+
+    emit(session_id, 'saved', f"Saved {dimension} extraction ({filled_fields}/{total_fields} fields filled)",
+         dimension=dimension, completion_percentage=completion_percentage)
+
+    return {
+        'status': 'success',
+        'summary': f'Extracted {total_fields} fields from document ({filled_fields} filled, {empty_fields} empty)',
+        'storage_location': f's3://{session_bucket}/{storage_key}',
+        'total_fields': total_fields,
+        'filled_fields': filled_fields,
+        'empty_fields': empty_fields,
+        'min_confidence': round(min_confidence, 4),
+        'avg_confidence': round(avg_confidence, 4),
+        'document_key': document_key,
+        'session_id': session_id
+    }
 
 
 def extract_document_content(document_key: str, session_id: str, dimension: str) -> dict:
     """
     Extract and analyze content from uploaded documents using Bedrock Data Automation.
-    
+
     Args:
         document_key: S3 key of the uploaded document
         session_id: Unique session identifier
         dimension: Assessment dimension (technical, business, commercial, governance)
-        
+
     Returns:
         Extracted structured data based on blueprint schema
     """
     try:
         bucket_name = os.environ['DOCUMENT_BUCKET']
         region = os.environ.get('AWS_REGION', 'ap-southeast-2')
-        
+
         # Get blueprint ARN based on dimension
-        blueprint_env_var = f'EXTRACT_BLUEPRINT_ARN_{dimension.upper()}'
-        blueprint_arn = os.environ.get(blueprint_env_var)
-        
+        blueprint_arn, blueprint_env_var = _blueprint_arn(dimension)
+
         if not blueprint_arn:
             return {
                 'error': f"Blueprint ARN not found for dimension '{dimension}'. Set environment variable '{blueprint_env_var}'",
                 'document_key': document_key,
                 'dimension': dimension
             }
-        
+
         # Initialize clients
         bda = boto3.client('bedrock-data-automation-runtime', region_name=region)
         s3 = boto3.client('s3', region_name=region)
         sts = boto3.client('sts')
-        
+
+        # Reuse a previous extraction of the same document with the same blueprint
+        content_hash = None
+        if cache_enabled():
+            content_hash = document_content_hash(s3, bucket_name, f"{session_id}/{document_key}")
+            extracted_data = get_cached_extraction(s3, content_hash, blueprint_arn, blueprint_version(dimension))
+            if extracted_data is not None:
+                emit(session_id, 'cache_hit', f"Reusing earlier {dimension} extraction of this document",
+                     dimension=dimension)
+                result = _store_extraction(s3, region, session_id, document_key, dimension, extracted_data)
+                result['cache_hit'] = True
+                return result
+
         # Get account ID
         account_id = sts.get_caller_identity()["Account"]
-        
-        # Configure URIs
-        input_uri = f's3://{bucket_name}/{session_id}/{document_key}'
-        output_uri = f's3://{bucket_name}/{session_id}/extracted/{document_key}'
-        print(input_uri)
-        data_automation_profile_name = "us.data-automation-v1"
-        #change the profile based on region
-        if region[0:2] == "ap":
-            data_automation_profile_name = "apac.data-automation-v1"
-        # Invoke data automation
-        params = {
-            "inputConfiguration": {"s3Uri": input_uri},
-            "outputConfiguration": {"s3Uri": output_uri},
-            "blueprints" :[
-                {
-                    'blueprintArn': blueprint_arn
-                },
-            ],
-            "dataAutomationProfileArn": f"arn:aws:bedrock:{region}:{account_id}:data-automation-profile/{data_automation_profile_name}"
-        }
-        
-        response = bda.invoke_data_automation_async(**params)
-        invocation_arn = response["invocationArn"]
-        
+
+        # Large documents are extracted as parallel page-range jobs
+        part_keys = _split_for_extraction(s3, bucket_name, session_id, document_key)
+        invocation_arns = _start_extractions(bda, region, account_id, bucket_name, session_id,
+                                             part_keys, dimension, blueprint_arn)
+        emit(session_id, 'submitted', f"Submitted {dimension} extraction of {document_key}",
+             dimension=dimension, parts=len(part_keys))
+
         # Wait for completion
-        while True:
-            status_resp = bda.get_data_automation_status(invocationArn=invocation_arn)
+        extracted_data, status_resp, failed_parts = _collect_extractions(bda, s3, session_id, dimension,
+                                                                         invocation_arns, part_keys)
+
+        if extracted_data is None:
             status = status_resp["status"]
-            
-            if status not in ["Created", "InProgress"]:
-                break
-                
-            time.sleep(10)
-        
-        if status != "Success":
+            emit(session_id, 'failed', f"{dimension} extraction failed with status {status}", dimension=dimension)
             return {
                 'error': f"Data automation job failed with status: {status}",
                 'status_response': status_resp
             }
-        
-        # Get job metadata
-        metadata_uri = status_resp["outputConfiguration"]["s3Uri"]
-        metadata_bucket = metadata_uri.split("/")[2]
-        metadata_key = "/".join(metadata_uri.split("/")[3:])
-        
-        metadata_obj = s3.get_object(Bucket=metadata_bucket, Key=metadata_key)
-        metadata = json.loads(metadata_obj["Body"].read())
-        
-        # Extract custom output path
-        custom_output_path = metadata["output_metadata"][0]["segment_metadata"][0]["custom_output_path"]
-        
-        # Get the actual extracted data
-        result_bucket = custom_output_path.split("/")[2]
-        result_key = "/".join(custom_output_path.split("/")[3:])
-        
-        result_obj = s3.get_object(Bucket=result_bucket, Key=result_key)
-        extracted_data = json.loads(result_obj["Body"].read())
-        
-        # Check if existing assessment data exists and merge intelligently
-        session_bucket = os.environ['SESSION_BUCKET']
-        storage_key = f"{session_id}/assessment/{dimension}/output.json"
-        
-        existing_data = None
-        try:
-            existing_response = s3.get_object(Bucket=session_bucket, Key=storage_key)
-            existing_data = json.loads(existing_response['Body'].read())
-            print(f"Found existing data for {dimension}, performing intelligent merge...")
-        except s3.exceptions.NoSuchKey:
-            print(f"No existing data found for {dimension}, using new extraction as-is")
-        
-        # If existing data found, use Claude Sonnet for intelligent merging
-        if existing_data:
-            bedrock = boto3.client('bedrock-runtime', region_name=region)
-            
-            existing_inference = existing_data.get('inference_result', {})
-            new_inference = extracted_data.get('inference_result', {})
-            
-            merge_prompt = f"""You are a data merging expert. Intelligently merge new document extraction with existing assessment data.
-
-EXISTING ASSESSMENT DATA:
-{json.dumps(existing_inference, indent=2)}
-
-NEW DOCUMENT EXTRACTION:
-{json.dumps(new_inference, indent=2)}
-
-MERGE RULES:
-1. PRESERVE user-provided responses (any field with "Unknown - confirmed by user" or clearly user-entered data)
-2. UPDATE fields where new extraction provides better/more complete information
-3. FILL empty or missing fields with new extraction data
-4. KEEP existing data if new extraction is empty or low quality
-5. For conflicts, prefer user data > high-confidence extraction > existing extraction
-
-Return ONLY a JSON object with the merged inference_result:
-{{
-    "field_name": "merged_value",
-    "another_field": "merged_value"
-}}
-
-Focus on preserving user effort while improving data completeness."""
 
-            try:
-                merge_response = bedrock.invoke_model(
-                    modelId='amazon.nova-pro-v1:0',
-                    body=json.dumps({
-                        'messages': [
-                            {
-                                'role': 'user',
-                                'content': merge_prompt
-                            }
-                        ]
-                    })
-                )
-                
-                merge_response_body = json.loads(merge_response['body'].read())
-                merged_inference_text = merge_response_body['content'][0]['text']
-                
-                # Extract JSON from response
-                import re
-                json_match = re.search(r'\{.*\}', merged_inference_text, re.DOTALL)
-                if json_match:
-                    merged_inference = json.loads(json_match.group())
-                    extracted_data['inference_result'] = merged_inference
-                    print("Successfully merged existing and new data using Claude Sonnet")
-                else:
-                    print("Could not parse merge result, using new extraction")
-                    
-            except Exception as e:
-                print(f"Error during intelligent merge: {e}, using new extraction")
-        
-        # Store full extracted data in S3
-        s3.put_object(
-            Bucket=session_bucket,
-            Key=storage_key,
-            Body=json.dumps(extracted_data),
-            ContentType='application/json'
-        )
-        
-        # Get explainability info for summary
-        explainability_info = extracted_data.get('explainability_info', [{}])[0]
-        
-        # Analyze inference_result for field completeness
-        inference_result = extracted_data.get('inference_result', {})
-        total_fields = len(inference_result)
-        empty_fields = sum(1 for value in inference_result.values() if not value or (isinstance(value, str) and value.strip() == ""))
-        filled_fields = total_fields - empty_fields
-        
-        # Calculate completion percentage based on filled fields
-        if total_fields == 0:
-            completion_percentage = 0
-        else:
-            completion_percentage = int((filled_fields / total_fields) * 100)
-        
-        # Calculate confidence metrics
-        confidence_values = []
-        for field_name, field_data in explainability_info.items():
-            if isinstance(field_data, dict) and 'confidence' in field_data:
-                confidence_values.append(field_data['confidence'])
-        
-        min_confidence = min(confidence_values) if confidence_values else 0
-        avg_confidence = sum(confidence_values) / len(confidence_values) if confidence_values else 0
-        
-        # Write to DynamoDB
-        table_name = os.environ['SESSION_MEMORY_TABLE']
-        dynamodb = boto3.resource('dynamodb', region_name=region)
-        table = dynamodb.Table(table_name)
-        
-        timestamp = int(time.time())
-        
-        # Document extraction record
-        extraction_record = {
+        # A partial extraction must not be reused for later uploads of the document
+        if content_hash is not None and not failed_parts:
+            put_cached_extraction(s3, content_hash, blueprint_arn, blueprint_version(dimension), extracted_data)
+        result = _store_extraction(s3, region, session_id, document_key, dimension, extracted_data)
+        result['cache_hit'] = False
+        if failed_parts:
+            _mark_partial(result, failed_parts)
+        return result
+
+    except Exception as e:
+        return {
+            'error': f"Error extracting document: {str(e)}",
             'document_key': document_key,
-            'dimension': dimension,
-            'total_fields': total_fields,
-            'filled_fields': filled_fields,
-            'empty_fields': empty_fields,
-            'min_confidence': Decimal(str(round(min_confidence, 4))),
-            'avg_confidence': Decimal(str(round(avg_confidence, 4))),
-            'storage_location': f's3://{session_bucket}/{storage_key}',
-            'extraction_timestamp': timestamp
+            'dimension': dimension
         }
-        
-        # Save timestamped extraction record
-        table.put_item(
-            Item={
-                'p_key': session_id,
-                's_key': f'assessment:{dimension}:{timestamp}',
-                'dimension': dimension,
-                'document_key': document_key,
-                'extraction_data': extraction_record,
-                'timestamp': timestamp,
-                'record_type': 'extraction',
-                'ttl': timestamp + (90 * 24 * 60 * 60)  # 90 days TTL
-            }
-        )
-        
-        # Save/update latest extraction state
-        table.put_item(
-            Item={
-                'p_key': session_id,
-                's_key': f'assessment:{dimension}:latest',
-                'dimension': dimension,
-                'document_key': document_key,
-                'extraction_data': extraction_record,
-                'timestamp': timestamp,
-                'last_updated': timestamp,
-                'completion_percentage': completion_percentage,
-                'record_type': 'extraction',
-                'ttl': timestamp + (90 * 24 * 60 * 60)  # 90 days TTL
-            }
-        )
-        
+
+
+def extract_all_dimensions(document_key: str, session_id: str, dimensions: list = None) -> dict:
+    """
+    Extract every assessment dimension from one document with concurrent Data Automation jobs.
+
+    All blueprint jobs are submitted up front, then each result is merged and stored
+    as soon as its job finishes, so the wall time is that of the slowest job rather
+    than the sum of all of them.
+
+    Args:
+        document_key: S3 key of the uploaded document
+        session_id: Unique session identifier
+        dimensions: Dimensions to extract (defaults to all four)
+
+    Returns:
+        Per-dimension extraction summaries, keyed by dimension
+    """
+    dimensions = dimensions or DIMENSIONS
+    results = {}
+    try:
+        bucket_name = os.environ['DOCUMENT_BUCKET']
+        region = os.environ.get('AWS_REGION', 'ap-southeast-2')
+
+        # Initialize clients
+        bda = boto3.client('bedrock-data-automation-runtime', region_name=region)
+        s3 = boto3.client('s3', region_name=region)
+        sts = boto3.client('sts')
+
+        # Get account ID
+        account_id = sts.get_caller_identity()["Account"]
+
+        content_hash = None
+        if cache_enabled():
+            content_hash = document_content_hash(s3, bucket_name, f"{session_id}/{document_key}")
+
+        # Submit every job before waiting on any of them
+        part_keys = None
+        invocations = {}
+        blueprints = {}
+        cache_hits = {}
+        for dimension in dimensions:
+            blueprint_arn, blueprint_env_var = _blueprint_arn(dimension)
+            if not blueprint_arn:
+                results[dimension] = {
+                    'error': f"Blueprint ARN not found for dimension '{dimension}'. Set environment variable '{blueprint_env_var}'",
+                    'dimension': dimension
+                }
+                continue
+            blueprints[dimension] = blueprint_arn
+            try:
+                if content_hash is not None:
+                    cached = get_cached_extraction(s3, content_hash, blueprint_arn, blueprint_version(dimension))
+                    if cached is not None:
+                        cache_hits[dimension] = cached
+                        emit(session_id, 'cache_hit', f"Reusing earlier {dimension} extraction of this document",
+                             dimension=dimension)
+                        continue
+                if part_keys is None:
+                    # Large documents are extracted as parallel page-range jobs
+                    part_keys = _split_for_extraction(s3, bucket_name, session_id, document_key)
+                invocations[dimension] = _start_extractions(bda, region, account_id, bucket_name, session_id,
+                                                            part_keys, dimension, blueprint_arn)
+                print(f"Submitted {dimension} extraction: {invocations[dimension]}")
+                emit(session_id, 'submitted', f"Submitted {dimension} extraction of {document_key}",
+                     dimension=dimension, parts=len(part_keys))
+            except Exception as e:
+                results[dimension] = {'error': f"Error starting extraction: {str(e)}", 'dimension': dimension}
+
+        def store_cached(dimension: str, extracted_data: dict) -> dict:
+            result = _store_extraction(s3, region, session_id, document_key, dimension, extracted_data)
+            result['cache_hit'] = True
+            return result
+
+        def collect(dimension: str, invocation_arns: list) -> dict:
+            extracted_data, status_resp, failed_parts = _collect_extractions(bda, s3, session_id, dimension,
+                                                                             invocation_arns, part_keys)
+            if extracted_data is None:
+                status = status_resp["status"]
+                emit(session_id, 'failed', f"{dimension} extraction failed with status {status}", dimension=dimension)
+                return {
+                    'error': f"Data automation job failed with status: {status}",
+                    'dimension': dimension
+                }
+            # A partial extraction must not be reused for later uploads of the document
+            if content_hash is not None and not failed_parts:
+                put_cached_extraction(s3, content_hash, blueprints[dimension], blueprint_version(dimension), extracted_data)
+            result = _store_extraction(s3, region, session_id, document_key, dimension, extracted_data)
+            result['cache_hit'] = False
+            if failed_parts:
+                _mark_partial(result, failed_parts)
+            return result
+
+        if invocations or cache_hits:
+            with ThreadPoolExecutor(max_workers=len(invocations) + len(cache_hits)) as executor:
+                futures = {
+                    executor.submit(collect, dimension, invocation_arns): dimension
+                    for dimension, invocation_arns in invocations.items()
+                }
+                for dimension, cached in cache_hits.items():
+                    futures[executor.submit(store_cached, dimension, cached)] = dimension
+                for future in as_completed(futures):
+                    dimension = futures[future]
+                    try:
+                        results[dimension] = future.result()
+                    except Exception as e:
+                        results[dimension] = {'error': f"Error extracting document: {str(e)}", 'dimension': dimension}
+                    print(f"Finished {dimension} extraction")
+
+        # A dimension with failed page ranges is still extracted, just incomplete
+        succeeded = [dim for dim, result in results.items() if result.get('status') in ('success', 'partial')]
+        missing_parts = {dim: result['missing_parts'] for dim, result in results.items()
+                         if result.get('status') == 'partial'}
+        summary = f"Extracted {len(succeeded)} of {len(dimensions)} dimensions from document"
+        if missing_parts:
+            summary += "; incomplete: " + '; '.join(f"{dim} (failed {', '.join(parts)})"
+                                                    for dim, parts in missing_parts.items())
+        complete = len(succeeded) == len(dimensions) and not missing_parts
         return {
-            'status': 'success',
-            'summary': f'Extracted {total_fields} fields from document ({filled_fields} filled, {empty_fields} empty)',
-            'storage_location': f's3://{session_bucket}/{storage_key}',
-            'total_fields': total_fields,
-            'filled_fields': filled_fields,
-            'empty_fields': empty_fields,
-            'min_confidence': round(min_confidence, 4),
-            'avg_confidence': round(avg_confidence, 4),
+            'status': 'success' if complete else ('partial' if succeeded else 'error'),
+            'summary': summary,
+            'missing_parts': missing_parts,
+            'results': results,
             'document_key': document_key,
             'session_id': session_id
         }
-        
+
     except Exception as e:
         return {
             'error': f"Error extracting document: {str(e)}",
-            'document_key': document_key,
-            'dimension': dimension
+            'results': results,
+            'document_key': document_key
         }
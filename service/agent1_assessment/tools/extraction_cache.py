@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+
+from botocore.exceptions import ClientError
+
+# Extraction results are keyed by what actually determines them: the document
+# bytes, the blueprint and the blueprint version. The cache lives outside any
+# session prefix so a document processed in one session is reused in the next.
+CACHE_PREFIX = 'extraction-cache'
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+def cache_enabled() -> bool:
+    return os.environ.get('EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def cache_bucket() -> str:
+    return os.environ.get('EXTRACTION_CACHE_BUCKET') or os.environ['SESSION_BUCKET']
+
+
+def blueprint_version(dimension: str) -> str:
+    """Blueprint version for a dimension; bump EXTRACT_BLUEPRINT_VERSION_<DIMENSION> when the blueprint changes"""
+    return os.environ.get(f'EXTRACT_BLUEPRINT_VERSION_{dimension.upper()}', '1')
+
+
+def document_content_hash(s3, bucket: str, key: str) -> str:
+    """
+    SHA-256 of an S3 object's content.
+
+    Uses the full-object checksum S3 already stores when one is available,
+    otherwise streams the object through hashlib.
+    """
+    try:
+        head = s3.head_object(Bucket=bucket, Key=key, ChecksumMode='ENABLED')
+        if head.get('ChecksumSHA256') and head.get('ChecksumType', 'FULL_OBJECT') == 'FULL_OBJECT':
+            return 'sha256b64-' + head['ChecksumSHA256'].replace('/', '_').replace('+', '-').rstrip('=')
+    except ClientError as e:
+        print(f"Unable to read stored checksum for {key}: {e}")
+
+    digest = hashlib.sha256()
+    body = s3.get_object(Bucket=bucket, Key=key)['Body']
+    for chunk in iter(lambda: body.read(READ_CHUNK_BYTES), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_key(content_hash: str, blueprint_arn: str, version: str) -> str:
+    blueprint_id = hashlib.sha256(blueprint_arn.encode('utf-8')).hexdigest()[:16]
+    return f"{CACHE_PREFIX}/{content_hash}/{blueprint_id}-v{version}.json"
+
+
+def get_cached_extraction(s3, content_hash: str, blueprint_arn: str, version: str):
+    """Return the cached custom_output JSON for this document and blueprint, or None"""
+    key = _cache_key(content_hash, blueprint_arn, version)
+    try:
+        response = s3.get_object(Bucket=cache_bucket(), Key=key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None
+        raise
+    print(f"Extraction cache hit: {key}")
+    return json.loads(response['Body'].read())
+
+
+def put_cached_extraction(s3, content_hash: str, blueprint_arn: str, version: str, extracted_data: dict):
+    """Store a raw (pre-merge) custom_output JSON for later reuse"""
+    key = _cache_key(content_hash, blueprint_arn, version)
+    try:
+        s3.put_object(
+            Bucket=cache_bucket(),
+            Key=key,
+            Body=json.dumps(extracted_data, separators=(',', ':')),
+            ContentType='application/json'
+        )
+    except ClientError as e:
+        # A failed cache write only costs a future BDA run
+        print(f"Unable to write extraction cache {key}: {e}")
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import sys
+
+# Completion is measured against the fields the BDA blueprint defines, not the
+# keys currently present in output.json, so extra free-form keys saved by the
+# agent neither dilute nor inflate the percentage. Each assessment file keeps a
+# bitset of its filled catalog fields in _metadata.completion, and a save only
+# re-checks the fields it changed. The catalog is precomputed from
+# service/common_infrastructure/bda-blueprints; regenerate it after a blueprint
+# changes with: python -m tools.field_catalog
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), 'field_catalog.json')
+
+
+def _strip_wrapped_lines(raw: str) -> str:
+    """Drop line breaks inside JSON string literals (the exported blueprints are hard-wrapped)"""
+    out = []
+    in_string = False
+    escaped = False
+    for ch in raw:
+        if in_string and ch in '\r\n':
+            continue
+        out.append(ch)
+        if escaped:
+            escaped = False
+        elif ch == '\\' and in_string:
+            escaped = True
+        elif ch == '"':
+            in_string = not in_string
+    return ''.join(out)
+
+
+def build_catalog(blueprint_dir: str) -> dict:
+    """
+    Build the catalog from exported blueprints named <dimension>.json.
+
+    Returns:
+        {dimension: {'blueprint', 'version', 'fields': [{'name', 'type'}, ...]}}
+    """
+    catalog = {}
+    for file_name in sorted(os.listdir(blueprint_dir)):
+        if not file_name.endswith('.json'):
+            continue
+        with open(os.path.join(blueprint_dir, file_name)) as f:
+            blueprint = json.loads(_strip_wrapped_lines(f.read()))['blueprint']
+        schema = json.loads(blueprint['schema'])
+        fields = [{'name': name, 'type': spec.get('type', 'string')}
+                  for name, spec in schema.get('properties', {}).items()]
+        version = hashlib.sha256(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        catalog[file_name[:-len('.json')]] = {
+            'blueprint': blueprint.get('blueprintName'),
+            'version': version,
+            'fields': fields
+        }
+    return catalog
+
+
+def _load_catalog() -> dict:
+    try:
+        with open(CATALOG_PATH) as f:
+            catalog = json.load(f)
+    except FileNotFoundError:
+        print(f"No field catalog at {CATALOG_PATH}, completion is measured on the fields present")
+        return {}
+    for entry in catalog.values():
+        entry['index'] = {field['name']: i for i, field in enumerate(entry['fields'])}
+    return catalog
+
+
+FIELD_CATALOG = _load_catalog()
+
+
+def is_filled(value, field_type: str = 'string') -> bool:
+    if field_type == 'boolean':
+        return isinstance(value, bool)
+    return bool(value) and (not isinstance(value, str) or bool(value.strip()))
+
+
+def completion_state(dimension: str, inference_result: dict, previous: dict = None, changed=None) -> dict:
+    """
+    Completion of a dimension's assessment.
+
+    With a catalog for the dimension, the previous bitset is updated for the
+    changed fields only; it is rebuilt when there is no usable previous state
+    (first save, catalog regenerated) or changed is None. Dimensions without a
+    catalog fall back to counting the fields present.
+
+    Args:
+        inference_result: The dimension's merged inference_result
+        previous: The file's _metadata.completion before this change, if any
+        changed: Field names whose values may have changed
+
+    Returns:
+        {'catalog', 'filled', 'filled_fields', 'total_fields', 'percentage'}; store
+        it as _metadata.completion and pass it back as previous on the next change
+    """
+    entry = FIELD_CATALOG.get(dimension)
+    if entry is None:
+        total = len(inference_result)
+        filled_count = sum(1 for value in inference_result.values() if is_filled(value))
+        return {
+            'catalog': None,
+            'filled_fields': filled_count,
+            'total_fields': total,
+            'percentage': int(filled_count * 100 / total) if total else 0
+        }
+
+    fields = entry['fields']
+    if previous and previous.get('catalog') == entry['version'] and changed is not None:
+        filled = int(previous['filled'], 16)
+        positions = (entry['index'][name] for name in changed if name in entry['index'])
+    else:
+        filled = 0
+        positions = range(len(fields))
+    for i in positions:
+        if is_filled(inference_result.get(fields[i]['name']), fields[i]['type']):
+            filled |= 1 << i
+        else:
+            filled &= ~(1 << i)
+
+    filled_count = bin(filled).count('1')
+    return {
+        'catalog': entry['version'],
+        'filled': format(filled, 'x'),
+        'filled_fields': filled_count,
+        'total_fields': len(fields),
+        'percentage': int(filled_count * 100 / len(fields)) if fields else 0
+    }
+
+
+if __name__ == "__main__":
+    blueprint_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(__file__), '..', '..', 'common_infrastructure', 'bda-blueprints')
+    catalog = build_catalog(blueprint_dir)
+    with open(CATALOG_PATH, 'w') as f:
+        json.dump(catalog, f, indent=2)
+        f.write('\n')
+    print(f"Wrote {CATALOG_PATH}: " + ', '.join(f"{dim} ({len(entry['fields'])} fields)"
+                                                for dim, entry in catalog.items()))
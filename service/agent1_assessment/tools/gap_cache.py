@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import time
+
+import boto3
+
+# Gap analyses are cached in the session table next to the assessment records.
+# The key covers everything that determines the analysis: the extracted fields,
+# their explainability info, the guidelines and the model configuration. Per-field
+# hashes are kept so a changed extraction can be re-analysed incrementally.
+CACHE_TTL_SECONDS = 90 * 24 * 60 * 60  # Same retention as the assessment records
+
+
+def cache_enabled() -> bool:
+    return os.environ.get('GAP_ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def _digest(value) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def context_hash(guidelines: str, model_config: dict) -> str:
+    """Hash of the inputs that are shared by every field: guidelines and model settings"""
+    return _digest({'guidelines': guidelines, 'model': model_config})
+
+
+def field_hashes(inference_result: dict, explainability_info: dict, field_sources: dict = None) -> dict:
+    """Hash of each field's value, explainability entry and source"""
+    field_sources = field_sources or {}
+    return {
+        field_name: _digest([
+            value,
+            explainability_info.get(field_name),
+            field_sources.get(field_name, {}).get('source')
+        ])
+        for field_name, value in inference_result.items()
+    }
+
+
+def analysis_key(context: str, hashes: dict) -> str:
+    return _digest({'context': context, 'fields': hashes})
+
+
+def changed_fields(previous_hashes: dict, hashes: dict) -> list:
+    """Fields that were added or changed since the cached analysis (removed fields are not listed)"""
+    return sorted(name for name, digest in hashes.items() if previous_hashes.get(name) != digest)
+
+
+def _table(table=None):
+    if table is not None:
+        return table
+    region = os.environ.get('AWS_REGION', 'ap-southeast-2')
+    return boto3.resource('dynamodb', region_name=region).Table(os.environ['SESSION_MEMORY_TABLE'])
+
+
+def _cache_key(session_id: str, dimension: str) -> dict:
+    return {'p_key': session_id, 's_key': f'gap_analysis_cache:{dimension}'}
+
+
+def get_cached_analysis(session_id: str, dimension: str, table=None):
+    """
+    Return the cached gap analysis record for a dimension, or None.
+
+    The record holds 'analysis_key', 'context_hash', 'field_hashes', 'analysis' and
+    'questions' ({field_name: [question, ...]} for the gap fields).
+    """
+    response = _table(table).get_item(Key=_cache_key(session_id, dimension))
+    return response.get('Item')
+
+
+def put_cached_analysis(session_id: str, dimension: str, key: str, context: str, hashes: dict,
+                        analysis: str, questions: dict = None, table=None):
+    timestamp = int(time.time())
+    try:
+        _table(table).put_item(Item={
+            **_cache_key(session_id, dimension),
+            'analysis_key': key,
+            'context_hash': context,
+            'field_hashes': hashes,
+            'analysis': analysis,
+            'questions': questions or {},
+            'record_type': 'gap_analysis_cache',
+            'last_updated': timestamp,
+            'ttl': timestamp + CACHE_TTL_SECONDS
+        })
+    except Exception as e:
+        # A failed cache write only costs a future model call
+        print(f"Unable to cache gap analysis for {dimension}: {e}")
@@ -0,0 +1,117 @@
+import os
+
+from tools.merge_assessment import field_confidence, is_empty
+
+# Deterministic part of the gap analysis. Every field the blueprint returned
+# (inference_result and explainability_info keys) is classified locally; the LLM
+# is only asked to phrase follow-up questions for the fields that have a gap.
+LOW_CONFIDENCE_THRESHOLD = float(os.environ.get('GAP_LOW_CONFIDENCE_THRESHOLD', '0.7'))
+PLACEHOLDER_VALUES = {'n/a', 'na', 'none', 'unknown', 'tbd', 'tbc', '-', '?', 'not specified',
+                      'not mentioned', 'not provided', 'not available', 'not applicable'}
+
+MISSING = 'missing'
+LOW_CONFIDENCE = 'low_confidence'
+INCOMPLETE = 'incomplete'
+
+# Priority of the follow-up questions for each kind of gap
+GAP_PRIORITY = {
+    MISSING: 'high_priority',
+    LOW_CONFIDENCE: 'medium_priority',
+    INCOMPLETE: 'low_priority'
+}
+
+
+def _is_placeholder(value) -> bool:
+    return isinstance(value, str) and value.strip().lower().rstrip('.') in PLACEHOLDER_VALUES
+
+
+def _is_incomplete(value) -> bool:
+    """Filled, but only with placeholders or with some members left empty"""
+    if _is_placeholder(value):
+        return True
+    if isinstance(value, dict):
+        members = list(value.values())
+    elif isinstance(value, list):
+        members = value
+    else:
+        return False
+    return any(is_empty(member) or _is_placeholder(member) for member in members)
+
+
+def classify_fields(inference_result: dict, explainability_info: dict, field_sources: dict = None) -> dict:
+    """
+    Classify every field of an extraction.
+
+    Fields the user provided are never flagged as low confidence or incomplete.
+
+    Returns:
+        {field_name: MISSING | LOW_CONFIDENCE | INCOMPLETE | None}
+    """
+    field_sources = field_sources or {}
+    fields = list(inference_result) + [name for name in explainability_info if name not in inference_result]
+    classification = {}
+    for field_name in fields:
+        value = inference_result.get(field_name)
+        is_user = str(field_sources.get(field_name, {}).get('source', '')).startswith('user_input')
+        confidence = field_confidence(explainability_info, field_name)
+
+        if is_empty(value):
+            classification[field_name] = MISSING
+        elif is_user:
+            classification[field_name] = None
+        elif confidence is not None and confidence < LOW_CONFIDENCE_THRESHOLD:
+            classification[field_name] = LOW_CONFIDENCE
+        elif _is_incomplete(value):
+            classification[field_name] = INCOMPLETE
+        else:
+            classification[field_name] = None
+    return classification
+
+
+def gap_fields(classification: dict) -> list:
+    """Fields with a gap, most important first"""
+    order = [MISSING, LOW_CONFIDENCE, INCOMPLETE]
+    flagged = [name for name, gap in classification.items() if gap]
+    return sorted(flagged, key=lambda name: order.index(classification[name]))
+
+
+def completeness_percentage(classification: dict) -> int:
+    if not classification:
+        return 0
+    complete = sum(1 for gap in classification.values() if gap is None)
+    return int(round(complete * 100 / len(classification)))
+
+
+def build_analysis(dimension: str, classification: dict, questions: dict) -> dict:
+    """
+    Assemble the gap analysis in the structure the agent expects.
+
+    Args:
+        classification: Result of classify_fields
+        questions: {field_name: [question, ...]} for the fields with a gap
+    """
+    by_kind = {kind: [name for name, gap in classification.items() if gap == kind] for kind in GAP_PRIORITY}
+    follow_up = {priority: [] for priority in ('high_priority', 'medium_priority', 'low_priority')}
+    for field_name in gap_fields(classification):
+        follow_up[GAP_PRIORITY[classification[field_name]]].extend(questions.get(field_name, []))
+
+    percentage = completeness_percentage(classification)
+    if not classification:
+        readiness = f"No extracted data for the {dimension} assessment yet; gather it through conversation."
+    elif not any(by_kind.values()):
+        readiness = f"All {len(classification)} {dimension} fields are filled with sufficient confidence."
+    else:
+        readiness = (
+            f"{percentage}% of {dimension} fields are complete: {len(by_kind[MISSING])} missing, "
+            f"{len(by_kind[LOW_CONFIDENCE])} below {LOW_CONFIDENCE_THRESHOLD} confidence, "
+            f"{len(by_kind[INCOMPLETE])} incomplete. Ask the high priority questions first."
+        )
+
+    return {
+        'critical_missing': by_kind[MISSING],
+        'low_confidence_fields': by_kind[LOW_CONFIDENCE],
+        'incomplete_responses': by_kind[INCOMPLETE],
+        'follow_up_questions': follow_up,
+        'completeness_percentage': percentage,
+        'readiness_assessment': readiness
+    }
@@ -1,6 +1,7 @@
 import boto3
 import json
 import os
+from tools.assessment_store import read_assessment_cached
 
 
 def get_assessment_data(session_id: str, dimension: str) -> str:
@@ -20,13 +21,10 @@ def get_assessment_data(session_id: str, dimension: str) -> str:
         
         s3 = boto3.client('s3', region_name=region)
         
-        # Load assessment file from S3
-        s3_key = f"{session_id}/assessment/{dimension}/output.json"
+        # Load assessment file from S3, reusing this session's cached copy
+        assessment_data, _ = read_assessment_cached(s3, session_bucket, session_id, dimension)
         
-        try:
-            response = s3.get_object(Bucket=session_bucket, Key=s3_key)
-            assessment_data = json.loads(response['Body'].read())
-            
+        if assessment_data is not None:
             # Return structured data for agent analysis
             return json.dumps({
                 'session_id': session_id,
@@ -37,17 +35,16 @@ def get_assessment_data(session_id: str, dimension: str) -> str:
                 'field_count': len(assessment_data.get('inference_result', {})),
                 'last_updated': assessment_data.get('_metadata', {}).get('last_updated', 'unknown')
             }, indent=2, default=str)
-            
-        except s3.exceptions.NoSuchKey:
-            return json.dumps({
-                'session_id': session_id,
-                'dimension': dimension,
-                'status': 'not_found',
-                'message': f'No assessment data found for {dimension} dimension',
-                'inference_result': {},
-                'metadata': {},
-                'field_count': 0
-            }, indent=2)
+
+        return json.dumps({
+            'session_id': session_id,
+            'dimension': dimension,
+            'status': 'not_found',
+            'message': f'No assessment data found for {dimension} dimension',
+            'inference_result': {},
+            'metadata': {},
+            'field_count': 0
+        }, indent=2)
         
     except Exception as e:
         return json.dumps({
@@ -1,47 +1,126 @@
 import boto3
+import base64
 import json
 import os
+from decimal import Decimal
+from tools.progress import DIMENSIONS, calculate_overall_progress, get_latest_items
+from tools.session_memory import flush
 
+# Attributes the summary needs from each ':latest' record; 'data' payloads are never read
+SUMMARY_PROJECTION = 'completion_percentage, is_complete, last_updated, record_type, extraction_data'
+HISTORY_PROJECTION = 's_key, record_type, #ts, completion_percentage'
+MAX_HISTORY_LIMIT = 50
 
-def get_session_state(session_id: str) -> str:
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value % 1 == 0 else float(value)
+    return str(value)
+
+
+def _compact(payload: dict) -> str:
+    return json.dumps(payload, separators=(',', ':'), default=_json_default)
+
+
+def _encode_cursor(last_evaluated_key: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key, default=str).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: str) -> dict:
+    return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+
+
+def _summarize_item(item: dict) -> dict:
+    summary = {
+        'completion_percentage': item.get('completion_percentage', 0),
+        'is_complete': item.get('is_complete', False),
+        'last_updated': item.get('last_updated'),
+        'record_type': item.get('record_type'),
+    }
+    extraction = item.get('extraction_data')
+    if extraction:
+        summary['extraction'] = {
+            'document_key': extraction.get('document_key'),
+            'filled_fields': extraction.get('filled_fields'),
+            'total_fields': extraction.get('total_fields'),
+            'min_confidence': extraction.get('min_confidence'),
+            'avg_confidence': extraction.get('avg_confidence'),
+        }
+    return summary
+
+
+def get_session_state(session_id: str, mode: str = 'summary', limit: int = 20, cursor: str = None) -> str:
     """
-    Retrieve all session records from DynamoDB for agent analysis.
-    
+    Retrieve session state from DynamoDB for agent analysis.
+
     Args:
         session_id: Unique session identifier
-        
+        mode: 'summary' for the latest state of each dimension and overall progress,
+              'history' for a page of timestamped records (without data payloads)
+        limit: Maximum number of history records to return (history mode only)
+        cursor: Opaque cursor from a previous history page (history mode only)
+
     Returns:
-        JSON string with all session records for agent interpretation
+        Compact JSON string with the session state for agent interpretation
     """
     try:
         table_name = os.environ['SESSION_MEMORY_TABLE']
         region = os.environ.get('AWS_REGION', 'ap-southeast-2')
-        
+
         dynamodb = boto3.resource('dynamodb', region_name=region)
         table = dynamodb.Table(table_name)
-        
-        # Get all assessment records for this session
-        response = table.query(
-            KeyConditionExpression='p_key = :pk AND begins_with(s_key, :sk)',
-            ExpressionAttributeValues={
-                ':pk': session_id,
-                ':sk': 'assessment:'
-            },
-            ScanIndexForward=False  # Most recent first
-        )
-        
-        session_records = response.get('Items', [])
-        
-        # Return raw data as JSON for agent analysis
-        return json.dumps({
+
+        if mode == 'history':
+            flush(session_id)
+            query = {
+                'KeyConditionExpression': 'p_key = :pk AND begins_with(s_key, :sk)',
+                'ExpressionAttributeValues': {
+                    ':pk': session_id,
+                    ':sk': 'assessment:'
+                },
+                'ProjectionExpression': HISTORY_PROJECTION,
+                'ExpressionAttributeNames': {'#ts': 'timestamp'},
+                'ScanIndexForward': False,  # Most recent first
+                'Limit': max(1, min(int(limit), MAX_HISTORY_LIMIT))
+            }
+            if cursor:
+                query['ExclusiveStartKey'] = _decode_cursor(cursor)
+            response = table.query(**query)
+            records = response.get('Items', [])
+            last_key = response.get('LastEvaluatedKey')
+            return _compact({
+                'session_id': session_id,
+                'mode': 'history',
+                'records': records,
+                'next_cursor': _encode_cursor(last_key) if last_key else None
+            })
+
+        # Summary: only the ':latest' record of each dimension and its gap analysis
+        gap_dimensions = [f'gap_analysis_{dim}' for dim in DIMENSIONS]
+        items = get_latest_items(session_id, DIMENSIONS + gap_dimensions, table, SUMMARY_PROJECTION)
+        progress = calculate_overall_progress(session_id, items=items)
+
+        dimensions = {}
+        for dim in DIMENSIONS:
+            if dim in items:
+                dimensions[dim] = _summarize_item(items[dim])
+                gap_item = items.get(f'gap_analysis_{dim}')
+                if gap_item:
+                    dimensions[dim]['gap_analysis_saved'] = gap_item.get('last_updated')
+            else:
+                dimensions[dim] = {'status': 'not_started'}
+
+        return _compact({
             'session_id': session_id,
-            'total_records': len(session_records),
-            'records': session_records
-        }, indent=2, default=str)
-        
+            'mode': 'summary',
+            'overall_percentage': progress['overallPercentage'],
+            'all_complete': progress['allComplete'],
+            'dimensions': dimensions
+        })
+
     except Exception as e:
-        return json.dumps({
+        return _compact({
             'session_id': session_id,
             'error': f"Error retrieving session state: {str(e)}",
             'records': []
-        }, indent=2)
+        })
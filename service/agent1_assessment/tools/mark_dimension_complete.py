@@ -1,9 +1,11 @@
 import boto3
 import os
 import time
-import json
 from datetime import datetime
 from decimal import Decimal
+from tools.progress import calculate_overall_progress
+from tools.progress_events import queue_event, queue_progress
+from tools.session_memory import flush
 
 
 def decimal_to_int(obj):
@@ -13,89 +15,6 @@ def decimal_to_int(obj):
     raise TypeError
 
 
-def calculate_overall_progress(session_id: str, table) -> dict:
-    """
-    Calculate overall assessment progress based on completed dimensions.
-    Each dimension = 25% (4 dimensions total = 100%)
-    
-    Returns:
-        dict with 'overallPercentage' and 'dimensions' list
-    """
-    dimensions = ['technical', 'business', 'commercial', 'governance']
-    completed_count = 0
-    dimension_details = []
-    
-    for dim in dimensions:
-        try:
-            response = table.get_item(
-                Key={
-                    'p_key': session_id,
-                    's_key': f'assessment:{dim}:latest'
-                }
-            )
-            
-            if 'Item' in response:
-                item = response['Item']
-                completion_pct = int(item.get('completion_percentage', 0))
-                is_complete = item.get('is_complete', False) or completion_pct >= 75
-                
-                dimension_details.append({
-                    'dimension': dim,
-                    'completionPercentage': completion_pct,
-                    'isComplete': is_complete
-                })
-                
-                if is_complete:
-                    completed_count += 1
-            else:
-                dimension_details.append({
-                    'dimension': dim,
-                    'completionPercentage': 0,
-                    'isComplete': False
-                })
-        except Exception as e:
-            print(f"Error checking {dim}: {e}")
-            dimension_details.append({
-                'dimension': dim,
-                'completionPercentage': 0,
-                'isComplete': False
-            })
-    
-    return {
-        'overallPercentage': completed_count * 25,
-        'dimensions': dimension_details
-    }
-
-
-def publish_progress_event(session_id: str, progress_data: dict):
-    """Publish assessment progress event to EventBridge"""
-    event_bus_name = os.environ.get('EVENT_BUS_NAME')
-    if not event_bus_name:
-        return  # Skip if not configured
-    
-    try:
-        region = os.environ.get('AWS_REGION', 'ap-southeast-2')
-        events_client = boto3.client('events', region_name=region)
-        
-        events_client.put_events(
-            Entries=[{
-                'Source': 'agent1.assessment',
-                'DetailType': 'assessment.progress.updated',
-                'Detail': json.dumps({
-                    'sessionId': session_id,
-                    'completionPercentage': progress_data['overallPercentage'],
-                    'dimensions': progress_data['dimensions'],
-                    'timestamp': datetime.now().isoformat()
-                }),
-                'EventBusName': event_bus_name
-            }]
-        )
-        print(f"Published progress event: {progress_data['overallPercentage']}%")
-    except Exception as e:
-        print(f"Failed to publish progress event: {e}")
-        # Don't fail the main operation
-
-
 def mark_dimension_complete(session_id: str, dimension: str) -> str:
     """
     Mark an assessment dimension as complete, allowing progression to the next dimension.
@@ -116,6 +35,7 @@ def mark_dimension_complete(session_id: str, dimension: str) -> str:
         table = dynamodb.Table(table_name)
         
         # Get current latest record for this dimension
+        flush(session_id)
         response = table.get_item(
             Key={
                 'p_key': session_id,
@@ -143,33 +63,20 @@ def mark_dimension_complete(session_id: str, dimension: str) -> str:
             }
         )
         
-        # Calculate overall progress and publish event
+        # Calculate overall progress; events are published in the background
         progress_data = calculate_overall_progress(session_id, table)
-        publish_progress_event(session_id, progress_data)
+        queue_progress(session_id, progress_data)
         
         # Check if ALL dimensions are complete
-        all_complete = progress_data['overallPercentage'] == 100
+        all_complete = progress_data['allComplete']
         if all_complete:
-            try:
-                event_bus_name = os.environ.get('EVENT_BUS_NAME')
-                if event_bus_name:
-                    events_client = boto3.client('events', region_name=region)
-                    events_client.put_events(
-                        Entries=[{
-                            'Source': 'agentic-ai-factory.assessment',
-                            'DetailType': 'assessment.completed',
-                            'Detail': json.dumps({
-                                'sessionId': session_id,
-                                'projectId': session_id,
-                                'allDimensionsComplete': True,
-                                'timestamp': datetime.now().isoformat()
-                            }),
-                            'EventBusName': event_bus_name
-                        }]
-                    )
-                    print(f"Published assessment.completed event for session {session_id}")
-            except Exception as e:
-                print(f"Error publishing assessment.completed event: {str(e)}")
+            queue_event('agentic-ai-factory.assessment', 'assessment.completed', {
+                'sessionId': session_id,
+                'projectId': session_id,
+                'allDimensionsComplete': True,
+                'timestamp': datetime.now().isoformat()
+            })
+            print(f"Queued assessment.completed event for session {session_id}")
         
         # Determine next dimension
         dimensions = ['technical', 'business', 'commercial', 'governance']
@@ -0,0 +1,249 @@
+import json
+import os
+import re
+import time
+
+# Field-level precedence: user input > high-confidence extraction > existing extraction.
+# Only free-text fields where neither side clearly wins are sent to the LLM.
+HIGH_CONFIDENCE = float(os.environ.get('MERGE_HIGH_CONFIDENCE', '0.8'))
+DEFAULT_EXTRACTION_CONFIDENCE = 0.8  # Matches the default save_assessment_data records
+MERGE_MODEL_ID = os.environ.get('MERGE_MODEL_ID', 'amazon.nova-pro-v1:0')
+
+TAKE_NEW = 'new'
+KEEP_EXISTING = 'existing'
+CONFLICT = 'conflict'
+
+
+def is_empty(value) -> bool:
+    return value is None or value == '' or value == [] or value == {} or (isinstance(value, str) and not value.strip())
+
+
+def field_confidence(explainability: dict, field_name: str):
+    """Confidence BDA reported for a field, or None when it did not report one"""
+    field_data = explainability.get(field_name)
+    if isinstance(field_data, dict) and 'confidence' in field_data:
+        return float(field_data['confidence'])
+    return None
+
+
+def _existing_field_state(existing_data: dict, field_name: str):
+    """Return (is_user_provided, confidence) for a field in the stored assessment"""
+    source = existing_data.get('_metadata', {}).get('field_sources', {}).get(field_name, {})
+    is_user = str(source.get('source', '')).startswith('user_input')
+    confidence = source.get('confidence')
+    if confidence is None:
+        explainability = (existing_data.get('explainability_info') or [{}])[0]
+        confidence = field_confidence(explainability, field_name)
+    if confidence is None:
+        confidence = DEFAULT_EXTRACTION_CONFIDENCE
+    return is_user, float(confidence)
+
+
+def decide(existing_value, new_value, existing_is_user: bool, existing_confidence: float,
+           new_confidence: float) -> str:
+    """Decide which side wins for one field"""
+    if is_empty(new_value):
+        return KEEP_EXISTING
+    if is_empty(existing_value):
+        return TAKE_NEW
+    if existing_value == new_value:
+        return KEEP_EXISTING
+    if existing_is_user:
+        return KEEP_EXISTING
+    if new_confidence >= HIGH_CONFIDENCE and new_confidence >= existing_confidence:
+        return TAKE_NEW
+    if isinstance(existing_value, str) and isinstance(new_value, str):
+        return CONFLICT
+    return TAKE_NEW if new_confidence > existing_confidence else KEEP_EXISTING
+
+
+def resolve_conflicts(conflicts: dict, region: str) -> dict:
+    """
+    Ask the LLM to reconcile genuinely conflicting free-text fields.
+
+    Args:
+        conflicts: {field_name: {'existing': str, 'new': str}}
+        region: AWS region for the Bedrock runtime client
+
+    Returns:
+        {field_name: merged_text} for the fields the model resolved; fields it
+        skipped or returned in an unusable form are left out
+    """
+    import boto3
+
+    bedrock = boto3.client('bedrock-runtime', region_name=region)
+    prompt = f"""You reconcile conflicting values for assessment fields. For each field, the EXISTING value came from an earlier extraction and the NEW value from a newly uploaded document.
+
+Write one merged value per field that keeps every distinct fact from both values, without repetition. Do not invent information.
+
+FIELDS:
+{json.dumps(conflicts, separators=(',', ':'))}
+
+Return ONLY a JSON object mapping each field name to its merged string value."""
+
+    response = bedrock.invoke_model(
+        modelId=MERGE_MODEL_ID,
+        contentType='application/json',
+        accept='application/json',
+        body=json.dumps({
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"text": prompt}
+                    ]
+                }
+            ],
+            "inferenceConfig": {
+                "max_new_tokens": 2048,
+                "temperature": 0
+            }
+        })
+    )
+    response_body = json.loads(response['body'].read())
+    text = response_body["output"]["message"]["content"][0]["text"]
+    json_match = re.search(r'\{.*\}', text, re.DOTALL)
+    if not json_match:
+        return {}
+    merged = json.loads(json_match.group())
+    return {
+        field_name: value for field_name, value in merged.items()
+        if field_name in conflicts and isinstance(value, str) and value.strip()
+    }
+
+
+def merge_extraction(existing_data, new_data: dict, region: str = None, use_llm: bool = True):
+    """
+    Merge a new BDA extraction into stored assessment data, field by field.
+
+    Args:
+        existing_data: Stored output.json content, or None if there is none
+        new_data: custom_output JSON from the new extraction
+        region: AWS region for conflict resolution calls
+        use_llm: Whether genuine free-text conflicts may be sent to the LLM
+
+    Returns:
+        (merged_data, stats) where stats counts how each field was decided
+    """
+    timestamp = int(time.time())
+    existing_data = existing_data or {}
+    region = region or os.environ.get('AWS_REGION', 'ap-southeast-2')
+
+    existing_inference = existing_data.get('inference_result', {})
+    new_inference = new_data.get('inference_result', {})
+    existing_explainability = (existing_data.get('explainability_info') or [{}])[0]
+    new_explainability = (new_data.get('explainability_info') or [{}])[0]
+    field_sources = dict(existing_data.get('_metadata', {}).get('field_sources', {}))
+
+    merged_inference = dict(existing_inference)
+    merged_explainability = dict(existing_explainability)
+    stats = {'taken_new': 0, 'kept_existing': 0, 'llm_resolved': 0, 'conflicts': 0}
+    conflicts = {}
+    conflict_confidence = {}
+
+    def take_new(field_name, new_confidence):
+        merged_inference[field_name] = new_inference[field_name]
+        if field_name in new_explainability:
+            merged_explainability[field_name] = new_explainability[field_name]
+        field_sources[field_name] = {
+            'source': 'extraction',
+            'timestamp': timestamp,
+            'confidence': new_confidence
+        }
+        stats['taken_new'] += 1
+
+    for field_name in new_inference:
+        new_value = new_inference[field_name]
+        existing_value = existing_inference.get(field_name)
+        existing_is_user, existing_confidence = _existing_field_state(existing_data, field_name)
+        new_confidence = field_confidence(new_explainability, field_name)
+        if new_confidence is None:
+            new_confidence = DEFAULT_EXTRACTION_CONFIDENCE
+
+        decision = decide(existing_value, new_value, existing_is_user, existing_confidence, new_confidence)
+        if decision == TAKE_NEW:
+            take_new(field_name, new_confidence)
+        elif decision == CONFLICT:
+            conflicts[field_name] = {'existing': existing_value, 'new': new_value}
+            conflict_confidence[field_name] = (existing_confidence, new_confidence)
+        else:
+            stats['kept_existing'] += 1
+
+    stats['conflicts'] = len(conflicts)
+    resolved = {}
+    if conflicts and use_llm:
+        try:
+            resolved = resolve_conflicts(conflicts, region)
+        except Exception as e:
+            print(f"Error resolving merge conflicts with LLM: {e}, falling back to confidence")
+
+    for field_name, (existing_confidence, new_confidence) in conflict_confidence.items():
+        if field_name in resolved:
+            merged_inference[field_name] = resolved[field_name]
+            field_sources[field_name] = {
+                'source': 'merged',
+                'timestamp': timestamp,
+                'confidence': max(existing_confidence, new_confidence)
+            }
+            stats['llm_resolved'] += 1
+        elif new_confidence > existing_confidence:
+            take_new(field_name, new_confidence)
+        else:
+            stats['kept_existing'] += 1
+
+    # Document-level fields (matched_blueprint, document_class, ...) follow the newest extraction
+    merged = {**existing_data, **{k: v for k, v in new_data.items() if k not in ('_metadata',)}}
+    merged['inference_result'] = merged_inference
+    merged['explainability_info'] = [merged_explainability]
+    merged['_metadata'] = {
+        **existing_data.get('_metadata', {}),
+        'last_updated': timestamp,
+        'field_sources': field_sources,
+        'last_merge': stats
+    }
+    merged['_metadata'].setdefault('created', timestamp)
+    return merged, stats
+
+
+def merge_segment_outputs(outputs: list) -> dict:
+    """
+    Combine the custom_output of several segments (or document parts) into one.
+
+    For every field the non-empty value with the highest reported confidence
+    wins, together with its explainability entry. Segments are deterministic
+    inputs, so no LLM is involved.
+
+    Args:
+        outputs: custom_output JSON of each segment, in document order
+
+    Returns:
+        A single custom_output-shaped dict
+    """
+    if len(outputs) == 1:
+        return outputs[0]
+
+    merged_inference = {}
+    merged_explainability = {}
+    best_confidence = {}
+    for output in outputs:
+        inference = output.get('inference_result', {})
+        explainability = (output.get('explainability_info') or [{}])[0]
+        for field_name, value in inference.items():
+            confidence = field_confidence(explainability, field_name)
+            confidence = DEFAULT_EXTRACTION_CONFIDENCE if confidence is None else confidence
+            current = merged_inference.get(field_name)
+            if field_name not in merged_inference or (is_empty(current) and not is_empty(value)) or (
+                    not is_empty(value) and confidence > best_confidence[field_name]):
+                merged_inference[field_name] = value
+                best_confidence[field_name] = confidence
+                if field_name in explainability:
+                    merged_explainability[field_name] = explainability[field_name]
+                else:
+                    merged_explainability.pop(field_name, None)
+
+    # Document-level fields (matched_blueprint, document_class, ...) come from the first segment
+    merged = {k: v for k, v in outputs[0].items() if k not in ('inference_result', 'explainability_info')}
+    merged['inference_result'] = merged_inference
+    merged['explainability_info'] = [merged_explainability]
+    merged['segment_count'] = len(outputs)
+    return merged
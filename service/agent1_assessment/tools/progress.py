@@ -0,0 +1,90 @@
+import os
+
+import boto3
+
+from tools.session_memory import flush
+
+# Dimension weights from the agent prompt (technical 30%, governance 25%, business 25%, commercial 20%)
+DIMENSION_WEIGHTS = {
+    'technical': 30,
+    'business': 25,
+    'commercial': 20,
+    'governance': 25
+}
+DIMENSIONS = ['technical', 'business', 'commercial', 'governance']
+
+# A dimension counts as complete once it is marked complete or this well filled
+COMPLETE_THRESHOLD = 75
+
+
+def latest_key(session_id: str, dimension: str) -> dict:
+    return {'p_key': session_id, 's_key': f'assessment:{dimension}:latest'}
+
+
+def get_latest_items(session_id: str, dimensions: list = None, table=None, projection: str = None) -> dict:
+    """
+    Fetch the ':latest' record of several dimensions in one batch_get_item call.
+
+    Args:
+        session_id: Unique session identifier
+        dimensions: Dimensions to fetch (defaults to the four assessment dimensions)
+        table: Session memory Table resource; created from SESSION_MEMORY_TABLE if omitted
+        projection: Optional ProjectionExpression restricting the returned attributes
+
+    Returns:
+        {dimension: item} for the dimensions that have a latest record
+    """
+    dimensions = dimensions or DIMENSIONS
+    flush(session_id)  # Buffered writes must be visible to this read
+    if table is None:
+        region = os.environ.get('AWS_REGION', 'ap-southeast-2')
+        table_name = os.environ.get('SESSION_MEMORY_TABLE', 'agentic-ai-factory-session-memory-dev')
+        table = boto3.resource('dynamodb', region_name=region).Table(table_name)
+
+    request = {'Keys': [latest_key(session_id, dim) for dim in dimensions]}
+    if projection:
+        # Key attributes are needed to map items back to their dimension
+        request['ProjectionExpression'] = f"p_key, s_key, {projection}"
+
+    items = {}
+    pending = {table.name: request}
+    while pending:
+        response = table.meta.client.batch_get_item(RequestItems=pending)
+        for item in response.get('Responses', {}).get(table.name, []):
+            items[item['s_key'].split(':')[1]] = item
+        pending = response.get('UnprocessedKeys') or {}
+    return items
+
+
+def calculate_overall_progress(session_id: str, table=None, items: dict = None) -> dict:
+    """
+    Calculate weighted assessment progress from the latest record of every dimension.
+
+    Complete dimensions contribute their full weight, others contribute their
+    weight scaled by completion_percentage.
+
+    Returns:
+        dict with 'overallPercentage', 'allComplete' and a 'dimensions' list
+    """
+    if items is None:
+        items = get_latest_items(session_id, table=table,
+                                 projection='completion_percentage, is_complete')
+
+    overall = 0.0
+    dimension_details = []
+    for dim in DIMENSIONS:
+        item = items.get(dim)
+        completion_pct = int(item.get('completion_percentage', 0)) if item else 0
+        is_complete = bool(item) and (bool(item.get('is_complete', False)) or completion_pct >= COMPLETE_THRESHOLD)
+        overall += DIMENSION_WEIGHTS[dim] * (100 if is_complete else completion_pct) / 100
+        dimension_details.append({
+            'dimension': dim,
+            'completionPercentage': completion_pct,
+            'isComplete': is_complete
+        })
+
+    return {
+        'overallPercentage': int(round(overall)),
+        'allComplete': all(detail['isComplete'] for detail in dimension_details),
+        'dimensions': dimension_details
+    }
@@ -0,0 +1,135 @@
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import boto3
+
+from tools.progress import calculate_overall_progress
+
+# Progress events are published from a background thread so tools return as
+# soon as their own writes are done. Requests for the same session are
+# coalesced: only the newest progress of each session is published, and all
+# pending events go out in batched put_events calls.
+COALESCE_SECONDS = float(os.environ.get('PROGRESS_EVENT_COALESCE_SECONDS', '0.5'))
+MAX_ENTRIES_PER_CALL = 10  # EventBridge put_events limit
+
+
+def _progress_entry(session_id: str, progress_data: dict, event_bus_name: str) -> dict:
+    return {
+        'Source': 'agent1.assessment',
+        'DetailType': 'assessment.progress.updated',
+        'Detail': json.dumps({
+            'sessionId': session_id,
+            'completionPercentage': progress_data['overallPercentage'],
+            'dimensions': progress_data['dimensions'],
+            'timestamp': datetime.now().isoformat()
+        }),
+        'EventBusName': event_bus_name
+    }
+
+
+class ProgressPublisher:
+    """Background publisher that coalesces progress updates per session"""
+
+    def __init__(self, coalesce_seconds: float = COALESCE_SECONDS):
+        self.coalesce_seconds = coalesce_seconds
+        self._condition = threading.Condition()
+        self._progress = {}  # session_id -> progress dict, or None to compute it when publishing
+        self._events = []    # other event entries, published after the progress events
+        self._busy = False
+        self._thread = None
+        self._client = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='progress-events', daemon=True)
+            self._thread.start()
+
+    def queue_progress(self, session_id: str, progress_data: dict = None):
+        """Queue a progress update; without progress_data it is calculated in the background"""
+        with self._condition:
+            self._progress[session_id] = progress_data
+            self._ensure_thread()
+            self._condition.notify_all()
+
+    def queue_event(self, entry: dict):
+        with self._condition:
+            self._events.append(entry)
+            self._ensure_thread()
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything queued so far is published; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._progress or self._events or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not (self._progress or self._events):
+                    self._condition.wait()
+                self._busy = True
+            # Let rapid consecutive updates of the same session collapse into one event
+            time.sleep(self.coalesce_seconds)
+            with self._condition:
+                progress, self._progress = self._progress, {}
+                events, self._events = self._events, []
+            try:
+                self._publish(progress, events)
+            except Exception as e:
+                print(f"Failed to publish progress events: {e}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _publish(self, progress: dict, events: list):
+        event_bus_name = os.environ.get('EVENT_BUS_NAME')
+        if not event_bus_name:
+            return  # Skip if not configured
+
+        entries = []
+        for session_id, progress_data in progress.items():
+            try:
+                if progress_data is None:
+                    progress_data = calculate_overall_progress(session_id)
+                entries.append(_progress_entry(session_id, progress_data, event_bus_name))
+            except Exception as e:
+                print(f"Failed to calculate progress for {session_id}: {e}")
+        entries += [{**entry, 'EventBusName': event_bus_name} for entry in events]
+
+        if self._client is None:
+            region = os.environ.get('AWS_REGION', 'ap-southeast-2')
+            self._client = boto3.client('events', region_name=region)
+        for start in range(0, len(entries), MAX_ENTRIES_PER_CALL):
+            batch = entries[start:start + MAX_ENTRIES_PER_CALL]
+            response = self._client.put_events(Entries=batch)
+            if response.get('FailedEntryCount'):
+                print(f"{response['FailedEntryCount']} of {len(batch)} progress events failed")
+        print(f"Published {len(entries)} progress events for {len(progress)} sessions")
+
+
+publisher = ProgressPublisher()
+atexit.register(publisher.flush, 5)
+
+
+def queue_progress(session_id: str, progress_data: dict = None):
+    publisher.queue_progress(session_id, progress_data)
+
+
+def queue_event(source: str, detail_type: str, detail: dict):
+    publisher.queue_event({'Source': source, 'DetailType': detail_type, 'Detail': json.dumps(detail)})
+
+
+def flush(timeout: float = None) -> bool:
+    return publisher.flush(timeout)
@@ -1,50 +1,176 @@
 import os
+import re
+
+# Guidelines are parsed once at import into per-category sections so callers
+# can ask for a single category or a compact outline instead of the whole file.
+GUIDELINES_DIR = os.environ.get('GUIDELINES_DIR', '/app/guidelines')
+DIMENSIONS = ['technical', 'governance', 'business', 'commercial']
+
+CATEGORY_HEADING = re.compile(r'^###\s+(?:(\d+)\.\s*)?(.+?)\s*$')
+SECTION_HEADING = re.compile(r'^##\s+(.+?)\s*$')
+LABEL = re.compile(r'^\*\*(.+?):\*\*\s*$')
+
+
+def _guidelines_dir() -> str:
+    if os.path.isdir(GUIDELINES_DIR):
+        return GUIDELINES_DIR
+    # Running outside the container: use the guidelines shipped next to the tools package
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'guidelines')
+
+
+def parse_guidelines(content: str) -> dict:
+    """
+    Split a guidelines markdown file into its parts.
+
+    Returns:
+        dict with 'header' (title, weight and description), 'categories' (list of
+        {'number', 'name', 'text', 'points', 'questions'}) and 'sections'
+        ({heading: text} for other '##' sections such as Scoring Guidance)
+    """
+    header, categories, sections = [], [], {}
+    current, current_section, label = None, None, None
+
+    for line in content.splitlines():
+        category_match = CATEGORY_HEADING.match(line)
+        section_match = SECTION_HEADING.match(line) if not category_match else None
+
+        if category_match:
+            current = {
+                'number': category_match.group(1),
+                'name': category_match.group(2),
+                'lines': [line],
+                'points': [],
+                'questions': []
+            }
+            categories.append(current)
+            current_section, label = None, None
+            continue
+        if section_match:
+            current, label = None, None
+            heading = section_match.group(1)
+            current_section = None if heading == 'Assessment Categories' else heading
+            if current_section:
+                sections[current_section] = [line]
+            continue
+
+        if current is not None:
+            current['lines'].append(line)
+            label_match = LABEL.match(line.strip())
+            if label_match:
+                label = label_match.group(1).lower()
+            elif line.strip().startswith('- '):
+                item = line.strip()[2:].strip()
+                if label == 'points to extract':
+                    current['points'].append(item)
+                elif label == 'sample questions':
+                    current['questions'].append(item)
+        elif current_section is not None:
+            sections[current_section].append(line)
+        else:
+            header.append(line)
+
+    for category in categories:
+        category['text'] = '\n'.join(category.pop('lines')).strip()
+    return {
+        'header': '\n'.join(header).strip(),
+        'categories': categories,
+        'sections': {heading: '\n'.join(lines).strip() for heading, lines in sections.items()}
+    }
+
+
+def load_guideline_index() -> dict:
+    """Parse every dimension's guidelines file; dimensions without a file are left out"""
+    index = {}
+    directory = _guidelines_dir()
+    for dimension in DIMENSIONS:
+        path = os.path.join(directory, f'{dimension}.md')
+        try:
+            with open(path, 'r') as f:
+                index[dimension] = parse_guidelines(f.read())
+        except OSError as e:
+            print(f"Unable to load guidelines from {path}: {e}")
+    return index
+
+
+GUIDELINE_INDEX = load_guideline_index()
+
+
+def find_category(guidelines: dict, category: str):
+    """Match a category by number ("2"), exact name or case-insensitive substring"""
+    wanted = category.strip().lower().rstrip('.')
+    for entry in guidelines['categories']:
+        if wanted == entry['number'] or wanted == entry['name'].lower():
+            return entry
+    for entry in guidelines['categories']:
+        if wanted in entry['name'].lower():
+            return entry
+    return None
+
+
+def guideline_points(dimension: str) -> str:
+    """
+    Compact form of a dimension's guidelines: category names and their points to extract.
+    Used where only coverage requirements matter, e.g. gap analysis prompts.
+    """
+    guidelines = GUIDELINE_INDEX.get(dimension)
+    if not guidelines:
+        return ''
+    lines = []
+    for entry in guidelines['categories']:
+        lines.append(f"{entry['number']}. {entry['name']}" if entry['number'] else entry['name'])
+        lines.extend(f"   - {point}" for point in entry['points'])
+    return '\n'.join(lines)
 
 
 def query_assessment_guidelines(dimension: str, category: str = None) -> str:
     """
     Retrieve structured assessment guidelines for conducting readiness evaluations across four dimensions.
     Use this tool to get specific points to extract and sample questions for each assessment area.
-    
+
     Available dimensions:
     - technical: Current architecture, integration landscape, data strategy, security, performance (30% weight)
-    - governance: AI governance, regulatory compliance, risk management, audit requirements (25% weight)  
+    - governance: AI governance, regulatory compliance, risk management, audit requirements (25% weight)
     - business: Business objectives, stakeholder buy-in, organizational culture, change readiness (25% weight)
     - commercial: Budget allocation, cost modeling, ROI expectations, resource planning (20% weight)
-    
+
     Args:
         dimension: Assessment dimension to query (technical, governance, business, commercial)
-        category: Optional specific category within dimension (currently not used, returns full guidelines)
-        
+        category: Optional category within the dimension, by number ("2"), name or part of the
+                  name ("Scoring Guidance" is also accepted). Without it, a compact outline of
+                  all categories and their points to extract is returned.
+
     Returns:
-        Formatted guidelines including points to extract from documents/conversations and sample questions
-        to ask users. Use this to ensure comprehensive coverage of assessment requirements.
+        The requested category with its points to extract and sample questions, or the outline
+        of the dimension. Use this to ensure comprehensive coverage of assessment requirements.
     """
     try:
-        # Map dimension to filename
-        dimension_files = {
-            'technical': 'technical.md',
-            'governance': 'governance.md',
-            'business': 'business.md',
-            'commercial': 'commercial.md'
-        }
-        
-        if dimension not in dimension_files:
+        if dimension not in DIMENSIONS:
             return f"Error: Invalid dimension '{dimension}'. Must be one of: technical, governance, business, commercial"
-        
-        # Read from local guidelines file
-        guidelines_path = os.path.join('/app/guidelines', dimension_files[dimension])
-        
-        if not os.path.exists(guidelines_path):
-            return f"Error: Guidelines file not found at {guidelines_path}"
-        
-        with open(guidelines_path, 'r') as f:
-            content = f.read()
-        
-        # If category is specified, optionally filter content (for now, return full content)
-        # Future enhancement: could search for category within content
-        
-        return content
-            
+
+        guidelines = GUIDELINE_INDEX.get(dimension)
+        if not guidelines:
+            return f"Error: Guidelines file not found for {dimension} in {_guidelines_dir()}"
+
+        if not category:
+            outline = [
+                guidelines['header'],
+                '',
+                '## Categories (request one by number or name for sample questions)',
+                guideline_points(dimension)
+            ]
+            if guidelines['sections']:
+                outline += ['', 'Other sections: ' + ', '.join(guidelines['sections'])]
+            return '\n'.join(outline)
+
+        for heading, text in guidelines['sections'].items():
+            if category.strip().lower() == heading.lower():
+                return text
+
+        entry = find_category(guidelines, category)
+        if entry is None:
+            available = [f"{c['number']}. {c['name']}" for c in guidelines['categories']] + list(guidelines['sections'])
+            return f"Error: Category '{category}' not found for {dimension}. Available: {'; '.join(available)}"
+        return entry['text']
+
     except Exception as e:
         return f"Error reading assessment guidelines: {str(e)}"
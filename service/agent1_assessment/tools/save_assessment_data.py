@@ -1,9 +1,11 @@
 import boto3
-import json
 import time
 import os
 from typing import Dict, Any
-from datetime import datetime
+from tools.assessment_store import update_assessment
+from tools.field_catalog import FIELD_CATALOG, completion_state
+from tools.progress_events import queue_progress
+from tools.session_memory import record_assessment
 
 
 def save_assessment_data(session_id: str, dimension: str, data: Dict[str, Any]) -> str:
@@ -30,137 +32,86 @@ def save_assessment_data(session_id: str, dimension: str, data: Dict[str, Any])
         
         timestamp = int(time.time())
         
-        # Update S3 file with intelligent merging FIRST
-        s3_key = f"{session_id}/assessment/{dimension}/output.json"
-        
-        try:
-            # Load existing S3 file
-            response = s3.get_object(Bucket=session_bucket, Key=s3_key)
-            existing_data = json.loads(response['Body'].read())
-        except s3.exceptions.NoSuchKey:
-            # No existing file, create new structure
-            existing_data = {
-                'inference_result': {},
-                'explainability_info': [{}],
-                '_metadata': {'created': timestamp}
-            }
-        
-        # Simple merge: combine existing and new data
-        existing_inference = existing_data.get('inference_result', {})
-        merged_inference = {**existing_inference, **data}
-
-        # Track field sources for all fields in merged data
-        field_sources = existing_data.get('_metadata', {}).get('field_sources', {})
-        for field_name in merged_inference.keys():
-            if field_name in data:
-                # Field came from or was updated by user input
-                field_sources[field_name] = {
-                    'source': 'user_input_enriched',
-                    'timestamp': timestamp,
-                    'confidence': 1.0  # User input = high confidence
-                }
-            elif field_name not in field_sources:
-                # Field from extraction, preserve existing source info
-                field_sources[field_name] = {
-                    'source': 'extraction',
-                    'timestamp': existing_data.get('_metadata', {}).get('last_updated', timestamp),
-                    'confidence': 0.8  # Default extraction confidence
+        # Update S3 file with intelligent merging FIRST. The write is conditional on the
+        # ETag that was read, so concurrent saves retry instead of losing updates.
+        def apply_update(existing_data):
+            if existing_data is None:
+                # No existing file, create new structure
+                existing_data = {
+                    'inference_result': {},
+                    'explainability_info': [{}],
+                    '_metadata': {'created': timestamp}
                 }
 
-        # Create updated data structure
-        updated_data = {
-            **existing_data,
-            'inference_result': merged_inference,
-            '_metadata': {
-                **existing_data.get('_metadata', {}),
-                'last_updated': timestamp,
-                'field_sources': field_sources,
-                'gap_filling_active': True
-            }
-        }
-        
-        # Calculate completion percentage based on filled fields
-        total_fields = len(merged_inference)
-        if total_fields == 0:
-            completion_percentage = 0
-        else:
-            filled_fields = sum(
-                1 for value in merged_inference.values() 
-                if value and (not isinstance(value, str) or value.strip())
-            )
-            completion_percentage = int((filled_fields / total_fields) * 100)
-        
-        # Save updated file to S3
-        s3.put_object(
-            Bucket=session_bucket,
-            Key=s3_key,
-            Body=json.dumps(updated_data, indent=2),
-            ContentType='application/json'
-        )
-        
-        # Save timestamped snapshot to DynamoDB
-        table.put_item(
-            Item={
-                'p_key': session_id,
-                's_key': f'assessment:{dimension}:{timestamp}',
-                'dimension': dimension,
-                'data': data,
-                'timestamp': timestamp,
-                'record_type': 'snapshot',
-                'ttl': timestamp + (90 * 24 * 60 * 60)  # 90 days TTL
+            # Simple merge: combine existing and new data
+            existing_inference = existing_data.get('inference_result', {})
+            merged_inference = {**existing_inference, **data}
+
+            # Track field sources for all fields in merged data
+            field_sources = dict(existing_data.get('_metadata', {}).get('field_sources', {}))
+            for field_name in merged_inference.keys():
+                if field_name in data:
+                    # Field came from or was updated by user input
+                    field_sources[field_name] = {
+                        'source': 'user_input_enriched',
+                        'timestamp': timestamp,
+                        'confidence': 1.0  # User input = high confidence
+                    }
+                elif field_name not in field_sources:
+                    # Field from extraction, preserve existing source info
+                    field_sources[field_name] = {
+                        'source': 'extraction',
+                        'timestamp': existing_data.get('_metadata', {}).get('last_updated', timestamp),
+                        'confidence': 0.8  # Default extraction confidence
+                    }
+
+            # Only the saved fields can change completion
+            completion = completion_state(dimension, merged_inference,
+                                          existing_data.get('_metadata', {}).get('completion'), data.keys())
+
+            # Create updated data structure
+            return {
+                **existing_data,
+                'inference_result': merged_inference,
+                '_metadata': {
+                    **existing_data.get('_metadata', {}),
+                    'last_updated': timestamp,
+                    'field_sources': field_sources,
+                    'completion': completion,
+                    'gap_filling_active': True
+                }
             }
-        )
+
+        updated_data, _ = update_assessment(s3, session_bucket, session_id, dimension, apply_update)
+        completion = updated_data['_metadata']['completion']
+        completion_percentage = completion['percentage']
+        filled_fields = completion['filled_fields']
+        total_fields = completion['total_fields']
         
-        # Save/update latest state in DynamoDB
-        table.put_item(
-            Item={
-                'p_key': session_id,
-                's_key': f'assessment:{dimension}:latest',
-                'dimension': dimension,
+        # Save the timestamped snapshot and the latest state in one transaction
+        record_assessment(
+            session_id,
+            dimension,
+            snapshot={'data': data, 'record_type': 'snapshot'},
+            latest={
                 'data': data,
-                'timestamp': timestamp,
-                'last_updated': timestamp,
                 'completion_percentage': completion_percentage,
-                'record_type': 'latest',
-                'ttl': timestamp + (90 * 24 * 60 * 60)  # 90 days TTL
-            }
+                'record_type': 'latest'
+            },
+            table=table
         )
         
-        # Publish progress event to EventBridge
-        event_bus_name = os.environ.get('EVENT_BUS_NAME')
-        if event_bus_name:
-            try:
-                events_client = boto3.client('events', region_name=region)
-                
-                # Calculate overall progress (each dimension = 25%)
-                dimensions = ['technical', 'business', 'commercial', 'governance']
-                completed_count = 0
-                for dim in dimensions:
-                    try:
-                        resp = table.get_item(Key={'p_key': session_id, 's_key': f'assessment:{dim}:latest'})
-                        if 'Item' in resp and resp['Item'].get('completion_percentage', 0) >= 100:
-                            completed_count += 1
-                    except:
-                        pass
-                
-                overall_percentage = completed_count * 25
-                
-                events_client.put_events(
-                    Entries=[{
-                        'Source': 'agent1.assessment',
-                        'DetailType': 'assessment.progress.updated',
-                        'Detail': json.dumps({
-                            'sessionId': session_id,
-                            'completionPercentage': overall_percentage,
-                            'timestamp': datetime.now().isoformat()
-                        }),
-                        'EventBusName': event_bus_name
-                    }]
-                )
-            except Exception as e:
-                print(f"Failed to publish progress event: {e}")
+        # Progress is calculated and published in the background
+        queue_progress(session_id)
         
-        return f"Assessment data saved for {dimension} dimension. Completion: {completion_percentage}% ({filled_fields}/{total_fields} fields filled)."
+        message = f"Assessment data saved for {dimension} dimension. Completion: {completion_percentage}% ({filled_fields}/{total_fields} fields filled)."
+        # Keys outside the blueprint are stored but never count towards completion
+        catalog = FIELD_CATALOG.get(dimension)
+        unknown_fields = [name for name in data if name not in catalog['index']] if catalog else []
+        if unknown_fields:
+            message += (f" Not blueprint fields, so not counted: {', '.join(unknown_fields)}."
+                        f" Save these answers again under the field names from analyze_document_gaps.")
+        return message
         
     except Exception as e:
         return f"Error saving assessment data: {str(e)}"
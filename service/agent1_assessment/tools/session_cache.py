@@ -0,0 +1,50 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+
+# Write-through cache of each dimension's output.json inside the runtime process.
+# Entries are versioned by the S3 ETag: every successful write replaces the
+# entry, a conflicting write drops it, and with SESSION_CACHE_VALIDATE=true
+# reads confirm the version with a conditional GET (304, no body) first.
+MAX_ENTRIES = int(os.environ.get('SESSION_CACHE_MAX_ENTRIES', '256'))
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # (session_id, dimension) -> {'data', 'etag'}
+
+
+def cache_enabled() -> bool:
+    return os.environ.get('SESSION_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def validate_reads() -> bool:
+    return os.environ.get('SESSION_CACHE_VALIDATE', 'false').lower() == 'true'
+
+
+def get(session_id: str, dimension: str):
+    """Return a copy of the cached entry, or None"""
+    if not cache_enabled():
+        return None
+    with _lock:
+        entry = _entries.get((session_id, dimension))
+        if entry is None:
+            return None
+        _entries.move_to_end((session_id, dimension))
+        return copy.deepcopy(entry)
+
+
+def put(session_id: str, dimension: str, data: dict, etag: str):
+    if not cache_enabled() or etag is None:
+        return
+    with _lock:
+        _entries[(session_id, dimension)] = {'data': copy.deepcopy(data), 'etag': etag}
+        _entries.move_to_end((session_id, dimension))
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def invalidate(session_id: str, dimension: str = None):
+    """Drop one dimension, or every dimension of a session"""
+    with _lock:
+        for key in [key for key in _entries if key[0] == session_id and (dimension is None or key[1] == dimension)]:
+            del _entries[key]
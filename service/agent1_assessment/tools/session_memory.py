@@ -0,0 +1,110 @@
+import atexit
+import os
+import secrets
+import threading
+import time
+
+import boto3
+
+
+# Every assessment write produces two records: a timestamped snapshot and the
+# ':latest' record. They are written together in one TransactWriteItems call.
+# Snapshot sort keys carry milliseconds plus a random suffix so saves within
+# the same second no longer overwrite each other.
+#
+# With SESSION_MEMORY_COALESCE=true, writes are buffered and flushed once per
+# turn (or before anything reads the latest records): all snapshots are kept,
+# but only the last ':latest' record of each dimension is written.
+RECORD_TTL_SECONDS = 90 * 24 * 60 * 60  # 90 days TTL
+MAX_TRANSACTION_ITEMS = 100
+
+
+def coalescing_enabled() -> bool:
+    return os.environ.get('SESSION_MEMORY_COALESCE', 'false').lower() == 'true'
+
+
+def session_table():
+    region = os.environ.get('AWS_REGION', 'ap-southeast-2')
+    return boto3.resource('dynamodb', region_name=region).Table(os.environ['SESSION_MEMORY_TABLE'])
+
+
+def snapshot_sort_key(dimension: str, timestamp_ms: int) -> str:
+    return f'assessment:{dimension}:{timestamp_ms}-{secrets.token_hex(2)}'
+
+
+def _transact_put(table, items: list):
+    """Write items in as few TransactWriteItems calls as possible"""
+    for start in range(0, len(items), MAX_TRANSACTION_ITEMS):
+        chunk = items[start:start + MAX_TRANSACTION_ITEMS]
+        table.meta.client.transact_write_items(
+            TransactItems=[{'Put': {'TableName': table.name, 'Item': item}} for item in chunk]
+        )
+
+
+class SessionMemoryWriter:
+    """Buffers snapshot/latest pairs per (session, dimension) until flushed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # (table name, session_id, dimension) -> {'table', 'snapshots', 'latest'}
+
+    def add(self, table, session_id: str, dimension: str, snapshot: dict, latest: dict):
+        with self._lock:
+            entry = self._pending.setdefault((table.name, session_id, dimension),
+                                             {'table': table, 'snapshots': [], 'latest': None})
+            entry['snapshots'].append(snapshot)
+            entry['latest'] = latest
+
+    def flush(self, session_id: str = None):
+        """Write buffered records, for one session or for all of them"""
+        with self._lock:
+            keys = [key for key in self._pending if session_id is None or key[1] == session_id]
+            entries = [self._pending.pop(key) for key in keys]
+        for entry in entries:
+            try:
+                _transact_put(entry['table'], entry['snapshots'] + [entry['latest']])
+            except Exception as e:
+                print(f"Failed to flush session memory for {entry['latest']['s_key']}: {e}")
+
+
+_writer = SessionMemoryWriter()
+atexit.register(_writer.flush)
+
+
+def flush(session_id: str = None):
+    _writer.flush(session_id)
+
+
+def record_assessment(session_id: str, dimension: str, snapshot: dict, latest: dict,
+                      table=None, coalesce: bool = None) -> str:
+    """
+    Write a timestamped snapshot and the ':latest' record of a dimension together.
+
+    Args:
+        snapshot: Snapshot attributes (keys, dimension, timestamps and ttl are added)
+        latest: ':latest' record attributes (keys, dimension, timestamps and ttl are added)
+        table: Session memory Table resource; created from SESSION_MEMORY_TABLE if omitted
+        coalesce: Buffer until flush(); defaults to SESSION_MEMORY_COALESCE
+
+    Returns:
+        Sort key of the snapshot record
+    """
+    if table is None:
+        table = session_table()
+    timestamp_ms = int(time.time() * 1000)
+    timestamp = timestamp_ms // 1000
+    common = {
+        'p_key': session_id,
+        'dimension': dimension,
+        'timestamp': timestamp,
+        'timestamp_ms': timestamp_ms,
+        'ttl': timestamp + RECORD_TTL_SECONDS
+    }
+    snapshot_item = {**snapshot, **common, 's_key': snapshot_sort_key(dimension, timestamp_ms)}
+    latest_item = {'last_updated': timestamp, **latest, **common, 's_key': f'assessment:{dimension}:latest'}
+
+    if coalesce if coalesce is not None else coalescing_enabled():
+        _writer.add(table, session_id, dimension, snapshot_item, latest_item)
+    else:
+        _transact_put(table, [snapshot_item, latest_item])
+    return snapshot_item['s_key']
@@ -0,0 +1,100 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Runtime state per session. One container can serve many sessions, and
+# concurrent requests: every session gets its own Agent (and with it its own
+# conversation history) and state dict, and requests for the same session are
+# serialised by a per-session lock. Sessions are kept in a bounded LRU and
+# evicted when the runtime holds too many or they have been idle too long.
+MAX_SESSIONS = int(os.environ.get('MAX_SESSIONS_PER_RUNTIME', '32'))
+SESSION_IDLE_SECONDS = int(os.environ.get('SESSION_IDLE_SECONDS', '3600'))
+
+_current_session = contextvars.ContextVar('runtime_session', default=None)
+
+
+class RuntimeSession:
+    """State, agent and lock of one session"""
+
+    def __init__(self, session_id: str, agent_factory):
+        self.session_id = session_id
+        self.state = {'session_id': session_id}
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self._agent_factory = agent_factory
+        self._agent = None
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            self._agent = self._agent_factory()
+        return self._agent
+
+    @property
+    def busy(self) -> bool:
+        return self.lock.locked()
+
+
+class SessionRegistry:
+    """Bounded LRU of RuntimeSession objects keyed by session_id"""
+
+    def __init__(self, agent_factory, max_sessions: int = MAX_SESSIONS,
+                 idle_seconds: int = SESSION_IDLE_SECONDS, on_evict=None):
+        self.agent_factory = agent_factory
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+
+    def get(self, session_id: str) -> RuntimeSession:
+        """Return the session's runtime state, creating it if needed"""
+        with self._lock:
+            runtime_session = self._sessions.get(session_id)
+            if runtime_session is None:
+                runtime_session = RuntimeSession(session_id, self.agent_factory)
+                self._sessions[session_id] = runtime_session
+            self._sessions.move_to_end(session_id)
+            runtime_session.last_used = time.monotonic()
+            evicted = self._evict()
+        for old_session in evicted:
+            print(f"Evicted runtime session {old_session.session_id}")
+            if self.on_evict:
+                try:
+                    self.on_evict(old_session)
+                except Exception as e:
+                    print(f"Error cleaning up session {old_session.session_id}: {e}")
+        return runtime_session
+
+    def _evict(self) -> list:
+        """Drop idle and least recently used sessions; sessions handling a request are kept"""
+        now = time.monotonic()
+        evicted = []
+        for session_id, runtime_session in list(self._sessions.items()):
+            too_many = len(self._sessions) > self.max_sessions
+            idle = now - runtime_session.last_used > self.idle_seconds
+            if not (too_many or idle):
+                break
+            if runtime_session.busy:
+                continue
+            evicted.append(self._sessions.pop(session_id))
+        return evicted
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+def activate(runtime_session: RuntimeSession):
+    """Make runtime_session the current session of this request (and the tool calls it makes)"""
+    _current_session.set(runtime_session)
+
+
+def current_session() -> dict:
+    """State dict of the session the current request belongs to"""
+    runtime_session = _current_session.get()
+    if runtime_session is None:
+        raise RuntimeError("No active session for this request")
+    return runtime_session.state
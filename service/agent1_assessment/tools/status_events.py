@@ -0,0 +1,106 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+
+from tools.progress_events import queue_event
+
+# Intermediate status of long-running tools (extraction submitted, in progress,
+# merging, saved). While a request is streaming, the entrypoint opens a channel
+# for its session and interleaves these events with the agent's own output, so
+# the client sees activity while a tool blocks. The same events go to
+# EventBridge for the UI through the background progress publisher.
+HEARTBEAT_SECONDS = float(os.environ.get('STATUS_EVENT_INTERVAL_SECONDS', '15'))
+
+_lock = threading.Lock()
+_channels = {}  # session_id -> StatusChannel
+
+
+class StatusChannel:
+    """Thread-safe hand-off of status events from tool threads to the request's event loop"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    def put(self, event: dict):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+
+def open_channel(session_id: str) -> StatusChannel:
+    channel = StatusChannel(asyncio.get_running_loop())
+    with _lock:
+        _channels[session_id] = channel
+    return channel
+
+
+def close_channel(session_id: str, channel: StatusChannel):
+    with _lock:
+        if _channels.get(session_id) is channel:
+            del _channels[session_id]
+
+
+def emit(session_id: str, stage: str, message: str, **detail):
+    """Send a status event to the session's open stream (if any) and to EventBridge"""
+    event = {
+        'type': 'status',
+        'stage': stage,
+        'message': message,
+        **detail,
+        'timestamp': datetime.now().isoformat()
+    }
+    with _lock:
+        channel = _channels.get(session_id)
+    if channel is not None:
+        try:
+            channel.put(event)
+        except RuntimeError:
+            pass  # The request's event loop is gone
+    queue_event('agent1.assessment', 'assessment.extraction.status', {'sessionId': session_id, **event})
+
+
+def poll_reporter(session_id: str, dimension: str, interval: float = HEARTBEAT_SECONDS):
+    """on_poll callback for wait_for_data_automation that emits an in-progress event every interval"""
+    last = {'at': time.monotonic()}
+
+    def on_poll(status: str, elapsed: float):
+        now = time.monotonic()
+        if status in ('Created', 'InProgress') and now - last['at'] >= interval:
+            last['at'] = now
+            emit(session_id, 'in_progress', f"{dimension} extraction {status.lower()} ({int(elapsed)}s elapsed)",
+                 dimension=dimension, elapsed_seconds=int(elapsed))
+
+    return on_poll
+
+
+async def merge_with_status(stream, channel: StatusChannel):
+    """
+    Yield events of the agent stream and of the status channel as they arrive.
+
+    Agent events are yielded as ('agent', event), status events as ('status', event).
+    """
+    done = object()
+
+    async def pump():
+        try:
+            async for event in stream:
+                await channel.queue.put(('agent', event))
+        finally:
+            await channel.queue.put(('done', done))
+
+    # Status events are put on the same queue, tagged on the way out
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            item = await channel.queue.get()
+            if isinstance(item, tuple) and item[0] == 'agent':
+                yield item
+            elif isinstance(item, tuple) and item[0] == 'done':
+                break
+            else:
+                yield ('status', item)
+        await task  # Surface errors from the agent stream
+    finally:
+        if not task.done():
+            task.cancel()
@@ -1,5 +1,4 @@
 from bedrock_agentcore import BedrockAgentCoreApp, RequestContext
-from strands.agent.conversation_manager import SlidingWindowConversationManager
 from strands.models import BedrockModel
 from strands import Agent
 from strands.tools import tool
@@ -7,12 +6,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict, Any, List
 import json
 import os
+from tools.context_strategy import build_conversation_manager
+from tools.session_registry import SessionRegistry, activate, current_session
 
 app = BedrockAgentCoreApp()
 
-# Global session object for this agent instance
-session = {}
-
 # Assessment dimensions configuration
 ASSESSMENT_DIMENSIONS = {
     "technical": {
@@ -47,20 +45,22 @@ app.add_middleware(
 )
 
 @tool
-def get_assessment_data(dimension: str = "technical") -> str:
+def get_assessment_data(dimension: str = "technical", summary_only: bool = False) -> str:
     """
     Retrieve assessment data from Assessment Agent for design generation.
     
     Args:
         session_id: Session identifier from Assessment Agent
         dimension: Assessment dimension to retrieve (default: technical)
+        summary_only: Return only field names, fill status and confidence, without values.
+                      Use it to check what a dimension covers before fetching the full data.
         
     Returns:
         Assessment data including extracted information and user responses
     """
-    global session
+    session = current_session()
     from tools.get_assessment_data import get_assessment_data as _get_assessment_data
-    return _get_assessment_data(session['session_id'], dimension)
+    return _get_assessment_data(session['session_id'], dimension, summary_only)
 
 @tool
 def initialize_hld_structure() -> str:
@@ -71,7 +71,7 @@ def initialize_hld_structure() -> str:
     Returns:
         Confirmation that structure was initialized
     """
-    global session
+    session = current_session()
     from tools.initialize_hld_structure import initialize_hld_structure as _initialize_hld_structure
     return _initialize_hld_structure(session['session_id'])
 
@@ -84,7 +84,7 @@ def get_next_section_to_generate() -> str:
     Returns:
         JSON with next section details or completion message
     """
-    global session
+    session = current_session()
     from tools.get_next_section_to_generate import get_next_section_to_generate as _get_next_section_to_generate
     return _get_next_section_to_generate(session['session_id'])
 
@@ -97,7 +97,7 @@ def get_hld_progress() -> str:
     Returns:
         JSON with progress details
     """
-    global session
+    session = current_session()
     from tools.get_hld_progress import get_hld_progress as _get_hld_progress
     return _get_hld_progress(session['session_id'])
 
@@ -112,7 +112,7 @@ def get_design_output(section_id: str) -> str:
     Returns:
         Current section markdown content or PENDING status
     """
-    global session
+    session = current_session()
     from tools.get_design_output import get_design_output as _get_design_output
     return _get_design_output(session['session_id'], section_id)
 
@@ -156,7 +156,7 @@ def save_design_output(section_id: str, content: str) -> str:
     Returns:
         Confirmation with progress update
     """
-    global session
+    session = current_session()
     from tools.save_design_output import save_design_output as _save_design_output
     return _save_design_output(session['session_id'], section_id, content)
 
@@ -169,7 +169,7 @@ def assemble_hld_document() -> str:
     Returns:
         Confirmation with final document location and word count
     """
-    global session
+    session = current_session()
     from tools.assemble_hld_document import assemble_hld_document as _assemble_hld_document
     return _assemble_hld_document(session['session_id'])
 
@@ -182,27 +182,8 @@ bedrock_model = BedrockModel(
     max_tokens=10000
 )
 
-# Create a conversation manager with custom window size
-conversation_manager = SlidingWindowConversationManager(
-    window_size=20,  # Maximum number of messages to keep
-    should_truncate_results=True, # Enable truncating the tool result when a message is too large for the model's context window 
-)
 
-agent = Agent(
-    model=bedrock_model,
-    conversation_manager=None,
-    tools=[
-        initialize_hld_structure,
-        get_next_section_to_generate,
-        get_hld_progress,
-        get_assessment_data,
-        get_design_output,
-        search_aws_patterns,
-        read_aws_documentation,
-        save_design_output,
-        assemble_hld_document
-    ],
-    system_prompt="""You are Agent 2 - High-Level Design Generation Agent for the Agentic AI Factory.
+SYSTEM_PROMPT = """You are Agent 2 - High-Level Design Generation Agent for the Agentic AI Factory.
 
 CONTEXT: You receive assessment data from Agent 1 and generate a comprehensive High-Level Design (HLD) document for agentic AI transformation. The HLD follows enterprise standards with 30 sections covering all aspects of the solution.
 
@@ -285,7 +266,7 @@ SECTION GENERATION GUIDELINES:
 - initialize_hld_structure() - Set up structure (call once)
 - get_next_section_to_generate() - Get next section to work on
 - get_hld_progress() - Check overall progress
-- get_assessment_data(dimension) - Get assessment findings
+- get_assessment_data(dimension, summary_only) - Get assessment findings (summary_only=True lists fields and their fill status without values)
 - get_design_output(section_id) - Review existing section
 - search_aws_patterns(query) - Find AWS patterns
 - read_aws_documentation(url) - Read AWS docs
@@ -300,27 +281,62 @@ SECTION GENERATION GUIDELINES:
 - Track progress with get_hld_progress()
 
 Work systematically through all 30 sections to create a comprehensive, enterprise-grade HLD document."""
-)
+
+
+def create_agent() -> Agent:
+    """Build the agent for one session; every session keeps its own conversation"""
+    return Agent(
+        model=bedrock_model,
+        # Sections are generated in long tool loops, so the budget also applies within a turn
+        conversation_manager=build_conversation_manager(
+            max_input_tokens=80000,
+            tool_result_max_chars=8000,
+            preserve_recent_messages=12,
+            window_size=20,  # Maximum number of messages to keep
+            per_turn=True,
+            checkpoint_tool='save_design_output',
+            checkpoint_arg='section_id',
+            checkpoint_label='section',
+            review_hint='Their content is saved; use get_hld_progress() or get_design_output(section_id) to review it.'
+        ),
+        tools=[
+            initialize_hld_structure,
+            get_next_section_to_generate,
+            get_hld_progress,
+            get_assessment_data,
+            get_design_output,
+            search_aws_patterns,
+            read_aws_documentation,
+            save_design_output,
+            assemble_hld_document
+        ],
+        system_prompt=SYSTEM_PROMPT
+    )
+
+
+sessions = SessionRegistry(create_agent)
 
 @app.entrypoint
 async def invoke(payload, context: RequestContext):
     """Agent 2 - High-Level Design Generation"""
-    global session
     print("==================INVOKING AGENT 2===================")
     request_headers = context.request_headers
     print("Headers:")
     print(json.dumps(request_headers))
-    if session.get('session_id') is None:
-        session['session_id'] = payload.get("session_id", "")
-        print("SESSION_ID: " + session['session_id'])
+    session_id = payload.get("session_id") or getattr(context, 'session_id', None) or ""
+    print("SESSION_ID: " + session_id)
+    runtime_session = sessions.get(session_id)
+    activate(runtime_session)
     user_message = payload.get("prompt", "Hello!")
     
     input_message_list = [{"text": user_message}]
 
-    stream = agent.stream_async(input_message_list)
-    async for event in stream:
-        if "data" in event:
-            yield event["data"]
+    # Requests for the same session run one at a time on that session's agent
+    async with runtime_session.lock:
+        stream = runtime_session.agent.stream_async(input_message_list)
+        async for event in stream:
+            if "data" in event:
+                yield event["data"]
 
 if __name__ == "__main__":
     app.run()
@@ -0,0 +1,145 @@
+import copy
+import json
+import os
+
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+
+# Keeps the conversation sent to the model bounded as a session grows:
+# - tool results older than the most recent messages are truncated,
+# - once a checkpoint tool (e.g. mark_dimension_complete) succeeded, the
+#   conversation before it is replaced by a short summary, since everything it
+#   produced is persisted and can be re-read with tools,
+# - the oldest messages are dropped until the estimated input fits the budget.
+CHARS_PER_TOKEN = 4
+SUMMARY_MARKER = '[Context summary]'
+
+
+def estimate_tokens(messages: list) -> int:
+    """Rough token estimate of a message list (characters / 4)"""
+    chars = 0
+    for message in messages:
+        for block in message.get('content', []):
+            if 'text' in block:
+                chars += len(block['text'])
+            elif 'toolResult' in block:
+                for item in block['toolResult'].get('content', []):
+                    chars += len(item['text']) if 'text' in item else len(json.dumps(item.get('json', ''), default=str))
+            elif 'toolUse' in block:
+                chars += len(json.dumps(block['toolUse'].get('input', {}), default=str))
+    return chars // CHARS_PER_TOKEN
+
+
+def _is_plain_user_message(message: dict) -> bool:
+    return message.get('role') == 'user' and not any('toolResult' in block for block in message.get('content', []))
+
+
+class ContextBudgetConversationManager(SlidingWindowConversationManager):
+    """Sliding window with a token budget, tool-result truncation and checkpoint summaries"""
+
+    def __init__(self, max_input_tokens: int, tool_result_max_chars: int, preserve_recent_messages: int,
+                 window_size: int = 40, per_turn: bool = False, checkpoint_tool: str = None,
+                 checkpoint_arg: str = None, checkpoint_label: str = 'item', review_hint: str = ''):
+        super().__init__(window_size=window_size, should_truncate_results=True, per_turn=per_turn)
+        self.max_input_tokens = max_input_tokens
+        self.tool_result_max_chars = tool_result_max_chars
+        self.preserve_recent_messages = preserve_recent_messages
+        self.checkpoint_tool = checkpoint_tool
+        self.checkpoint_arg = checkpoint_arg  # Argument of the checkpoint tool that names what was completed
+        self.checkpoint_label = checkpoint_label
+        self.review_hint = review_hint
+        self.finished = []
+
+    def apply_management(self, agent, **kwargs):
+        messages = agent.messages
+        if self.checkpoint_tool:
+            self._summarize_finished(messages)
+        self._shorten_old_tool_results(messages)
+        super().apply_management(agent, **kwargs)
+
+        while estimate_tokens(messages) > self.max_input_tokens and len(messages) > self.preserve_recent_messages:
+            before = len(messages)
+            try:
+                self.reduce_context(agent)
+            except Exception as e:
+                print(f"Unable to reduce conversation further: {e}")
+                break
+            if len(messages) >= before:
+                break
+
+    def _shorten_old_tool_results(self, messages: list):
+        """Shorten large tool results outside the most recent messages"""
+        for message in messages[:max(0, len(messages) - self.preserve_recent_messages)]:
+            for block in message.get('content', []):
+                if 'toolResult' not in block:
+                    continue
+                for item in block['toolResult'].get('content', []):
+                    text = item.get('text')
+                    if text is None and 'json' in item:
+                        text = json.dumps(item['json'], default=str)
+                        if len(text) > self.tool_result_max_chars:
+                            del item['json']
+                    if text is not None and len(text) > self.tool_result_max_chars:
+                        item['text'] = (f"{text[:self.tool_result_max_chars]}... "
+                                        f"[truncated {len(text) - self.tool_result_max_chars} characters]")
+
+    def _summarize_finished(self, messages: list):
+        """Replace the conversation up to the last successful checkpoint with a summary"""
+        checkpoint_index = None
+        tool_uses = {}
+        for index, message in enumerate(messages):
+            for block in message.get('content', []):
+                if 'toolUse' in block and block['toolUse'].get('name') == self.checkpoint_tool:
+                    tool_uses[block['toolUse'].get('toolUseId')] = block['toolUse'].get('input', {})
+                elif 'toolResult' in block and block['toolResult'].get('toolUseId') in tool_uses:
+                    result = block['toolResult']
+                    text = ''.join(item.get('text', '') for item in result.get('content', []))
+                    if result.get('status') == 'success' and not text.startswith('Error'):
+                        label = tool_uses[result['toolUseId']].get(self.checkpoint_arg) if self.checkpoint_arg else None
+                        if isinstance(label, str) and label and label not in self.finished:
+                            self.finished.append(label)
+                        checkpoint_index = index
+        if checkpoint_index is None:
+            return
+
+        # Cut at the next plain user message so the remaining conversation stays well formed
+        cut = next((i for i in range(checkpoint_index + 1, len(messages)) if _is_plain_user_message(messages[i])), None)
+        if cut is None:
+            return
+
+        summary = (f"{SUMMARY_MARKER} Earlier conversation was removed after these {self.checkpoint_label}s "
+                   f"were completed: {', '.join(self.finished)}. {self.review_hint}").strip()
+        first = copy.deepcopy(messages[cut])
+        first['content'] = [{'text': summary}] + [
+            block for block in first['content'] if not block.get('text', '').startswith(SUMMARY_MARKER)
+        ]
+        removed = cut
+        messages[:] = [first] + messages[cut + 1:]
+        self.removed_message_count += removed
+        print(f"Summarized {removed} messages for completed {self.checkpoint_label}s: {', '.join(self.finished)}")
+
+
+def build_conversation_manager(strategy: str = None, **defaults):
+    """
+    Build the conversation manager configured for an agent.
+
+    CONTEXT_STRATEGY selects 'budget' (default), 'sliding' or 'none'; the budget
+    settings can be overridden with CONTEXT_MAX_INPUT_TOKENS,
+    CONTEXT_TOOL_RESULT_MAX_CHARS, CONTEXT_PRESERVE_RECENT_MESSAGES and
+    CONTEXT_WINDOW_SIZE. Keyword arguments are the agent's defaults; per_turn=True
+    also applies the budget before every model call within a turn.
+    """
+    strategy = (strategy or os.environ.get('CONTEXT_STRATEGY', 'budget')).lower()
+    window_size = int(os.environ.get('CONTEXT_WINDOW_SIZE', defaults.pop('window_size', 40)))
+    if strategy == 'none':
+        return None
+    if strategy == 'sliding':
+        return SlidingWindowConversationManager(window_size=window_size, should_truncate_results=True)
+    return ContextBudgetConversationManager(
+        max_input_tokens=int(os.environ.get('CONTEXT_MAX_INPUT_TOKENS', defaults.pop('max_input_tokens', 60000))),
+        tool_result_max_chars=int(os.environ.get('CONTEXT_TOOL_RESULT_MAX_CHARS',
+                                                 defaults.pop('tool_result_max_chars', 4000))),
+        preserve_recent_messages=int(os.environ.get('CONTEXT_PRESERVE_RECENT_MESSAGES',
+                                                    defaults.pop('preserve_recent_messages', 10))),
+        window_size=window_size,
+        **defaults
+    )
@@ -1,15 +1,51 @@
 import boto3
+import gzip
 import json
 import os
+from botocore.exceptions import ClientError
 
 
-def get_assessment_data(session_id: str, dimension: str) -> str:
+def _decode_body(response: dict):
+    """Parse an assessment object body; the Assessment Agent may store it gzip-encoded"""
+    body = response['Body'].read()
+    if response.get('ContentEncoding') == 'gzip' or body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def _current_summary(s3, bucket: str, session_id: str, dimension: str):
+    """
+    Read a dimension's summary.json if it describes the current output.json.
+
+    The summary is written after the payload and may be missing or stale (a failed
+    summary write, racing writers), so its payload_etag is checked against the
+    payload's ETag.
+
+    Returns:
+        The summary, or None to read the full file instead
+    """
+    try:
+        summary = _decode_body(s3.get_object(Bucket=bucket, Key=f"{session_id}/assessment/{dimension}/summary.json"))
+        head = s3.head_object(Bucket=bucket, Key=f"{session_id}/assessment/{dimension}/output.json")
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None  # Assessed before summaries were written, or no assessment at all
+        raise
+    if head.get('ETag') != summary.get('payload_etag'):
+        print(f"Summary of {dimension} assessment is stale, reading the full file")
+        return None
+    return summary
+
+
+def get_assessment_data(session_id: str, dimension: str, summary_only: bool = False) -> str:
     """
     Retrieve assessment data from Assessment Agent's S3 storage.
     
     Args:
         session_id: Session identifier from Assessment Agent
         dimension: Assessment dimension to retrieve
+        summary_only: Read the small summary.json index (fill status and confidence
+                      per field) instead of the full output.json
         
     Returns:
         JSON string with assessment data for design generation
@@ -24,8 +60,19 @@ def get_assessment_data(session_id: str, dimension: str) -> str:
         s3_key = f"{session_id}/assessment/{dimension}/output.json"
         
         try:
+            summary = _current_summary(s3, session_bucket, session_id, dimension) if summary_only else None
+            if summary is not None:
+                return json.dumps({
+                    'session_id': session_id,
+                    'dimension': dimension,
+                    'status': 'found',
+                    'completion': summary.get('completion'),
+                    'fields': summary.get('fields', {}),
+                    'last_updated': summary.get('last_updated', 'unknown')
+                }, separators=(',', ':'), default=str)
+
             response = s3.get_object(Bucket=session_bucket, Key=s3_key)
-            assessment_data = json.loads(response['Body'].read())
+            assessment_data = _decode_body(response)
             
             # Return structured data for Agent 2 analysis
             return json.dumps({